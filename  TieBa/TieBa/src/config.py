@@ -20,10 +20,25 @@ FIGURES_DIR = os.path.join(OUTPUT_DIR, "figures")
 TIEBA_NAME = "数据科学与大数据技术"
 SEARCH_PAGES = 2  # 在搜索结果页翻几页来寻找帖子
 MAX_THREADS_TO_SCRAPE = 10  # 最多爬取多少个帖子
-MAX_REPLIES_PER_THREAD = 50 # 每个帖子最多爬取多少条回复
+MAX_REPLIES_PER_THREAD = 0 # 每个帖子最多爬取多少条回复，0 表示不限（爬取帖子的所有分页）
+MAX_PAGES_PER_THREAD = 0  # 每个帖子最多爬取多少页，0 表示不限
+THREAD_PAGE_WORKERS = 4  # 单个帖子的分页（?pn=2..N）最多同时请求几页（每个帖子的并发预算）
+
+# --- 并行爬取配置 ---
+SCRAPER_WORKERS = 4  # 并行爬取帖子的浏览器数量，1 表示用单个浏览器串行爬取
+HEADLESS_WORKERS = True  # 并行模式下爬取帖子的浏览器是否使用无头模式
+RATE_LIMIT_PER_SECOND = 2.0  # 所有浏览器和HTTP请求合计每秒最多打开的页面数（全局限速）
+
+# --- HTTP抓取配置 ---
+HTTP_FIRST = True  # 优先用HTTP直接抓取列表页和帖子页，需要JS或安全验证的页面才使用浏览器
+TIEBA_BASE_URL = "https://tieba.baidu.com"  # 贴吧地址，测试时可指向提供已保存页面的本地服务
+THREADS_PER_LIST_PAGE = 50  # 列表页每页帖子数（pn 参数的步长）
+HTTP_POOL_SIZE = 16  # HTTP连接池大小，不小于 SCRAPER_WORKERS * THREAD_PAGE_WORKERS 时连接可全部复用
+HTTP_TIMEOUT = 10  # HTTP请求超时（秒）
 
 # --- 文件路径配置 ---
 RAW_DATA_PATH = os.path.join(RAW_DATA_DIR, "1_raw_posts.csv")
+CRAWL_STATE_PATH = os.path.join(RAW_DATA_DIR, "crawl_state.db")  # 爬取状态（断点续爬/增量爬取），删除后重新全量爬取
 CLEANED_DATA_PATH = os.path.join(PROCESSED_DATA_DIR, "2_cleaned_data.csv")
 ANALYZED_DATA_PATH = os.path.join(PROCESSED_DATA_DIR, "3_analyzed_data.csv")
 
@@ -0,0 +1,256 @@
+# src/http_fetcher.py
+
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import html as lxml_html
+
+import config
+from utils.rate_limit import RateLimiter
+from utils.post_data import build_post_data, thread_page_url, pages_to_fetch, merge_floors
+
+# 被重定向到这些域名或页面中出现这些文字，说明遇到了安全验证/登录页，需要浏览器处理
+VERIFY_HOSTS = ('wappass.baidu.com', 'passport.baidu.com')
+VERIFY_TEXTS = ('百度安全验证',)
+
+# 帖子页脚本中的分页信息，如 "pager":{"cur_page":1,"total_page":5}
+TOTAL_PAGE_PATTERN = re.compile(r'"total_page"\s*:\s*(\d+)')
+PAGE_PARAM_PATTERN = re.compile(r'[?&]pn=(\d+)')
+
+
+def _class_xpath(class_name):
+	"""按 class 名匹配元素的XPath条件（元素可能有多个 class）"""
+	return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def _first(element, class_name):
+	"""element 下第一个带 class_name 的元素，没有时返回None"""
+	elements = element.xpath(f".//*[{_class_xpath(class_name)}]")
+	return elements[0] if elements else None
+
+
+def _text(element):
+	"""元素文本，<br> 换行，与浏览器中元素的 text 一致"""
+	for br in element.iter('br'):
+		br.tail = '\n' + (br.tail or '')
+	return element.text_content().strip()
+
+
+def _document(page):
+	"""HTML文本解析为lxml文档，已解析的文档原样返回"""
+	return lxml_html.fromstring(page) if isinstance(page, str) else page
+
+
+class TiebaHttpFetcher:
+	"""
+	用带连接池的HTTP会话直接抓取贴吧列表页和帖子页，lxml解析。
+	页面需要JS渲染或安全验证时返回None，由调用方改用浏览器抓取。
+	base_url 可指向提供已保存页面的本地服务，便于离线测试。
+	"""
+
+	def __init__(self, tieba_name=None, base_url=None, rate_limiter=None, pool_size=None, timeout=None,
+				 page_workers=None, max_pages=None):
+		self.tieba_name = tieba_name or config.TIEBA_NAME
+		self.base_url = (base_url or config.TIEBA_BASE_URL).rstrip('/')
+		self.rate_limiter = rate_limiter or RateLimiter(config.RATE_LIMIT_PER_SECOND)
+		self.timeout = timeout or config.HTTP_TIMEOUT
+		self.page_workers = page_workers or config.THREAD_PAGE_WORKERS
+		self.max_pages = config.MAX_PAGES_PER_THREAD if max_pages is None else max_pages
+		pool_size = pool_size or config.HTTP_POOL_SIZE
+
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+							  max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504)))
+		self.session.mount('http://', adapter)
+		self.session.mount('https://', adapter)
+		self.session.headers.update({
+			'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+			'Accept-Language': 'zh-CN,zh;q=0.9',
+		})
+
+	def close(self):
+		"""关闭连接池"""
+		self.session.close()
+
+	def list_url(self, page):
+		"""第 page 页（从0开始）列表页的URL，每页50个帖子"""
+		return f"{self.base_url}/f?kw={quote(self.tieba_name)}&ie=utf-8&pn={page * config.THREADS_PER_LIST_PAGE}"
+
+	def get(self, url):
+		"""请求页面，返回 (HTML, 是否需要浏览器)；请求失败时返回 (None, False)"""
+		self.rate_limiter.wait()
+		try:
+			response = self.session.get(url, timeout=self.timeout)
+		except requests.RequestException as e:
+			print(f"HTTP请求失败 {url}: {e}")
+			return None, False
+
+		if response.status_code in (403, 429) or any(host in response.url for host in VERIFY_HOSTS):
+			return None, True
+		if response.status_code != 200:
+			print(f"HTTP请求失败 {url}: 状态码 {response.status_code}")
+			return None, False
+
+		if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+			response.encoding = 'utf-8'  # 响应头未声明编码时按UTF-8解码
+		page = response.text
+		if any(text in page[:5000] for text in VERIFY_TEXTS):
+			return None, True
+		return page, False
+
+	def parse_post_links(self, page):
+		"""
+		解析列表页中的帖子链接 [{'title', 'url', 'reply_count', 'last_reply_time'}]，
+		包括放在HTML注释中延迟渲染的帖子列表
+		"""
+		doc = lxml_html.fromstring(page)
+		anchors = doc.xpath(f"//*[{_class_xpath('threadlist_title')}]//a")
+		if not anchors:
+			# 贴吧把帖子列表放在 <code> 内的HTML注释中，由JS插入页面
+			for comment in doc.xpath('//comment()'):
+				if 'threadlist_title' in (comment.text or ''):
+					fragment = lxml_html.fromstring(f'<div>{comment.text}</div>')
+					anchors.extend(fragment.xpath(f"//*[{_class_xpath('threadlist_title')}]//a"))
+
+		post_links = []
+		for anchor in anchors:
+			href = anchor.get('href')
+			title = (anchor.get('title') or _text(anchor)).strip()
+			if href and title:
+				post_link = {'title': title, 'url': urljoin(self.base_url + '/', href)}
+				post_link.update(self.parse_thread_meta(anchor))
+				post_links.append(post_link)
+		return post_links
+
+	def parse_thread_meta(self, anchor):
+		"""列表页上帖子的回复数和最后回复时间 {'reply_count', 'last_reply_time'}，取不到时为None"""
+		items = anchor.xpath(f"ancestor::*[{_class_xpath('j_thread_list')}][1]")
+		if not items:
+			return {'reply_count': None, 'last_reply_time': None}
+		item = items[0]
+
+		try:
+			reply_count = (json.loads(item.get('data-field') or '{}') or {}).get('reply_num')
+		except ValueError:
+			reply_count = None
+		if reply_count is None:
+			element = _first(item, 'threadlist_rep_num')
+			text = _text(element) if element is not None else ''
+			reply_count = int(text) if text.isdigit() else None
+
+		element = _first(item, 'threadlist_reply_date')
+		return {
+			'reply_count': int(reply_count) if reply_count is not None else None,
+			'last_reply_time': (_text(element) or None) if element is not None else None,
+		}
+
+	def parse_floors(self, page, limit=None):
+		"""解析帖子页的楼层，格式与浏览器内提取（FLOORS_SCRIPT）相同"""
+		doc = _document(page)
+		floors = []
+		for post in doc.xpath(f"//*[{_class_xpath('l_post')}]")[:limit]:
+			try:
+				field = json.loads(post.get('data-field') or '{}') or {}
+			except ValueError:
+				field = {}
+			content = field.get('content') or {}
+			author = field.get('author') or {}
+
+			tails = [_text(element) for element in post.xpath(f".//*[{_class_xpath('tail-info')}]")]
+			floor = content.get('post_no')
+			post_time = content.get('date')
+			for tail in tails:
+				if not floor and tail.endswith('楼') and tail[:-1].isdigit():
+					floor = int(tail[:-1])
+				if not post_time and len(tail) >= 10 and tail[4] == '-' and tail[7] == '-':
+					post_time = tail
+
+			content_element = _first(post, 'd_post_content')
+			author_element = _first(post, 'p_author_name')
+			post_id = (content.get('post_id') or post.get('data-pid')
+					   or (content_element.get('id', '').replace('post_content_', '') if content_element is not None else None))
+			floors.append({
+				'content': _text(content_element) if content_element is not None else None,
+				'author': (_text(author_element) if author_element is not None else None) or author.get('user_name'),
+				'time': post_time or (tails[0] if tails else None),
+				'floor': floor,
+				'post_id': str(post_id) if post_id else None,
+			})
+		return floors
+
+	def parse_page_count(self, page):
+		"""帖子总页数：优先取“共N页”，其次取页面脚本中的 total_page，最后取分页链接中最大的 pn"""
+		doc = _document(page)
+		counts = doc.xpath(f"//*[{_class_xpath('l_reply_num')}]/span[{_class_xpath('red')}]/text()")
+		if len(counts) >= 2 and counts[-1].strip().isdigit():
+			return max(1, int(counts[-1].strip()))
+
+		for script in doc.xpath('//script/text()'):
+			match = TOTAL_PAGE_PATTERN.search(script)
+			if match:
+				return max(1, int(match.group(1)))
+
+		pages = [int(match.group(1)) for href in doc.xpath('//a/@href') for match in PAGE_PARAM_PATTERN.finditer(href)]
+		return max(pages, default=1)
+
+	def fetch_post_links(self, page):
+		"""抓取第 page 页的帖子链接；需要浏览器时返回None"""
+		html_content, needs_browser = self.get(self.list_url(page))
+		if needs_browser:
+			return None
+		if html_content is None:
+			return []
+
+		post_links = self.parse_post_links(html_content)
+		print(f"HTTP获取第 {page + 1} 页帖子链接 {len(post_links)} 个")
+		return post_links
+
+	def fetch_page_floors(self, post_url, page):
+		"""抓取帖子第 page 页的楼层；需要浏览器时返回None，请求失败时返回空列表"""
+		html_content, needs_browser = self.get(thread_page_url(post_url, page))
+		if needs_browser:
+			return None
+		return self.parse_floors(html_content) if html_content else []
+
+	def fetch_post(self, post_url, post_title, limit=None):
+		"""
+		抓取帖子的所有分页：从第1页得到总页数，其余页最多 page_workers 页同时请求，
+		按页码合并并按 post_id 去重。需要浏览器（安全验证或没有服务端渲染的楼层）时返回None。
+		"""
+		html_content, needs_browser = self.get(post_url)
+		if needs_browser or html_content is None:
+			return None
+
+		doc = _document(html_content)
+		pages = [self.parse_floors(doc)]
+		if not pages[0]:
+			return None
+
+		page_count = pages_to_fetch(self.parse_page_count(doc), len(pages[0]), limit, self.max_pages)
+		if page_count > 1:
+			with ThreadPoolExecutor(max_workers=min(self.page_workers, page_count - 1)) as executor:
+				pages.extend(executor.map(lambda page: self.fetch_page_floors(post_url, page), range(2, page_count + 1)))
+			if any(floors is None for floors in pages):
+				return None
+
+		post_data = build_post_data(post_title, post_url, merge_floors(pages, limit))
+		print(f"HTTP爬取帖子: {post_title}，{page_count} 页，回复数: {post_data['reply_count']}")
+		return post_data
+
+
+# 使用示例：python http_fetcher.py [base_url]，base_url 可指向提供已保存页面的本地服务
+if __name__ == "__main__":
+	fetcher = TiebaHttpFetcher(base_url=sys.argv[1] if len(sys.argv) > 1 else None)
+	links = fetcher.fetch_post_links(0)
+	if links is None:
+		print("列表页需要浏览器（JS或安全验证）")
+	else:
+		for link in links[:3]:
+			print(json.dumps(fetcher.fetch_post(link['url'], link['title']), ensure_ascii=False, indent=2))
+	fetcher.close()
@@ -2,6 +2,9 @@
 
 import time
 import random
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import json
 from selenium import webdriver
@@ -11,23 +14,123 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import config
+from utils.rate_limit import RateLimiter
+from utils.crawl_state import CrawlState
+from utils.post_data import build_post_data, thread_page_url, pages_to_fetch, merge_floors
+from http_fetcher import TiebaHttpFetcher
+
+# 在浏览器内从文档 root 中取出前 limit 个楼层（0表示不限）的函数，当前页面和 fetch 到的分页共用。
+# 楼层号、回复ID和时间优先取 .l_post 的 data-field，缺失时从 .tail-info 和元素属性中解析
+FLOORS_FUNCTION = """
+function extractFloors(root, limit) {
+var posts = Array.prototype.slice.call(root.querySelectorAll('.l_post'), 0, limit || undefined);
+return posts.map(function (post) {
+	function text(selector) {
+		var element = post.querySelector(selector);
+		return element ? (element.innerText || element.textContent || '').trim() : null;
+	}
+	var field = {};
+	try {
+		field = JSON.parse(post.getAttribute('data-field') || '{}') || {};
+	} catch (e) {}
+	var content = field.content || {};
+	var author = field.author || {};
+	var tails = Array.prototype.map.call(post.querySelectorAll('.tail-info'), function (element) {
+		return (element.innerText || element.textContent || '').trim();
+	});
+	var floor = content.post_no || null;
+	var time = content.date || null;
+	tails.forEach(function (tail) {
+		var match = /^(\\d+)楼$/.exec(tail);
+		if (match && !floor) floor = parseInt(match[1], 10);
+		if (/^\\d{4}-\\d{2}-\\d{2}/.test(tail) && !time) time = tail;
+	});
+	var contentElement = post.querySelector('.d_post_content');
+	var postId = content.post_id || post.getAttribute('data-pid')
+		|| (contentElement && contentElement.id ? contentElement.id.replace('post_content_', '') : null);
+	return {
+		content: text('.d_post_content'),
+		author: text('.p_author_name') || author.user_name || null,
+		time: time || tails[0] || null,
+		floor: floor,
+		post_id: postId ? String(postId) : null
+	};
+});
+}
+"""
+
+# 一次取出当前页面所有楼层，arguments[0] 为最多楼层数，返回JSON字符串
+FLOORS_SCRIPT = FLOORS_FUNCTION + "return JSON.stringify(extractFloors(document, arguments[0]));"
+
+# 帖子总页数：优先取“共N页”，其次取 PageData 中的 total_page，最后取分页链接中最大的 pn
+PAGE_COUNT_SCRIPT = """
+var counts = document.querySelectorAll('.l_reply_num span.red');
+if (counts.length >= 2 && /^\\d+$/.test(counts[counts.length - 1].textContent.trim())) {
+	return parseInt(counts[counts.length - 1].textContent.trim(), 10);
+}
+var pager = window.PageData && window.PageData.pager;
+if (pager && pager.total_page) return parseInt(pager.total_page, 10);
+var pages = Array.prototype.map.call(document.querySelectorAll('a[href*="pn="]'), function (link) {
+	var match = /[?&]pn=(\\d+)/.exec(link.getAttribute('href'));
+	return match ? parseInt(match[1], 10) : 1;
+});
+return Math.max.apply(null, [1].concat(pages));
+"""
+
+# 在当前页面内用 fetch 并行请求其余分页（带页面的登录态和cookie），DOMParser 解析后提取楼层。
+# arguments: [分页URL列表, 各请求距现在的延迟毫秒（全局限速预约的时间点）, 同时请求数, 回调]；
+# 返回JSON字符串，与URL一一对应，请求失败或遇到安全验证的页为null
+PAGES_SCRIPT = FLOORS_FUNCTION + """
+var urls = arguments[0], delays = arguments[1], workers = arguments[2], done = arguments[arguments.length - 1];
+var results = new Array(urls.length), next = 0, start = Date.now();
+function fetchNext() {
+	if (next >= urls.length) return Promise.resolve();
+	var index = next++;
+	var wait = Math.max(0, delays[index] - (Date.now() - start));
+	return new Promise(function (resolve) { setTimeout(resolve, wait); }).then(function () {
+		return fetch(urls[index], {credentials: 'include'});
+	}).then(function (response) {
+		return response.ok ? response.text() : null;
+	}).then(function (text) {
+		if (!text || text.indexOf('百度安全验证') >= 0) {
+			results[index] = null;
+			return;
+		}
+		var doc = new DOMParser().parseFromString(text, 'text/html');
+		results[index] = extractFloors(doc, 0);
+	}, function () {
+		results[index] = null;
+	}).then(fetchNext);
+}
+var runners = [];
+for (var i = 0; i < Math.min(workers, urls.length); i++) runners.push(fetchNext());
+Promise.all(runners).then(function () { done(JSON.stringify(results)); });
+"""
 
 
 class TiebaSeleniumScraper:
 	def __init__(self):
 		self.tieba_name = config.TIEBA_NAME
-		self.pages_to_scrape = config.PAGES_TO_SCRAPE
+		self.pages_to_scrape = config.SEARCH_PAGES
 		self.save_path = config.RAW_DATA_PATH
-		self.max_replies_per_post = 20  # 每个帖子最多爬取20个回复
+		self.max_replies_per_post = config.MAX_REPLIES_PER_THREAD  # 每个帖子最多爬取的回复数，0 表示不限
+		self.max_pages_per_post = config.MAX_PAGES_PER_THREAD  # 每个帖子最多爬取的页数，0 表示不限
+		self.page_workers = config.THREAD_PAGE_WORKERS  # 每个帖子的分页并发预算
 		self.max_posts_per_page = 10  # 每页最多爬取10个帖子
+		self.max_threads = config.MAX_THREADS_TO_SCRAPE  # 并行模式下最多爬取的帖子数
+		self.workers = config.SCRAPER_WORKERS
+		self.http_first = config.HTTP_FIRST
+		self.rate_limiter = RateLimiter(config.RATE_LIMIT_PER_SECOND)  # 所有浏览器共用
+		self.state = CrawlState(config.CRAWL_STATE_PATH)  # 持久化的爬取边界，支持断点续爬和增量爬取
 		self.driver = None
 		self.wait = None
 
-	def setup_driver(self):
-		"""设置Chrome浏览器驱动"""
+	def create_driver(self, headless=False):
+		"""创建一个Chrome浏览器驱动，失败时返回None"""
 		chrome_options = Options()
 		# 设置为无头模式（不显示浏览器界面）
-		# chrome_options.add_argument('--headless')
+		if headless:
+			chrome_options.add_argument('--headless=new')
 		chrome_options.add_argument('--no-sandbox')
 		chrome_options.add_argument('--disable-dev-shm-usage')
 		chrome_options.add_argument('--disable-gpu')
@@ -45,13 +148,19 @@ class TiebaSeleniumScraper:
 		chrome_options.add_experimental_option("prefs", prefs)
 
 		try:
-			self.driver = webdriver.Chrome(options=chrome_options)
-			self.wait = WebDriverWait(self.driver, 10)
-			print("Chrome浏览器启动成功")
-			return True
+			return webdriver.Chrome(options=chrome_options)
 		except Exception as e:
 			print(f"Chrome浏览器启动失败: {e}")
+			return None
+
+	def setup_driver(self):
+		"""设置Chrome浏览器驱动"""
+		self.driver = self.create_driver()
+		if self.driver is None:
 			return False
+		self.wait = WebDriverWait(self.driver, 10)
+		print("Chrome浏览器启动成功")
+		return True
 
 	def search_tieba(self):
 		"""搜索目标贴吧"""
@@ -96,10 +205,12 @@ class TiebaSeleniumScraper:
 				link = element.get_attribute('href')
 				title = element.text.strip()
 				if link and title:
-					post_links.append({
+					post_link = {
 						'title': title,
 						'url': link
-					})
+					}
+					post_link.update(self.get_thread_meta(element))
+					post_links.append(post_link)
 
 			print(f"当前页面获取到 {len(post_links)} 个帖子链接")
 			return post_links
@@ -108,87 +219,152 @@ class TiebaSeleniumScraper:
 			print(f"获取帖子链接失败: {e}")
 			return []
 
-	def scrape_post_content(self, post_url, post_title):
-		"""爬取单个帖子的内容和回复"""
+	def get_thread_meta(self, element):
+		"""列表页上帖子的回复数和最后回复时间 {'reply_count', 'last_reply_time'}，取不到时为None"""
+		meta = {'reply_count': None, 'last_reply_time': None}
+		try:
+			item = element.find_element(By.XPATH, "./ancestor::li[contains(@class, 'j_thread_list')]")
+		except Exception:
+			return meta
+
+		for key, selector in (('reply_count', '.threadlist_rep_num'), ('last_reply_time', '.threadlist_reply_date')):
+			try:
+				meta[key] = item.find_element(By.CSS_SELECTOR, selector).text.strip() or None
+			except Exception:
+				pass
+		reply_count = meta['reply_count']
+		meta['reply_count'] = int(reply_count) if reply_count and reply_count.isdigit() else None
+		return meta
+
+	def extract_floors(self, driver=None, limit=None):
+		"""
+		在浏览器内一次 execute_script 取出页面前 limit 个楼层，返回
+		[{'content', 'author', 'time', 'floor', 'post_id'}]；脚本执行失败时返回None。
+		"""
+		driver = driver or self.driver
+		try:
+			return json.loads(driver.execute_script(FLOORS_SCRIPT, limit or 0))
+		except Exception as e:
+			print(f"批量提取楼层失败，改为逐个元素提取: {e}")
+			return None
+
+	def extract_floors_by_element(self, driver=None, limit=None):
+		"""逐个元素提取楼层（每个字段一次WebDriver请求），结果格式与 extract_floors 相同"""
+		driver = driver or self.driver
+		floors = []
+		for post_element in driver.find_elements(By.CSS_SELECTOR, ".l_post")[:limit]:
+			floor = {'content': None, 'author': None, 'time': None, 'floor': None, 'post_id': None}
+			for key, selector in (('content', '.d_post_content'), ('author', '.p_author_name'), ('time', '.tail-info')):
+				try:
+					floor[key] = post_element.find_element(By.CSS_SELECTOR, selector).text.strip()
+				except NoSuchElementException:
+					pass
+				except Exception:
+					break
+			floors.append(floor)
+		return floors
+
+	def extract_page_count(self, driver=None):
+		"""当前帖子页的总页数，无法识别时返回1"""
+		driver = driver or self.driver
+		try:
+			return max(1, int(driver.execute_script(PAGE_COUNT_SCRIPT) or 1))
+		except Exception as e:
+			print(f"识别帖子页数失败，只爬取第1页: {e}")
+			return 1
+
+	def fetch_remaining_pages(self, post_url, page_count, driver=None):
+		"""
+		在浏览器页面内并行 fetch 帖子的第 2..page_count 页并提取楼层（最多 page_workers 页同时请求），
+		请求时间点向全局限速器预约，不逐页打开页面等待加载。返回各页楼层列表，失败的页为None。
+		"""
+		driver = driver or self.driver
+		urls = [thread_page_url(post_url, page) for page in range(2, page_count + 1)]
+		delays = [delay * 1000 for delay in self.rate_limiter.reserve(len(urls))]
+		try:
+			driver.set_script_timeout(delays[-1] / 1000 + config.HTTP_TIMEOUT * len(urls))
+			return json.loads(driver.execute_async_script(PAGES_SCRIPT, urls, delays, self.page_workers))
+		except Exception as e:
+			print(f"分页请求失败: {e}")
+			return [None] * len(urls)
+
+	def scrape_post_content(self, post_url, post_title, driver=None):
+		"""爬取单个帖子的内容和回复，driver 为None时使用主浏览器"""
+		driver = driver or self.driver
 		try:
 			print(f"正在爬取帖子: {post_title}")
-			self.driver.get(post_url)
-			time.sleep(2)
+			self.rate_limiter.wait()
+			driver.get(post_url)
 
-			# 获取帖子主内容
-			main_content = ""
+			# 显式等待帖子内容出现，不再固定等待页面加载
 			try:
-				main_content_element = self.wait.until(
+				WebDriverWait(driver, 10).until(
 					EC.presence_of_element_located((By.CSS_SELECTOR, ".d_post_content"))
 				)
-				main_content = main_content_element.text.strip()
-			except:
+			except TimeoutException:
+				pass
+
+			# 一次请求取出主帖和回复（第一个楼层是主帖）
+			extract_start = time.time()
+			limit = self.max_replies_per_post + 1 if self.max_replies_per_post else None
+			floors = self.extract_floors(driver, limit)
+			if floors is None:
+				floors = self.extract_floors_by_element(driver, limit)
+			extract_ms = (time.time() - extract_start) * 1000
+
+			# 其余分页在页面内并行请求，按页码合并并按 post_id 去重
+			pages = [floors]
+			page_count = pages_to_fetch(self.extract_page_count(driver), len(floors), limit, self.max_pages_per_post)
+			if page_count > 1:
+				remaining = self.fetch_remaining_pages(post_url, page_count, driver)
+				failed = sum(1 for page_floors in remaining if page_floors is None)
+				if failed:
+					print(f"{failed}/{len(remaining)} 个分页获取失败，已跳过")
+				pages.extend(remaining)
+			floors = merge_floors(pages, limit)
+
+			# 获取帖子主内容
+			post_data = build_post_data(post_title, post_url, floors)
+			if not post_data['main_content']:
 				# 如果主选择器失败，尝试其他选择器
 				try:
-					main_content_element = self.driver.find_element(By.CSS_SELECTOR, ".post_bubble_middle")
-					main_content = main_content_element.text.strip()
+					main_content_element = driver.find_element(By.CSS_SELECTOR, ".post_bubble_middle")
+					post_data['main_content'] = main_content_element.text.strip()
 				except:
-					main_content = "无法获取帖子内容"
-
-			# 获取回复列表
-			replies = []
-			try:
-				reply_elements = self.driver.find_elements(By.CSS_SELECTOR, ".l_post")
-
-				for i, reply_element in enumerate(reply_elements[1:self.max_replies_per_post + 1]):  # 跳过第一个（主帖）
-					try:
-						# 获取回复内容
-						reply_content_element = reply_element.find_element(By.CSS_SELECTOR, ".d_post_content")
-						reply_content = reply_content_element.text.strip()
-
-						# 获取回复者用户名
-						try:
-							username_element = reply_element.find_element(By.CSS_SELECTOR, ".p_author_name")
-							username = username_element.text.strip()
-						except:
-							username = "匿名用户"
-
-						# 获取回复时间
-						try:
-							time_element = reply_element.find_element(By.CSS_SELECTOR, ".tail-info")
-							reply_time = time_element.text.strip()
-						except:
-							reply_time = "未知时间"
-
-						if reply_content:
-							replies.append({
-								'username': username,
-								'content': reply_content,
-								'time': reply_time
-							})
-
-					except Exception as e:
-						continue
-
-			except Exception as e:
-				print(f"获取回复失败: {e}")
+					post_data['main_content'] = "无法获取帖子内容"
 
-			post_data = {
-				'title': post_title,
-				'url': post_url,
-				'main_content': main_content,
-				'replies': replies,
-				'reply_count': len(replies)
-			}
-
-			print(f"成功爬取帖子，回复数: {len(replies)}")
+			print(f"成功爬取帖子，{page_count} 页，回复数: {post_data['reply_count']}，首页提取耗时 {extract_ms:.0f} ms")
 			return post_data
 
 		except Exception as e:
 			print(f"爬取帖子内容失败: {e}")
 			return None
 
+	def scrape_and_record(self, post_link, driver=None):
+		"""爬取帖子并立即把结果写入爬取状态，失败的帖子下次运行时重试"""
+		post_data = self.scrape_post_content(post_link['url'], post_link['title'], driver)
+		if post_data:
+			self.state.complete(post_link['url'], post_data)
+		else:
+			self.state.fail(post_link['url'])
+		return post_data
+
+	def save_state_posts(self, module, crawled):
+		"""把爬取状态中所有帖子的最新数据（包括本次未变化而跳过的帖子）保存为JSON/CSV"""
+		all_posts_data = self.state.posts()
+		if all_posts_data:
+			self.save_data(all_posts_data)
+			print(f"--- [{module}] 任务完成，本次爬取 {crawled} 个帖子，共保存 {len(all_posts_data)} 个帖子 ---")
+		else:
+			print(f"--- [{module}] 任务失败，未能获取任何数据 ---")
+
 	def go_to_next_page(self):
 		"""翻到下一页"""
 		try:
 			# 查找下一页按钮
 			next_button = self.driver.find_element(By.CSS_SELECTOR, "#frs_list_pager > a.next.pagination-item")
 			if next_button and next_button.is_enabled():
+				self.rate_limiter.wait()
 				next_button.click()
 				time.sleep(3)
 				return True
@@ -199,8 +375,179 @@ class TiebaSeleniumScraper:
 			print(f"翻页失败: {e}")
 			return False
 
+	def discover_posts(self, link_queue):
+		"""
+		先把上次未完成的帖子放入队列，再在主浏览器中逐页发现帖子（去重，最多 max_threads 个），
+		只有新帖子和回复数变化的帖子放入队列。返回 (发现的帖子数, 放入队列的帖子数)
+		"""
+		seen = set()
+		queued = set()
+
+		def enqueue(post_link):
+			if post_link['url'] not in queued:
+				link_queue.put((len(queued), post_link))
+				queued.add(post_link['url'])
+
+		try:
+			for post_link in self.state.pending():
+				enqueue(post_link)
+
+			for page in range(self.pages_to_scrape):
+				print(f"\n--- 正在发现第 {page + 1}/{self.pages_to_scrape} 页的帖子 ---")
+				for post_link in self.get_post_links():
+					if post_link['url'] in seen:
+						continue
+					seen.add(post_link['url'])
+					if self.state.discover(post_link):
+						enqueue(post_link)
+					if len(seen) >= self.max_threads:
+						return len(seen), len(queued)
+
+				# 翻页（除了最后一页）
+				if page < self.pages_to_scrape - 1:
+					if not self.go_to_next_page():
+						break
+			return len(seen), len(queued)
+		finally:
+			# 每个爬取线程一个结束标记
+			for _ in range(self.workers):
+				link_queue.put(None)
+
+	def scrape_worker(self, worker_id, link_queue, results):
+		"""爬取线程：使用独立的浏览器从队列中取帖子链接爬取，结果按发现顺序写入 results"""
+		driver = self.create_driver(headless=config.HEADLESS_WORKERS)
+		if driver is None:
+			print(f"[worker {worker_id}] 浏览器启动失败，线程退出")
+			return
+
+		try:
+			while True:
+				item = link_queue.get()
+				if item is None:
+					break
+				index, post_link = item
+				post_data = self.scrape_and_record(post_link, driver)
+				if post_data:
+					results[index] = post_data
+		finally:
+			driver.quit()
+
+	def run_pool(self):
+		"""
+		并行模式：主浏览器只负责搜索和翻页发现帖子，workers 个无头浏览器从共享队列取帖子并行爬取。
+		所有浏览器的页面请求共用全局限速，吞吐量随线程数增加直到达到 RATE_LIMIT_PER_SECOND。
+		"""
+		print(f"--- [Selenium爬虫模块] 并行任务开始，目标贴吧: '{self.tieba_name}'，"
+			  f"{self.workers} 个浏览器，最多 {self.max_threads} 个帖子 ---")
+
+		if not self.setup_driver():
+			return
+
+		link_queue = queue.Queue()
+		results = {}
+		threads = [
+			threading.Thread(target=self.scrape_worker, args=(worker_id, link_queue, results), daemon=True)
+			for worker_id in range(self.workers)
+		]
+
+		try:
+			if not self.search_tieba():
+				return
+
+			start_time = time.time()
+			for thread in threads:
+				thread.start()
+			discovered, queued = self.discover_posts(link_queue)
+			for thread in threads:
+				thread.join()
+
+			elapsed = time.time() - start_time
+			print(f"\n发现 {discovered} 个帖子，需要爬取 {queued} 个（新帖、有新回复或上次未完成），"
+				  f"成功爬取 {len(results)} 个，耗时 {elapsed:.1f} 秒")
+			self.save_state_posts("Selenium爬虫模块", len(results))
+
+		except Exception as e:
+			print(f"爬虫执行过程中发生错误: {e}")
+		finally:
+			if self.driver:
+				self.driver.quit()
+				print("浏览器已关闭")
+
+	def run_http(self):
+		"""
+		HTTP优先模式：列表页和帖子页用连接池HTTP请求直接抓取并用lxml解析，不启动浏览器。
+		列表页需要JS或安全验证时整体改用浏览器模式；个别帖子需要时只对这些帖子启动浏览器。
+		"""
+		print(f"--- [HTTP爬虫模块] 任务开始，目标贴吧: '{self.tieba_name}'，最多 {self.max_threads} 个帖子 ---")
+		fetcher = TiebaHttpFetcher(self.tieba_name, rate_limiter=self.rate_limiter,
+								   page_workers=self.page_workers, max_pages=self.max_pages_per_post)
+
+		try:
+			start_time = time.time()
+			# 上次未完成的帖子优先，其次是新帖子和回复数变化的帖子
+			post_links = self.state.pending()
+			queued = {post_link['url'] for post_link in post_links}
+			seen = set()
+			for page in range(self.pages_to_scrape):
+				page_links = fetcher.fetch_post_links(page)
+				if page_links is None:
+					print("列表页需要JS或安全验证，改用浏览器爬取")
+					return self.run_browser()
+				for post_link in page_links:
+					if post_link['url'] in seen or len(seen) >= self.max_threads:
+						continue
+					seen.add(post_link['url'])
+					if self.state.discover(post_link) and post_link['url'] not in queued:
+						queued.add(post_link['url'])
+						post_links.append(post_link)
+
+			# 帖子页并行请求，总请求速率受全局限速控制；每个帖子爬完立即写入爬取状态
+			limit = self.max_replies_per_post + 1 if self.max_replies_per_post else None
+
+			def fetch(post_link):
+				post_data = fetcher.fetch_post(post_link['url'], post_link['title'], limit)
+				if post_data:
+					self.state.complete(post_link['url'], post_data)
+				return post_data
+
+			with ThreadPoolExecutor(max_workers=self.workers) as executor:
+				posts = list(executor.map(fetch, post_links))
+
+			fallback = [index for index, post_data in enumerate(posts) if post_data is None]
+			if fallback:
+				print(f"{len(fallback)} 个帖子需要浏览器，启动浏览器补充爬取")
+				if self.setup_driver():
+					try:
+						for index in fallback:
+							posts[index] = self.scrape_and_record(post_links[index])
+					finally:
+						self.driver.quit()
+						self.driver = None
+				else:
+					for index in fallback:
+						self.state.fail(post_links[index]['url'])
+
+			crawled = sum(1 for post_data in posts if post_data)
+			print(f"\n发现 {len(seen)} 个帖子，需要爬取 {len(post_links)} 个（新帖、有新回复或上次未完成），"
+				  f"成功爬取 {crawled} 个（浏览器 {len(fallback)} 个），耗时 {time.time() - start_time:.1f} 秒")
+			self.save_state_posts("HTTP爬虫模块", crawled)
+
+		except Exception as e:
+			print(f"爬虫执行过程中发生错误: {e}")
+		finally:
+			fetcher.close()
+
 	def run(self):
-		"""执行爬虫的主函数"""
+		"""执行爬虫的主函数：HTTP_FIRST 时优先用HTTP抓取，否则使用浏览器"""
+		if self.http_first:
+			return self.run_http()
+		return self.run_browser()
+
+	def run_browser(self):
+		"""浏览器模式，SCRAPER_WORKERS 大于1时使用并行模式"""
+		if self.workers > 1:
+			return self.run_pool()
+
 		print(f"--- [Selenium爬虫模块] 任务开始，目标贴吧: '{self.tieba_name}'，计划爬取 {self.pages_to_scrape} 页 ---")
 
 		# 设置浏览器驱动
@@ -212,16 +559,28 @@ class TiebaSeleniumScraper:
 			if not self.search_tieba():
 				return
 
-			all_posts_data = []
+			crawled = 0
+
+			# 先爬取上次未完成的帖子
+			leftovers = self.state.pending()
+			if leftovers:
+				print(f"\n--- 继续爬取上次未完成的 {len(leftovers)} 个帖子 ---")
+				for post_link in leftovers:
+					if self.scrape_and_record(post_link):
+						crawled += 1
+			done = {post_link['url'] for post_link in leftovers}
 
 			for page in range(self.pages_to_scrape):
 				print(f"\n--- 正在处理第 {page + 1}/{self.pages_to_scrape} 页 ---")
 
-				# 获取当前页面的帖子链接
-				post_links = self.get_post_links()
+				# 获取当前页面的帖子链接，只保留新帖子和回复数变化的帖子
+				page_links = self.get_post_links()
+				post_links = [post_link for post_link in page_links
+							  if self.state.discover(post_link) and post_link['url'] not in done]
+				done.update(post_link['url'] for post_link in post_links)
 
 				if not post_links:
-					print("当前页面没有找到帖子，跳过")
+					print("当前页面没有找到帖子或没有新回复，跳过")
 					if page < self.pages_to_scrape - 1:
 						if not self.go_to_next_page():
 							break
@@ -229,14 +588,13 @@ class TiebaSeleniumScraper:
 
 				# 爬取每个帖子的详细内容
 				for post_link in post_links:
-					post_data = self.scrape_post_content(post_link['url'], post_link['title'])
-					if post_data:
-						all_posts_data.append(post_data)
+					if self.scrape_and_record(post_link):
+						crawled += 1
 
 					# 随机延迟
 					time.sleep(random.uniform(1, 3))
 
-				print(f"第 {page + 1} 页完成，共爬取 {len(post_links)} 个帖子")
+				print(f"第 {page + 1} 页完成，发现 {len(page_links)} 个帖子，爬取 {len(post_links)} 个")
 
 				# 翻页（除了最后一页）
 				if page < self.pages_to_scrape - 1:
@@ -244,11 +602,7 @@ class TiebaSeleniumScraper:
 						break
 
 			# 保存数据
-			if all_posts_data:
-				self.save_data(all_posts_data)
-				print(f"--- [Selenium爬虫模块] 任务完成，共爬取 {len(all_posts_data)} 个帖子 ---")
-			else:
-				print("--- [Selenium爬虫模块] 任务失败，未能获取任何数据 ---")
+			self.save_state_posts("Selenium爬虫模块", crawled)
 
 		except Exception as e:
 			print(f"爬虫执行过程中发生错误: {e}")
@@ -278,7 +632,9 @@ class TiebaSeleniumScraper:
 					'type': '主帖',
 					'username': '楼主',
 					'time': '',
-					'reply_count': post['reply_count']
+					'reply_count': post['reply_count'],
+					'floor': 1,
+					'post_id': post.get('main_post_id')
 				})
 
 				# 回复数据
@@ -290,7 +646,9 @@ class TiebaSeleniumScraper:
 						'type': '回复',
 						'username': reply['username'],
 						'time': reply['time'],
-						'reply_count': post['reply_count']
+						'reply_count': post['reply_count'],
+						'floor': reply.get('floor'),
+						'post_id': reply.get('post_id')
 					})
 
 			df = pd.DataFrame(csv_data)
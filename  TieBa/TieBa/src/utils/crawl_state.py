@@ -0,0 +1,115 @@
+# src/utils/crawl_state.py
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,  -- 发现顺序
+	url TEXT NOT NULL UNIQUE,
+	title TEXT,
+	reply_count INTEGER,  -- 列表页上最近一次看到的回复数
+	last_reply_time TEXT,  -- 列表页上最近一次看到的最后回复时间
+	status TEXT NOT NULL DEFAULT 'pending',  -- pending 待爬取 / done 已完成 / failed 失败（下次重试）
+	discovered_at REAL,
+	crawled_at REAL,
+	post_data TEXT  -- 最近一次成功爬取的帖子数据（JSON）
+)
+"""
+
+
+class CrawlState:
+	"""
+	持久化的爬取边界（SQLite）：记录发现的帖子、列表页上的回复数和最后回复时间、每个帖子的完成状态。
+	每个帖子爬完立即提交，中途中断后重新运行会从未完成的帖子继续；
+	已完成的帖子只有回复数变化时才重新爬取，稳定状态下的爬取量与新增回复成正比。
+	"""
+
+	def __init__(self, path):
+		os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+		self.path = path
+		self._lock = threading.Lock()  # 多个爬取线程共用一个连接
+		self.conn = sqlite3.connect(path, check_same_thread=False)
+		self.conn.execute("PRAGMA journal_mode=WAL")
+		self.conn.execute(SCHEMA)
+		self.conn.commit()
+
+	def close(self):
+		"""关闭数据库连接"""
+		self.conn.close()
+
+	def discover(self, post_link):
+		"""
+		记录列表页上发现的帖子 {'title', 'url', 'reply_count', 'last_reply_time'}，返回是否需要爬取：
+		新帖子、上次未完成的帖子、回复数变化的帖子需要爬取（列表页没有回复数时比较最后回复时间，两者都没有时总是爬取）。
+		"""
+		reply_count = post_link.get('reply_count')
+		last_reply_time = post_link.get('last_reply_time')
+		with self._lock:
+			row = self.conn.execute(
+				"SELECT status, reply_count, last_reply_time FROM threads WHERE url = ?", (post_link['url'],)
+			).fetchone()
+			if row is None:
+				self.conn.execute(
+					"INSERT INTO threads (url, title, reply_count, last_reply_time, discovered_at) VALUES (?, ?, ?, ?, ?)",
+					(post_link['url'], post_link['title'], reply_count, last_reply_time, time.time())
+				)
+				self.conn.commit()
+				return True
+
+			status, seen_reply_count, seen_reply_time = row
+			if reply_count is not None:
+				changed = reply_count != seen_reply_count
+			elif last_reply_time is not None:
+				changed = last_reply_time != seen_reply_time
+			else:
+				changed = True
+			if changed and status == 'done':
+				status = 'pending'
+
+			self.conn.execute(
+				"UPDATE threads SET title = ?, reply_count = ?, last_reply_time = ?, status = ? WHERE url = ?",
+				(post_link['title'], reply_count, last_reply_time, status, post_link['url'])
+			)
+			self.conn.commit()
+			return status != 'done'
+
+	def pending(self):
+		"""上次运行中未完成（待爬取或失败）的帖子，按发现顺序"""
+		with self._lock:
+			rows = self.conn.execute(
+				"SELECT title, url FROM threads WHERE status != 'done' ORDER BY id"
+			).fetchall()
+		return [{'title': title, 'url': url} for title, url in rows]
+
+	def complete(self, url, post_data):
+		"""帖子爬取成功，保存数据并标记完成"""
+		with self._lock:
+			self.conn.execute(
+				"UPDATE threads SET status = 'done', crawled_at = ?, post_data = ? WHERE url = ?",
+				(time.time(), json.dumps(post_data, ensure_ascii=False), url)
+			)
+			self.conn.commit()
+
+	def fail(self, url):
+		"""帖子爬取失败，下次运行时重试"""
+		with self._lock:
+			self.conn.execute("UPDATE threads SET status = 'failed' WHERE url = ?", (url,))
+			self.conn.commit()
+
+	def posts(self):
+		"""所有已爬取帖子的最新数据，按发现顺序"""
+		with self._lock:
+			rows = self.conn.execute(
+				"SELECT post_data FROM threads WHERE post_data IS NOT NULL ORDER BY id"
+			).fetchall()
+		return [json.loads(post_data) for post_data, in rows]
+
+	def summary(self):
+		"""各状态的帖子数 {'pending': n, 'done': n, 'failed': n}"""
+		with self._lock:
+			rows = self.conn.execute("SELECT status, COUNT(*) FROM threads GROUP BY status").fetchall()
+		return {status: count for status, count in rows}
@@ -0,0 +1,64 @@
+# src/utils/post_data.py
+
+import math
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+def build_post_data(post_title, post_url, floors, main_content=None):
+	"""
+	把楼层列表 [{'content', 'author', 'time', 'floor', 'post_id'}]（第一个楼层是主帖）
+	转换为保存格式的帖子数据，浏览器和HTTP两种抓取方式共用
+	"""
+	main_floor = floors[0] if floors else {}
+	replies = [
+		{
+			'username': floor['author'] or "匿名用户",
+			'content': floor['content'],
+			'time': floor['time'] or "未知时间",
+			'floor': floor['floor'],
+			'post_id': floor['post_id']
+		}
+		for floor in floors[1:] if floor['content']
+	]
+
+	return {
+		'title': post_title,
+		'url': post_url,
+		'main_content': main_content if main_content is not None else (main_floor.get('content') or ""),
+		'main_post_id': main_floor.get('post_id'),
+		'replies': replies,
+		'reply_count': len(replies)
+	}
+
+
+def thread_page_url(post_url, page):
+	"""帖子第 page 页（从1开始）的URL，第1页不带 pn 参数"""
+	parts = urlsplit(post_url)
+	query = [(key, value) for key, value in parse_qsl(parts.query) if key != 'pn']
+	if page > 1:
+		query.append(('pn', str(page)))
+	return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def pages_to_fetch(page_count, first_page_size, limit=None, max_pages=None):
+	"""需要抓取的总页数：不超过 max_pages；有楼层数上限 limit 时按第1页的楼层数估算，够用即止"""
+	if max_pages:
+		page_count = min(page_count, max_pages)
+	if limit and first_page_size:
+		page_count = min(page_count, math.ceil(limit / first_page_size))
+	return max(1, page_count)
+
+
+def merge_floors(pages, limit=None):
+	"""按页码顺序合并各页的楼层，按 post_id 去重（翻页期间有新回复时相邻页会有重复楼层），最多保留 limit 个"""
+	seen = set()
+	merged = []
+	for floors in pages:
+		for floor in floors or []:
+			post_id = floor.get('post_id')
+			if post_id:
+				if post_id in seen:
+					continue
+				seen.add(post_id)
+			merged.append(floor)
+	return merged[:limit] if limit else merged
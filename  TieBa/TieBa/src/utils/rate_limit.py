@@ -0,0 +1,34 @@
+# src/utils/rate_limit.py
+
+import time
+import threading
+
+
+class RateLimiter:
+	"""线程安全的全局限速器：所有线程合计每秒最多 rate 次请求，rate 为0或None时不限速"""
+
+	def __init__(self, rate):
+		self.interval = 1.0 / rate if rate else 0.0
+		self._lock = threading.Lock()
+		self._next_slot = 0.0
+
+	def wait(self):
+		"""在锁内预约下一个请求时间点，在锁外等待，多个线程按预约顺序依次放行"""
+		if not self.interval:
+			return
+		with self._lock:
+			now = time.monotonic()
+			slot = max(now, self._next_slot)
+			self._next_slot = slot + self.interval
+		if slot > now:
+			time.sleep(slot - now)
+
+	def reserve(self, count):
+		"""预约 count 个连续的请求时间点但不等待，返回各时间点距现在的秒数，供在浏览器内按时发起请求"""
+		if not self.interval:
+			return [0.0] * count
+		with self._lock:
+			now = time.monotonic()
+			slot = max(now, self._next_slot)
+			self._next_slot = slot + count * self.interval
+		return [slot - now + index * self.interval for index in range(count)]
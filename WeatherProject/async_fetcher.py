@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+异步并发抓取模块
+"""
+
+import asyncio
+import time
+import logging
+from urllib.parse import urlparse
+
+try:
+	import aiohttp
+except ImportError:  # 未安装aiohttp时由调用方退回同步抓取
+	aiohttp = None
+
+from config import HEADERS, TIMEOUT, MAX_RETRIES, REQUEST_DELAY, HOST_DELAYS
+
+logger = logging.getLogger(__name__)
+
+
+class HostThrottle:
+	"""按主机控制请求间隔，不同主机之间互不等待"""
+
+	def __init__(self, default_delay=REQUEST_DELAY, host_delays=None):
+		self.default_delay = default_delay
+		self.host_delays = host_delays if host_delays is not None else HOST_DELAYS
+		self._locks = {}
+		self._last_request = {}
+
+	def get_delay(self, host):
+		"""获取主机的请求间隔"""
+		return self.host_delays.get(host, self.default_delay)
+
+	async def wait(self, host):
+		"""等待直到可以向该主机发出下一个请求"""
+		lock = self._locks.setdefault(host, asyncio.Lock())
+		async with lock:
+			last = self._last_request.get(host)
+			if last is not None:
+				remaining = self.get_delay(host) - (time.monotonic() - last)
+				if remaining > 0:
+					await asyncio.sleep(remaining)
+			self._last_request[host] = time.monotonic()
+
+
+class AsyncWeatherFetcher:
+	"""并发抓取多个数据源，每个数据源独立重试"""
+
+	def __init__(self, headers=None, timeout=TIMEOUT, retries=MAX_RETRIES, throttle=None, cache=None, keep_alive=False):
+		"""keep_alive 为True时事件循环和会话在多次 run 之间复用，保持连接，用完需调用 close"""
+		if aiohttp is None:
+			raise ImportError("异步抓取需要安装 aiohttp")
+
+		self.headers = headers or HEADERS
+		self.timeout = timeout
+		self.retries = retries
+		self.throttle = throttle or HostThrottle()
+		self.cache = cache
+		self.keep_alive = keep_alive
+		self.bytes_fetched = 0  # 累计从网络获取的响应体字节数
+		self._loop = None
+		self._session = None
+
+	def create_session(self, limit=100):
+		"""创建aiohttp会话，limit为连接池大小"""
+		return aiohttp.ClientSession(
+			headers=self.headers,
+			timeout=aiohttp.ClientTimeout(total=self.timeout),
+			connector=aiohttp.TCPConnector(limit=limit)
+		)
+
+	async def fetch(self, session, url):
+		"""获取单个网页内容，失败时按来源独立重试"""
+		entry = None
+		if self.cache:
+			cached_body, entry = self.cache.lookup(url)
+			if cached_body is not None:
+				return cached_body
+
+		headers = self.cache.conditional_headers(entry) if self.cache else {}
+		host = urlparse(url).netloc
+
+		for attempt in range(self.retries):
+			await self.throttle.wait(host)
+			try:
+				async with session.get(url, headers=headers) as response:
+					if response.status == 304 and entry:
+						return self.cache.revalidated(url, entry)
+
+					response.raise_for_status()
+					raw = await response.read()
+					self.bytes_fetched += len(raw)
+					body = raw.decode('utf-8', errors='replace')
+					logger.info(f"成功获取页面内容: {url}")
+					if self.cache:
+						return self.cache.stored(url, body, response.headers)
+					return body
+			except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+				logger.warning(f"第{attempt + 1}次请求失败: {url}, 错误: {e}")
+				if attempt < self.retries - 1:
+					await asyncio.sleep(REQUEST_DELAY * (attempt + 1))
+
+		logger.error(f"所有重试失败: {url}")
+		return None
+
+	async def fetch_all(self, urls):
+		"""并发获取所有网页，返回 {来源: 网页内容}"""
+		if self.keep_alive:
+			if self._session is None or self._session.closed:
+				self._session = self.create_session()
+			pages = await asyncio.gather(*(self.fetch(self._session, url) for url in urls.values()))
+		else:
+			async with self.create_session() as session:
+				pages = await asyncio.gather(*(self.fetch(session, url) for url in urls.values()))
+		return dict(zip(urls.keys(), pages))
+
+	def run(self, urls):
+		"""并发获取所有网页，keep_alive 时复用事件循环和连接，否则在新的事件循环中执行"""
+		start_time = time.perf_counter()
+		if self.keep_alive:
+			if self._loop is None:
+				self._loop = asyncio.new_event_loop()
+			pages = self._loop.run_until_complete(self.fetch_all(urls))
+		else:
+			pages = asyncio.run(self.fetch_all(urls))
+		elapsed = time.perf_counter() - start_time
+
+		success = sum(1 for page in pages.values() if page)
+		logger.info(f"并发抓取完成: {success}/{len(urls)} 个数据源成功，耗时 {elapsed:.2f} 秒")
+		if self.cache:
+			logger.info(f"缓存统计: {self.cache.stats}")
+		return pages
+
+	def close(self):
+		"""关闭复用的会话和事件循环"""
+		if self._loop is None:
+			return
+		if self._session is not None and not self._session.closed:
+			self._loop.run_until_complete(self._session.close())
+		self._loop.close()
+		self._loop = None
+		self._session = None
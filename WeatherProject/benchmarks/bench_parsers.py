@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+解析后端性能对比
+
+对 benchmarks/fixtures/ 下保存的网页，比较各解析后端的单页解析耗时和峰值内存。
+峰值内存在独立子进程中测量：Linux 下重置并读取 VmHWM（包含 lxml/lexbor 等C扩展的内存），
+其他系统退回 tracemalloc（仅统计Python堆）。
+
+用法:
+  python benchmarks/bench_parsers.py                # 所有后端、所有网页
+  python benchmarks/bench_parsers.py -n 50 -b lxml  # 指定重复次数和后端
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import gc
+import subprocess
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import html_backend  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+# 网页文件对应的解析方法
+FIXTURE_METHODS = {
+	'china_weather': 'parse_china_weather',
+	'tianqi_so': 'parse_tianqi_so',
+	'moji': 'parse_generic',
+}
+
+
+def load_fixture(name):
+	"""读取保存的网页"""
+	with open(os.path.join(FIXTURES_DIR, f'{name}.html'), 'r', encoding='utf-8') as f:
+		return f.read()
+
+
+def time_parse(backend, method, html_content, repeat):
+	"""返回单页平均解析耗时（毫秒）和解析结果条数"""
+	parse = getattr(backend, method)
+	result = parse(html_content)  # 预热
+
+	start_time = time.perf_counter()
+	for _ in range(repeat):
+		parse(html_content)
+	elapsed = time.perf_counter() - start_time
+
+	count = len(result) if isinstance(result, list) else int(result is not None)
+	return elapsed / repeat * 1000, count
+
+
+def read_proc_status(field):
+	"""读取 /proc/self/status 中的内存字段（KB）"""
+	with open('/proc/self/status', 'r') as f:
+		for line in f:
+			if line.startswith(field + ':'):
+				return int(line.split()[1])
+	return 0
+
+
+def reset_peak_rss():
+	"""重置进程的峰值RSS（VmHWM），仅Linux支持"""
+	try:
+		with open('/proc/self/clear_refs', 'w') as f:
+			f.write('5')
+		return True
+	except OSError:
+		return False
+
+
+def measure_peak_memory(backend_name, fixture):
+	"""在当前进程中测量单页解析的峰值内存（KB）"""
+	backend = html_backend.BACKENDS[backend_name]()
+	html_content = load_fixture(fixture)
+	method = getattr(backend, FIXTURE_METHODS[fixture])
+	method('<html><body></body></html>')  # 用空网页预热，排除首次解析时的延迟导入
+
+	gc.collect()
+	if reset_peak_rss():
+		before = read_proc_status('VmRSS')
+		method(html_content)
+		return read_proc_status('VmHWM') - before
+
+	tracemalloc.start()
+	method(html_content)
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return peak // 1024
+
+
+def peak_memory_in_subprocess(backend_name, fixture):
+	"""在独立子进程中测量峰值内存，避免前一次解析的内存影响结果"""
+	output = subprocess.run(
+		[sys.executable, os.path.abspath(__file__), '--measure-memory', backend_name, fixture],
+		capture_output=True, text=True, check=True
+	).stdout
+	return int(output.strip().splitlines()[-1])
+
+
+def available_backends(names=None):
+	"""返回依赖已安装的后端"""
+	backends = {}
+	for name in names or html_backend.BACKENDS:
+		try:
+			backends[name] = html_backend.BACKENDS[name]()
+		except ImportError as e:
+			print(f"跳过后端 {name}: {e}")
+	return backends
+
+
+def run_benchmark(repeat=20, backend_names=None):
+	"""运行对比测试，返回结果列表"""
+	results = []
+	backends = available_backends(backend_names)
+
+	for fixture, method in FIXTURE_METHODS.items():
+		html_content = load_fixture(fixture)
+		for name, backend in backends.items():
+			ms_per_page, count = time_parse(backend, method, html_content, repeat)
+			results.append({
+				'fixture': fixture,
+				'backend': name,
+				'ms_per_page': round(ms_per_page, 3),
+				'peak_kb': peak_memory_in_subprocess(name, fixture),
+				'records': count
+			})
+
+	return results
+
+
+def print_results(results):
+	"""打印结果表格"""
+	print(f"\n{'网页':<15}{'后端':<12}{'耗时(ms/页)':>12}{'峰值内存(KB)':>14}{'结果数':>8}{'相对bs4':>10}")
+	print('-' * 71)
+
+	baseline = {r['fixture']: r['ms_per_page'] for r in results if r['backend'] == 'bs4'}
+	for r in results:
+		speedup = baseline.get(r['fixture'], 0) / r['ms_per_page'] if r['ms_per_page'] else 0
+		print(f"{r['fixture']:<15}{r['backend']:<12}{r['ms_per_page']:>12.3f}{r['peak_kb']:>14}"
+			  f"{r['records']:>8}{speedup:>9.1f}x")
+
+
+def main():
+	parser = argparse.ArgumentParser(description='HTML解析后端性能对比')
+	parser.add_argument('-n', '--repeat', type=int, default=20, help='每个网页的重复解析次数')
+	parser.add_argument('-b', '--backend', action='append', choices=list(html_backend.BACKENDS),
+						help='只测试指定后端，可重复指定')
+	parser.add_argument('--json', metavar='FILE', help='将结果保存为JSON')
+	parser.add_argument('--measure-memory', nargs=2, metavar=('BACKEND', 'FIXTURE'), help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.measure_memory:
+		print(measure_peak_memory(*args.measure_memory))
+		return
+
+	results = run_benchmark(args.repeat, args.backend)
+	print_results(results)
+
+	if args.json:
+		with open(args.json, 'w', encoding='utf-8') as f:
+			json.dump(results, f, ensure_ascii=False, indent=2)
+		print(f"\n结果已保存: {args.json}")
+
+
+if __name__ == "__main__":
+	main()
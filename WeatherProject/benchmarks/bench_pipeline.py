@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+解析与处理流程离线基准测试
+
+对 benchmarks/fixtures/ 下的网页样本测量 parse_china_weather、parse_tianqi_so、
+DataExtractor.extract_all_data 的单页耗时；用样本解析结果生成 1k~1M 行的合成历史数据，
+测量 process_dataframe 和 aggregate_data 的耗时。结果与 baseline.json 比较，
+任一项超过基准的 (1 + 容差) 倍时以非零状态退出。
+
+用法:
+  python benchmarks/bench_pipeline.py                   # 运行并与基准比较
+  python benchmarks/bench_pipeline.py --save-baseline   # 运行并保存为新基准
+  python benchmarks/bench_pipeline.py --sizes 1000 10000 --tolerance 0.5
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import logging
+import contextlib
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from web_scraper import WeatherScraper  # noqa: E402
+from data_extractor import DataExtractor  # noqa: E402
+from data_processor import WeatherDataProcessor  # noqa: E402
+from html_backend import make_soup  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+MANIFEST_FILE = os.path.join(FIXTURES_DIR, 'manifest.json')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_TOLERANCE = 0.3  # 超过基准30%视为回退
+MIN_DELTA_MS = 2.0  # 差值小于该毫秒数时不视为回退，避免极短耗时的抖动
+
+# 网页解析用例: (用例名, 样本, 解析函数工厂)
+PARSE_CASES = [
+	('parse_china_weather', 'china_weather', lambda scraper, extractor: scraper.parse_china_weather),
+	('parse_tianqi_so', 'tianqi_so', lambda scraper, extractor: scraper.parse_tianqi_so),
+	('extract_all_data', 'china_weather', lambda scraper, extractor: lambda html: extractor.extract_all_data(make_soup(html))),
+]
+
+
+def load_manifest():
+	"""读取样本清单"""
+	with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+		return json.load(f)
+
+
+def load_fixture(name):
+	"""读取网页样本"""
+	with open(os.path.join(FIXTURES_DIR, f'{name}.html'), 'r', encoding='utf-8') as f:
+		return f.read()
+
+
+def best_of(func, repeat):
+	"""运行 repeat 次，返回最短耗时（毫秒）"""
+	best = float('inf')
+	for _ in range(repeat):
+		start_time = time.perf_counter()
+		func()
+		best = min(best, time.perf_counter() - start_time)
+	return best * 1000
+
+
+def bench_parsers(repeat):
+	"""测量网页解析，返回 ({用例: 毫秒}, 样本解析结果)"""
+	scraper = WeatherScraper(use_cache=False)
+	extractor = DataExtractor()
+	results = {}
+
+	# DataExtractor 逐步打印提取过程，计时时丢弃输出
+	with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+		for case, fixture, factory in PARSE_CASES:
+			html_content = load_fixture(fixture)
+			parse = factory(scraper, extractor)
+			parse(html_content)  # 预热
+			results[case] = best_of(lambda: parse(html_content), repeat)
+
+	records = (scraper.parse_china_weather(load_fixture('china_weather'))
+			   + scraper.parse_tianqi_so(load_fixture('tianqi_so')))
+	return results, records
+
+
+def synthetic_history(records, size, seed=0):
+	"""
+	用样本解析结果生成 size 行合成历史：每轮抓取复制一次样本记录，
+	抓取时间逐小时向前，温度加随机扰动，保持与历史库查询结果相同的字符串列。
+	"""
+	rng = np.random.default_rng(seed)
+	template = pd.DataFrame(records)
+	repeats = -(-size // len(template))
+	df = pd.concat([template] * repeats, ignore_index=True).iloc[:size]
+
+	crawl_index = np.arange(size) // len(template)
+	base_time = datetime(2025, 6, 24, 12)
+	crawl_times = pd.Series(pd.to_datetime(base_time) - pd.to_timedelta(crawl_index, unit='h'))
+	df['crawl_time'] = crawl_times.dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy()
+
+	offsets = rng.integers(-3, 4, size)
+	for column, suffix in (('temp_high', ''), ('temp_low', '℃')):
+		values = pd.to_numeric(df[column].str.rstrip('℃'), errors='coerce') + offsets
+		df[column] = values.map(lambda value: f'{value:.0f}{suffix}', na_action='ignore')
+	return df
+
+
+def bench_processing(records, sizes, repeat):
+	"""测量 process_dataframe 和 aggregate_data，返回 {用例@行数: 毫秒}"""
+	logging.getLogger('data_processor').setLevel(logging.WARNING)
+	processor = WeatherDataProcessor()
+	results = {}
+
+	for size in sizes:
+		df = synthetic_history(records, size)
+		runs = repeat if size <= 100_000 else 1
+		processed = processor.process_dataframe(df)
+		results[f'process_dataframe@{size}'] = best_of(lambda: processor.process_dataframe(df), runs)
+		results[f'aggregate_data@{size}'] = best_of(lambda: processor.aggregate_data(processed), runs)
+		print(f"  {size:>9} 行: process {results[f'process_dataframe@{size}']:.1f} ms, "
+			  f"aggregate {results[f'aggregate_data@{size}']:.1f} ms")
+
+	return results
+
+
+def run_benchmark(sizes, repeat):
+	"""运行所有用例，返回结果字典"""
+	print("网页解析...")
+	parse_results, records = bench_parsers(repeat)
+	print("合成历史数据处理...")
+	process_results = bench_processing(records, sizes, repeat)
+
+	manifest = load_manifest()
+	return {
+		'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'pandas': pd.__version__,
+		'fixtures_version': manifest['version'],
+		'fixtures': {name: entry['sha256'] for name, entry in manifest['fixtures'].items()},
+		'results': {name: round(ms, 3) for name, ms in {**parse_results, **process_results}.items()},
+	}
+
+
+def compare(current, baseline, tolerance):
+	"""与基准比较并打印表格，返回回退的用例列表"""
+	print(f"\n{'用例':<32}{'基准(ms)':>12}{'当前(ms)':>12}{'变化':>10}  结果")
+	print('-' * 76)
+
+	fixtures_changed = current['fixtures'] != baseline.get('fixtures')
+	regressions = []
+	for case, ms in current['results'].items():
+		base_ms = baseline['results'].get(case)
+		if base_ms is None:
+			print(f"{case:<32}{'-':>12}{ms:>12.3f}{'-':>10}  新用例")
+			continue
+		if fixtures_changed and '@' not in case:
+			print(f"{case:<32}{base_ms:>12.3f}{ms:>12.3f}{'-':>10}  样本已变化，跳过")
+			continue
+
+		change = ms / base_ms - 1 if base_ms else 0
+		regressed = change > tolerance and ms - base_ms > MIN_DELTA_MS
+		if regressed:
+			regressions.append(case)
+		print(f"{case:<32}{base_ms:>12.3f}{ms:>12.3f}{change:>+10.1%}  {'✗ 回退' if regressed else '✓'}")
+
+	if fixtures_changed:
+		print(f"\n⚠ 网页样本与基准不同（基准 v{baseline.get('fixtures_version')}，当前 v{current['fixtures_version']}），"
+			  f"请用 --save-baseline 更新基准")
+	return regressions
+
+
+def main():
+	parser = argparse.ArgumentParser(description='解析与处理流程离线基准测试')
+	parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='合成历史数据行数')
+	parser.add_argument('-n', '--repeat', type=int, default=5, help='每个用例重复次数，取最短耗时（1M行只运行一次）')
+	parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许比基准慢的比例')
+	parser.add_argument('--baseline', default=BASELINE_FILE, help='基准文件路径')
+	parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基准')
+	parser.add_argument('--json', metavar='FILE', help='将本次结果保存为JSON')
+	args = parser.parse_args()
+
+	current = run_benchmark(args.sizes, args.repeat)
+
+	if args.json:
+		with open(args.json, 'w', encoding='utf-8') as f:
+			json.dump(current, f, ensure_ascii=False, indent=2)
+
+	if args.save_baseline:
+		with open(args.baseline, 'w', encoding='utf-8') as f:
+			json.dump(current, f, ensure_ascii=False, indent=2)
+			f.write('\n')
+		print(f"\n基准已保存: {args.baseline}")
+		return
+
+	if not os.path.exists(args.baseline):
+		print(f"\n未找到基准文件 {args.baseline}，请先运行 --save-baseline")
+		sys.exit(2)
+
+	with open(args.baseline, 'r', encoding='utf-8') as f:
+		baseline = json.load(f)
+
+	regressions = compare(current, baseline, args.tolerance)
+	if regressions:
+		print(f"\n{'!' * 60}\n✗ 性能回退: {len(regressions)} 个用例超过基准 {args.tolerance:.0%} 以上\n"
+			  + '\n'.join(f"  - {case}" for case in regressions) + f"\n{'!' * 60}")
+		sys.exit(1)
+	print("\n✓ 所有用例均未超过基准")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+命令行启动耗时测试
+
+用 `python -X importtime` 在独立子进程中测量每个子命令需要导入的模块的累计耗时，
+并测量 `main.py --status` 的端到端耗时，超出预算时以非零状态退出。
+每项重复多次取最小值，减少系统抖动的影响。
+
+用法:
+  python benchmarks/bench_startup.py              # 测量所有子命令
+  python benchmarks/bench_startup.py -n 10 -v     # 重复10次，并列出最慢的导入
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+
+# 每个子命令会导入的模块
+SUBCOMMAND_MODULES = {
+	'status': ['main'],
+	'scrape': ['main', 'web_scraper'],
+	'cities': ['main', 'city_crawler'],
+	'process': ['main', 'data_processor'],
+	'visualize': ['main', 'visualizer'],
+	'full': ['main', 'web_scraper', 'data_processor', 'visualizer'],
+}
+
+# 导入耗时预算（毫秒）
+IMPORT_BUDGETS = {
+	'status': 100,
+	'scrape': 450,
+	'cities': 450,
+	'process': 600,
+	'visualize': 1000,
+	'full': 1200,
+}
+
+# main.py --status 端到端耗时预算（毫秒，含解释器启动）
+STATUS_BUDGET = 200
+
+
+def parse_importtime(stderr, modules):
+	"""
+	解析 -X importtime 输出，返回 (目标模块累计耗时ms, [(自身耗时ms, 模块名)])。
+	只统计目标模块这几个顶层条目，排除解释器启动时 site 等模块的导入。
+	"""
+	total = 0
+	entries = []
+	for line in stderr.splitlines():
+		if not line.startswith('import time:') or 'self [us]' in line:
+			continue
+		# 格式: "import time: 自身us | 累计us | 模块名"，模块名缩进表示嵌套层级
+		self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+		entries.append((int(self_us) / 1000, name.strip()))
+		if not name[1:].startswith(' ') and name.strip() in modules:
+			total += int(cumulative_us) / 1000
+	return total, entries
+
+
+def measure_imports(modules):
+	"""在新的解释器中导入模块，返回 (累计耗时ms, 各模块自身耗时)"""
+	result = subprocess.run(
+		[sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+		cwd=PROJECT_DIR, capture_output=True, text=True
+	)
+	if result.returncode != 0:
+		raise RuntimeError(f"导入 {modules} 失败:\n{result.stderr[-2000:]}")
+	return parse_importtime(result.stderr, modules)
+
+
+def measure_status():
+	"""返回 main.py --status 的端到端耗时（毫秒）"""
+	start_time = time.perf_counter()
+	subprocess.run([sys.executable, 'main.py', '--status'], cwd=PROJECT_DIR,
+				   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+	return (time.perf_counter() - start_time) * 1000
+
+
+def run_benchmark(repeat=5):
+	"""测量各子命令，返回结果列表"""
+	results = []
+	for name, modules in SUBCOMMAND_MODULES.items():
+		runs = [measure_imports(modules) for _ in range(repeat)]
+		import_ms, entries = min(runs, key=lambda run: run[0])
+		results.append({
+			'subcommand': name,
+			'import_ms': round(import_ms, 1),
+			'budget_ms': IMPORT_BUDGETS[name],
+			'slowest': sorted(entries, reverse=True)[:10],
+		})
+
+	status_ms = min(measure_status() for _ in range(repeat))
+	results.append({'subcommand': 'status (端到端)', 'import_ms': round(status_ms, 1), 'budget_ms': STATUS_BUDGET,
+					'slowest': []})
+	return results
+
+
+def print_results(results, verbose=False):
+	"""打印结果表格，返回超出预算的项数"""
+	print(f"\n{'子命令':<18}{'耗时(ms)':>10}{'预算(ms)':>10}{'结果':>8}")
+	print('-' * 46)
+
+	failures = 0
+	for r in results:
+		ok = r['import_ms'] <= r['budget_ms']
+		failures += not ok
+		print(f"{r['subcommand']:<18}{r['import_ms']:>10.1f}{r['budget_ms']:>10}{'通过' if ok else '超出':>8}")
+		if verbose:
+			for self_ms, module in r['slowest']:
+				print(f"{'':<6}{self_ms:>8.1f}  {module}")
+
+	return failures
+
+
+def main():
+	parser = argparse.ArgumentParser(description='命令行启动耗时测试')
+	parser.add_argument('-n', '--repeat', type=int, default=5, help='每项重复次数，取最小值')
+	parser.add_argument('-v', '--verbose', action='store_true', help='列出每个子命令自身耗时最长的导入')
+	parser.add_argument('--json', metavar='FILE', help='将结果保存为JSON')
+	args = parser.parse_args()
+
+	results = run_benchmark(args.repeat)
+	failures = print_results(results, args.verbose)
+
+	if args.json:
+		with open(args.json, 'w', encoding='utf-8') as f:
+			json.dump(results, f, ensure_ascii=False, indent=2)
+		print(f"\n结果已保存: {args.json}")
+
+	if failures:
+		print(f"\n✗ {failures} 项超出启动耗时预算")
+		sys.exit(1)
+	print("\n✓ 所有子命令均在预算内")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+抓取各数据源的真实网页，保存为基准测试使用的网页样本
+
+网页保存在 benchmarks/fixtures/<来源>.html，manifest.json 记录样本版本号、
+抓取时间、URL、字节数和 sha256。每次抓取版本号加一，bench_pipeline.py 的基准结果
+记录样本的 sha256，样本变化后解析耗时不再与旧基准比较。
+
+用法:
+  python benchmarks/capture_fixtures.py                    # 抓取所有数据源
+  python benchmarks/capture_fixtures.py -s china_weather   # 只抓取指定数据源
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from config import WEATHER_URLS  # noqa: E402
+from web_scraper import WeatherScraper  # noqa: E402
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+MANIFEST_FILE = os.path.join(FIXTURES_DIR, 'manifest.json')
+
+
+def file_sha256(path):
+	"""计算文件的 sha256"""
+	with open(path, 'rb') as f:
+		return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_manifest():
+	"""读取样本清单，不存在时返回空清单"""
+	if not os.path.exists(MANIFEST_FILE):
+		return {'version': 0, 'fixtures': {}}
+	with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+		return json.load(f)
+
+
+def save_manifest(manifest):
+	"""保存样本清单"""
+	with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+		json.dump(manifest, f, ensure_ascii=False, indent=2)
+		f.write('\n')
+
+
+def capture(sources=None):
+	"""抓取网页并更新清单，返回成功保存的来源列表"""
+	scraper = WeatherScraper(use_cache=False)
+	manifest = load_manifest()
+	captured_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+	saved = []
+
+	for source_name in sources or WEATHER_URLS:
+		url = WEATHER_URLS[source_name]
+		html_content = scraper.get_page_content(url)
+		if not html_content:
+			print(f"✗ {source_name}: 抓取失败，保留原有样本")
+			continue
+
+		path = os.path.join(FIXTURES_DIR, f'{source_name}.html')
+		with open(path, 'w', encoding='utf-8') as f:
+			f.write(html_content)
+
+		manifest['fixtures'][source_name] = {
+			'file': f'{source_name}.html',
+			'url': url,
+			'origin': 'captured',
+			'captured_at': captured_at,
+			'bytes': os.path.getsize(path),
+			'sha256': file_sha256(path),
+		}
+		saved.append(source_name)
+		print(f"✓ {source_name}: {manifest['fixtures'][source_name]['bytes']} 字节")
+
+	if saved:
+		manifest['version'] += 1
+		manifest['updated_at'] = captured_at
+		save_manifest(manifest)
+		print(f"\n样本版本: v{manifest['version']}，请重新运行 bench_pipeline.py --save-baseline 更新基准")
+
+	scraper.close()
+	return saved
+
+
+def main():
+	parser = argparse.ArgumentParser(description='抓取基准测试网页样本')
+	parser.add_argument('-s', '--source', action='append', choices=list(WEATHER_URLS),
+						help='只抓取指定数据源，可重复指定')
+	args = parser.parse_args()
+
+	if not capture(args.source):
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
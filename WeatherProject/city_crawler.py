@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+多城市天气抓取模块
+"""
+
+import asyncio
+import csv
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from async_fetcher import AsyncWeatherFetcher, HostThrottle
+from http_cache import ResponseCache
+from web_scraper import WeatherScraper
+from record_sink import RecordSink
+from config import (CITY_URL_TEMPLATES, CRAWL_CONCURRENCY, CRAWL_QUEUE_SIZE, DEFAULT_DOMAIN_RATE,
+					DOMAIN_RATE_LIMITS, PARSE_WORKERS, DATA_FILES, HTTP_CACHE_ENABLED, ensure_directories)
+
+logger = logging.getLogger(__name__)
+
+# 解析进程内复用的爬虫实例
+_worker_scraper = None
+
+
+def load_city_catalog(filename=None):
+	"""加载城市目录CSV，返回 [{'station_code': ..., 'city_name': ...}]"""
+	filename = filename or DATA_FILES['city_catalog']
+	cities = []
+	seen = set()
+
+	try:
+		with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+			reader = csv.DictReader(f)
+			if 'station_code' not in (reader.fieldnames or []):
+				logger.error(f"城市目录缺少 station_code 列: {filename}")
+				return []
+
+			for row in reader:
+				code = (row.get('station_code') or '').strip()
+				if not code or code in seen:
+					continue
+				seen.add(code)
+				cities.append({
+					'station_code': code,
+					'city_name': (row.get('city_name') or '').strip()
+				})
+
+		logger.info(f"成功加载城市目录: {len(cities)} 个站点")
+
+	except Exception as e:
+		logger.error(f"加载城市目录失败: {e}")
+
+	return cities
+
+
+def expand_city_urls(cities, templates=None):
+	"""将每个站点展开为各数据源的抓取任务"""
+	templates = templates or CITY_URL_TEMPLATES
+	for city in cities:
+		for source_name, template in templates.items():
+			yield {
+				'station_code': city['station_code'],
+				'city_name': city.get('city_name', ''),
+				'source': source_name,
+				'url': template.format(station_code=city['station_code'])
+			}
+
+
+def parse_city_page(source_name, html_content, station_code, city_name=''):
+	"""在解析进程中解析单个页面"""
+	global _worker_scraper
+	if _worker_scraper is None:
+		_worker_scraper = WeatherScraper(use_cache=False)
+
+	records = _worker_scraper.parse_source(source_name, html_content)
+	for record in records:
+		record['station_code'] = station_code
+		record['city_name'] = city_name
+	return records
+
+
+class CityCrawler:
+	"""有界并发的多城市抓取器"""
+
+	def __init__(self, concurrency=CRAWL_CONCURRENCY, queue_size=CRAWL_QUEUE_SIZE, parse_workers=PARSE_WORKERS,
+				 default_rate=DEFAULT_DOMAIN_RATE, domain_rates=None, use_cache=HTTP_CACHE_ENABLED):
+		domain_rates = DOMAIN_RATE_LIMITS if domain_rates is None else domain_rates
+		throttle = HostThrottle(
+			default_delay=1.0 / default_rate,
+			host_delays={host: 1.0 / rate for host, rate in domain_rates.items()}
+		)
+
+		self.concurrency = concurrency
+		self.queue_size = queue_size
+		self.parse_workers = parse_workers
+		self.fetcher = AsyncWeatherFetcher(throttle=throttle, cache=ResponseCache() if use_cache else None)
+
+	async def _produce(self, queue, jobs):
+		"""生成抓取任务，队列满时等待"""
+		for job in jobs:
+			await queue.put(job)
+		for _ in range(self.concurrency):
+			await queue.put(None)
+
+	async def _work(self, session, queue, executor, results, stats, sink=None):
+		"""从队列取任务，抓取后交给解析进程；sink 不为None时解析结果立即写入，不在内存中累积"""
+		loop = asyncio.get_running_loop()
+
+		while True:
+			job = await queue.get()
+			if job is None:
+				break
+
+			html_content = await self.fetcher.fetch(session, job['url'])
+			if not html_content:
+				stats['failed'] += 1
+				continue
+
+			try:
+				records = await loop.run_in_executor(
+					executor, parse_city_page,
+					job['source'], html_content, job['station_code'], job['city_name']
+				)
+			except Exception as e:
+				logger.error(f"解析失败 {job['url']}: {e}")
+				stats['failed'] += 1
+				continue
+
+			stats['pages'] += 1
+			stats['records'] += len(records)
+			if sink is not None:
+				sink.write(job['source'], records)
+			else:
+				results.extend(records)
+
+	async def crawl(self, cities, sink=None):
+		"""抓取所有城市，返回 (数据列表, 统计信息)；指定 sink 时记录流式写出，数据列表为空"""
+		queue = asyncio.Queue(maxsize=self.queue_size)
+		results = []
+		stats = {'cities': len(cities), 'pages': 0, 'failed': 0, 'records': 0}
+
+		start_time = time.perf_counter()
+		with ProcessPoolExecutor(max_workers=self.parse_workers) as executor:
+			async with self.fetcher.create_session(limit=self.concurrency) as session:
+				workers = [
+					asyncio.create_task(self._work(session, queue, executor, results, stats, sink))
+					for _ in range(self.concurrency)
+				]
+				await self._produce(queue, expand_city_urls(cities))
+				await asyncio.gather(*workers)
+
+		elapsed = time.perf_counter() - start_time
+		stats['elapsed'] = round(elapsed, 2)
+		stats['pages_per_sec'] = round(stats['pages'] / elapsed, 2) if elapsed > 0 else 0.0
+		stats['records_per_sec'] = round(stats['records'] / elapsed, 2) if elapsed > 0 else 0.0
+
+		logger.info(
+			f"多城市抓取完成: {stats['pages']} 个页面, {stats['records']} 条数据, 失败 {stats['failed']} 个, "
+			f"耗时 {stats['elapsed']} 秒 ({stats['pages_per_sec']} pages/s, {stats['records_per_sec']} records/s)"
+		)
+		return results, stats
+
+	def run(self, cities, sink=None):
+		"""在新的事件循环中执行多城市抓取"""
+		return asyncio.run(self.crawl(cities, sink))
+
+
+def main():
+	"""主函数"""
+	ensure_directories()
+	cities = load_city_catalog()
+	if not cities:
+		print("城市目录为空，请检查 data/cities.csv")
+		return
+
+	print(f"开始抓取 {len(cities)} 个站点的天气数据...")
+	with RecordSink() as sink:
+		_, stats = CityCrawler().run(cities, sink)
+
+	print(f"抓取完成: {stats['pages']} 个页面, {stats['records']} 条数据")
+	for path, count in sink.counts.items():
+		print(f"  - {path}: {count} 条")
+	print(f"吞吐量: {stats['pages_per_sec']} pages/s, {stats['records_per_sec']} records/s")
+
+
+if __name__ == "__main__":
+	main()
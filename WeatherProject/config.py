@@ -10,10 +10,6 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 LOGS_DIR = os.path.join(BASE_DIR, 'logs')
 
-# 创建必要的目录
-for dir_path in [DATA_DIR, LOGS_DIR]:
-    os.makedirs(dir_path, exist_ok=True)
-
 # 爬虫配置
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -36,6 +32,70 @@ REQUEST_DELAY = 2  # 请求间隔（秒）
 TIMEOUT = 10  # 请求超时时间（秒）
 MAX_RETRIES = 3  # 最大重试次数
 
+# HTTP缓存配置
+HTTP_CACHE_ENABLED = True  # 是否启用响应缓存（ETag/Last-Modified条件请求）
+DEFAULT_CACHE_TTL = 600  # 缓存有效期（秒），有效期内不访问网络
+CACHE_TTLS = {  # 按主机设置缓存有效期（秒），应小于数据源的更新间隔
+    'www.weather.com.cn': 1800,
+    'tianqi.so.com': 1800,
+    'tianqi.moji.com': 900,
+}
+
+# 异步抓取配置
+ASYNC_FETCH = True  # 是否并发抓取所有数据源（需要aiohttp）
+HOST_DELAYS = {}  # 按主机单独设置请求间隔（秒），如 {'tianqi.so.com': 3}，未设置的主机使用REQUEST_DELAY
+
+# 多城市抓取配置
+CITY_URL_TEMPLATES = {
+    'china_weather': 'https://www.weather.com.cn/weather/{station_code}.shtml',  # 中国天气网
+    'tianqi_so': 'https://tianqi.so.com/weather/{station_code}',  # 全国天气网
+}
+CRAWL_CONCURRENCY = 32  # 同时进行的请求数
+CRAWL_QUEUE_SIZE = 256  # 待抓取队列上限，队列满时暂停生成任务
+DEFAULT_DOMAIN_RATE = 5  # 每个域名每秒最多请求数
+DOMAIN_RATE_LIMITS = {}  # 按域名单独设置每秒请求数，如 {'www.weather.com.cn': 10}
+PARSE_WORKERS = None  # 解析进程数，None表示使用CPU核数
+
+# 流式写入配置
+SOURCE_SCHEMAS = {  # 各数据源记录的字段，字段不超出声明的记录写入该来源的CSV，其余写入NDJSON
+    'china_weather': ['station_code', 'city_name', 'source', 'crawl_time', 'date', 'weather', 'temp_high', 'temp_low', 'wind'],
+    'tianqi_so': ['station_code', 'city_name', 'source', 'crawl_time', 'date', 'weather', 'temperature'],
+}
+SINK_FSYNC = True  # 每批记录写入后调用fsync，进程崩溃或断电都不丢失已写入的记录
+SINK_STORE_BATCH = 1000  # 流式写入时每累积多少条记录追加一次历史库（文件仍按页面立即写入）
+
+# 历史库配置
+DEFAULT_STATION_CODE = '101020600'  # 未指定站点的数据（浦东新区）使用的站点编码
+HISTORY_WINDOW_DAYS = 30  # 处理和可视化默认查询最近一次抓取前多少天的数据，0表示全部
+INCREMENTAL_PROCESSING = True  # 未指定时间范围时只处理水位线之后的新增数据
+
+# 历史分层保留配置（类似RRD：原始记录 → 按天汇总 → 按周汇总），天数以最近一次抓取为准，0表示不压缩该层
+RETENTION_RAW_DAYS = 14  # 已处理的原始记录保留天数，更早的按 (抓取日期, 站点, 数据源) 汇总为每天的最小/均值/最大温度
+RETENTION_DAILY_DAYS = 180  # 日汇总保留天数，更早的合并为按周汇总
+AUTO_COMPACT = True  # 每次数据处理后自动压缩历史库
+
+# 解析配置
+PARSER_BACKEND = 'lxml'  # HTML解析后端: 'bs4'(html.parser), 'bs4-lxml', 'lxml', 'selectolax'
+
+# 处理结果输出配置
+PROCESSED_FORMAT = 'feather'  # 处理后数据格式: 'feather'（Arrow IPC，可内存映射）、'parquet' 或 'json'（旧格式，全部写入JSON）
+
+# 可视化配置
+PARALLEL_RENDER = True  # 是否在进程池中并行生成图表（需要pyarrow）
+RENDER_WORKERS = None  # 渲染进程数，None表示 min(图表数, CPU核数)
+CHART_DPI = 300  # 图表分辨率
+CHART_CACHE_ENABLED = True  # 输入数据和样式未变化的图表不重新生成
+TREND_DOWNSAMPLE = 'minmax'  # 温度趋势降采样方法: 'minmax'（按像素列保留极值）、'lttb' 或 None（不降采样）
+TREND_MAX_POINTS = 2000  # 单条温度曲线超过该点数时降采样，约为图表宽度的像素数
+
+# 常驻模式配置
+DAEMON_INTERVAL = 1800  # 常驻模式两次执行之间的间隔（秒）
+DAEMON_JITTER = 0.1  # 间隔随机抖动比例，避免固定时刻集中请求
+
+# 运行指标配置
+METRICS_ENABLED = True  # 是否记录各阶段耗时、CPU、峰值内存、抓取字节数和记录数
+PROMETHEUS_TEXTFILE = None  # Prometheus textfile 路径，如 '/var/lib/node_exporter/textfile_collector/weather.prom'，None表示不输出
+
 # 数据库配置（如果需要）
 DATABASE_CONFIG = {
     'host': 'localhost',
@@ -56,9 +116,35 @@ LOG_CONFIG = {
 # 数据文件配置
 DATA_FILES = {
     'weather_data': os.path.join(DATA_DIR, 'weather_data.csv'),
-    'processed_data': os.path.join(DATA_DIR, 'processed_weather.json'),
-    'charts': os.path.join(DATA_DIR, 'charts')
+    'processed_data': os.path.join(DATA_DIR, 'processed_weather.json'),  # 统计信息和摘要；数据写入同名的 .feather/.parquet 文件
+    'charts': os.path.join(DATA_DIR, 'charts'),
+    'city_catalog': os.path.join(DATA_DIR, 'cities.csv'),
+    'http_cache': os.path.join(DATA_DIR, 'http_cache'),
+    'weather_store': os.path.join(DATA_DIR, 'weather_history.db'),
+    'stream': os.path.join(DATA_DIR, 'stream')
 }
 
-# 创建图表目录
-os.makedirs(DATA_FILES['charts'], exist_ok=True)
\ No newline at end of file
+HTTP_CACHE_DIR = DATA_FILES['http_cache']
+
+CHART_CACHE_FILE = os.path.join(DATA_FILES['charts'], 'render_cache.json')  # 图表指纹缓存
+
+DAEMON_STATUS_FILE = os.path.join(DATA_DIR, 'daemon_status.json')  # 常驻模式最近一轮的各阶段耗时
+
+METRICS_FILE = os.path.join(LOGS_DIR, 'metrics.jsonl')  # 各阶段指标（JSON-lines，每个阶段一行）
+
+# 调试文件配置
+DEBUG_HTML_FILE = os.path.join(DATA_DIR, 'debug_page.html')
+DEBUG_JSON_FILE = os.path.join(DATA_DIR, 'debug_data.json')
+
+
+def ensure_directories():
+    """创建数据、日志和图表目录（由程序入口调用，导入配置时不访问文件系统）"""
+    for dir_path in [DATA_DIR, LOGS_DIR, DATA_FILES['charts']]:
+        os.makedirs(dir_path, exist_ok=True)
+
+
+class Config:
+    """以属性方式访问配置（供 data_extractor 使用）"""
+    DATA_FILES = DATA_FILES
+    DEBUG_HTML_FILE = DEBUG_HTML_FILE
+    DEBUG_JSON_FILE = DEBUG_JSON_FILE
\ No newline at end of file
@@ -8,32 +8,196 @@ from datetime import datetime
 try:
 	from utils import Utils
 	from config import Config
+	from script_scanner import scan_script
 except ImportError:
 	print("请确保 utils.py 和 config.py 文件在同一目录下")
 	exit(1)
 
 
+# 当前天气的温度、天气状况选择器（按优先级）
+TEMP_SELECTORS = [
+	'span.temp', 'em', '.temperature', '.temp-value',
+	'span[class*="temp"]', 'div[class*="temp"]'
+]
+WEATHER_SELECTORS = [
+	'p.wea', '.weather', '.weather-desc',
+	'span[class*="wea"]', 'p[class*="weather"]'
+]
+
+# 天气预报条目选择器（按优先级）
+FORECAST_SELECTORS = [
+	'li.sky.skyid', '.forecast-item', '.weather-item',
+	'li[class*="sky"]', 'div[class*="forecast"]'
+]
+
+# 脚本中的已知变量（按优先级）
+HOUR_VARIABLES = ['hour3data', 'hourData']
+OBSERVE_VARIABLES = ['observe24h_data', 'observeData']
+
+# 通用提取的文本规则
+TEMP_TEXT_PATTERN = re.compile(r'\d+°')
+WEATHER_KEYWORDS = ['晴', '多云', '阴', '雨', '雪', '雾', '霾', '风']
+GENERIC_LIMIT = 10  # 通用数据最多返回条数
+KEYWORD_LIMIT = 2  # 每个天气关键词最多保留条数
+
+_SELECTOR_PATTERN = re.compile(
+	r'^(?P<tag>[a-zA-Z][a-zA-Z0-9]*)?(?P<classes>(?:\.[\w-]+)*)'
+	r'(?:\[(?P<attr>[\w-]+)\*="(?P<value>[^"]*)"\])?$'
+)
+
+
+class SelectorRule:
+	"""
+	预编译的简单CSS选择器。
+	支持 tag、.class（可多个）和 [attr*="value"] 的组合，足以覆盖本模块用到的选择器。
+	"""
+
+	def __init__(self, selector):
+		match = _SELECTOR_PATTERN.match(selector)
+		if not match or not (match.group('tag') or match.group('classes') or match.group('attr')):
+			raise ValueError(f"不支持的选择器: {selector}")
+
+		self.selector = selector
+		self.tag = match.group('tag')
+		self.classes = [c for c in match.group('classes').split('.') if c]
+		self.attr = match.group('attr')
+		self.value = match.group('value')
+
+	def matches(self, tag):
+		"""判断元素是否匹配"""
+		if self.tag and tag.name != self.tag:
+			return False
+
+		if self.classes:
+			tag_classes = tag.get('class') or []
+			if not all(c in tag_classes for c in self.classes):
+				return False
+
+		if self.attr:
+			attr_value = tag.get(self.attr)
+			if attr_value is None:
+				return False
+			if isinstance(attr_value, list):
+				attr_value = ' '.join(attr_value)
+			if self.value not in attr_value:
+				return False
+
+		return True
+
+
+class ExtractionVisitor:
+	"""
+	单次遍历提取器。
+	将脚本、当前天气、预报和通用文本的所有规则编译后，只遍历一次文档树，
+	把匹配结果分发给各收集器，代价由 O(规则数 × 节点数) 降为 O(节点数)。
+	"""
+
+	def __init__(self):
+		self.temp_rules = [SelectorRule(s) for s in TEMP_SELECTORS]
+		self.weather_rules = [SelectorRule(s) for s in WEATHER_SELECTORS]
+		self.forecast_rules = [SelectorRule(s) for s in FORECAST_SELECTORS]
+
+		# 按标签名和第一个类名建立索引，每个元素只检查可能匹配的规则
+		self._rules_by_tag = {}
+		self._rules_by_class = {}
+		for rule in self.temp_rules + self.weather_rules + self.forecast_rules:
+			if rule.tag:
+				self._rules_by_tag.setdefault(rule.tag, []).append(rule)
+			else:
+				self._rules_by_class.setdefault(rule.classes[0], []).append(rule)
+
+	def visit(self, soup):
+		"""遍历文档树，返回各收集器的结果"""
+		from bs4 import NavigableString, Tag
+
+		matches = {}  # 选择器 -> 按文档顺序匹配的元素
+		scripts = []
+		info_divs = []
+		temp_texts = []
+		keyword_texts = {keyword: [] for keyword in WEATHER_KEYWORDS}
+
+		for node in soup.descendants:
+			if isinstance(node, Tag):
+				name = node.name
+				if name == 'script':
+					scripts.append(node)
+				elif name == 'div' and 'con' in (node.get('class') or []):
+					info_divs.append(node)
+
+				candidates = self._rules_by_tag.get(name, [])
+				for css_class in node.get('class') or []:
+					candidates = candidates + self._rules_by_class.get(css_class, [])
+				for rule in candidates:
+					if rule.matches(node):
+						found = matches.setdefault(rule.selector, [])
+						if not found or found[-1] is not node:
+							found.append(node)
+
+			elif isinstance(node, NavigableString):
+				if len(temp_texts) < GENERIC_LIMIT and TEMP_TEXT_PATTERN.search(node):
+					temp_texts.append(node)
+				for keyword, found in keyword_texts.items():
+					if len(found) < KEYWORD_LIMIT and keyword in node:
+						found.append(node)
+
+		return {
+			'scripts': scripts,
+			'temp_elem': self._first_match(matches, self.temp_rules),
+			'weather_elem': self._first_match(matches, self.weather_rules),
+			'info_divs': info_divs,
+			'forecast': self._all_matches(matches, self.forecast_rules),
+			'temp_texts': temp_texts,
+			'keyword_texts': keyword_texts,
+		}
+
+	@staticmethod
+	def _first_match(matches, rules):
+		"""等价于依次尝试 select_one"""
+		for rule in rules:
+			if matches.get(rule.selector):
+				return matches[rule.selector][0]
+		return None
+
+	@staticmethod
+	def _all_matches(matches, rules):
+		"""等价于依次尝试 select，返回 (选择器, 元素列表)"""
+		for rule in rules:
+			if matches.get(rule.selector):
+				return rule.selector, matches[rule.selector]
+		return None, []
+
+
 class DataExtractor:
 	"""数据提取器"""
 
-	def __init__(self):
+	def __init__(self, single_pass=True):
 		self.utils = Utils()
 		self.config = Config()
+		self.visitor = ExtractionVisitor() if single_pass else None
 
 	def extract_all_data(self, soup):
 		"""提取所有类型的数据"""
 		self.utils.print_section("数据提取")
 		weather_data = []
 
+		# 单次遍历收集所有规则的匹配结果
+		nodes = self.visitor.visit(soup) if self.visitor else None
+
 		# 1. 提取脚本数据
 		self.utils.print_step(1, "提取JavaScript数据")
-		script_data = self._extract_script_data(soup)
+		if nodes:
+			script_data = self._parse_scripts(nodes['scripts'])
+		else:
+			script_data = self._extract_script_data(soup)
 		weather_data.extend(script_data)
 		print(f"   从脚本提取到 {len(script_data)} 条数据")
 
 		# 2. 提取当前天气
 		self.utils.print_step(2, "提取当前天气")
-		current_data = self._extract_current_weather(soup)
+		if nodes:
+			current_data = self._build_current_weather(nodes['temp_elem'], nodes['weather_elem'], nodes['info_divs'])
+		else:
+			current_data = self._extract_current_weather(soup)
 		if current_data:
 			weather_data.append(current_data)
 			print("   成功提取当前天气数据")
@@ -42,13 +206,19 @@ class DataExtractor:
 
 		# 3. 提取预报数据
 		self.utils.print_step(3, "提取天气预报")
-		forecast_data = self._extract_forecast_data(soup)
+		if nodes:
+			forecast_data = self._build_forecast_data(*nodes['forecast'])
+		else:
+			forecast_data = self._extract_forecast_data(soup)
 		weather_data.extend(forecast_data)
 		print(f"   提取到 {len(forecast_data)} 条预报数据")
 
 		# 4. 提取通用数据（备用方案）
 		self.utils.print_step(4, "提取通用天气信息")
-		generic_data = self._extract_generic_weather(soup)
+		if nodes:
+			generic_data = self._build_generic_weather(nodes['temp_texts'], nodes['keyword_texts'])
+		else:
+			generic_data = self._extract_generic_weather(soup)
 		weather_data.extend(generic_data)
 		print(f"   提取到 {len(generic_data)} 条通用数据")
 
@@ -56,8 +226,11 @@ class DataExtractor:
 
 	def _extract_script_data(self, soup):
 		"""提取脚本中的数据"""
+		return self._parse_scripts(soup.find_all('script'))
+
+	def _parse_scripts(self, scripts):
+		"""解析脚本标签列表"""
 		weather_data = []
-		scripts = soup.find_all('script')
 
 		script_count = 0
 		for script in scripts:
@@ -66,20 +239,23 @@ class DataExtractor:
 
 			script_count += 1
 
+			# 单次扫描脚本，找出变量赋值和叶子字面量
+			scan = scan_script(script.string)
+
 			# 提取小时数据
-			hour_data = self._extract_hour_data(script.string)
+			hour_data = self._extract_hour_data(scan)
 			if hour_data:
 				weather_data.extend(hour_data)
 				print(f"     脚本{script_count}: 找到小时数据 {len(hour_data)} 条")
 
 			# 提取观测数据
-			observe_data = self._extract_observe_data(script.string)
+			observe_data = self._extract_observe_data(scan)
 			if observe_data:
 				weather_data.extend(observe_data)
 				print(f"     脚本{script_count}: 找到观测数据 {len(observe_data)} 条")
 
 			# 提取其他可能的数据格式
-			other_data = self._extract_other_script_data(script.string)
+			other_data = self._extract_other_script_data(scan)
 			if other_data:
 				weather_data.extend(other_data)
 				print(f"     脚本{script_count}: 找到其他数据 {len(other_data)} 条")
@@ -87,22 +263,14 @@ class DataExtractor:
 		print(f"   总共检查了 {script_count} 个脚本标签")
 		return weather_data
 
-	def _extract_hour_data(self, script_content):
+	def _extract_hour_data(self, scan):
 		"""提取小时级数据"""
 		try:
 			# 多种可能的变量名
-			patterns = [
-				r'var hour3data=(\[.*?\]);',
-				r'hour3data\s*=\s*(\[.*?\]);',
-				r'hourData\s*=\s*(\[.*?\]);',
-			]
-
-			for pattern in patterns:
-				match = re.search(pattern, script_content, re.DOTALL)
-				if match:
-					data = self.utils.safe_json_loads(match.group(1))
-					if data:
-						return self._parse_hour_data(data)
+			for name in HOUR_VARIABLES:
+				data = scan['variables'].get(name)
+				if data:
+					return self._parse_hour_data(data)
 
 		except Exception as e:
 			print(f"   小时数据提取错误: {e}")
@@ -125,21 +293,13 @@ class DataExtractor:
 				weather_list.append(weather_info)
 		return weather_list
 
-	def _extract_observe_data(self, script_content):
+	def _extract_observe_data(self, scan):
 		"""提取24小时观测数据"""
 		try:
-			patterns = [
-				r'var observe24h_data=(\{.*?\});',
-				r'observe24h_data\s*=\s*(\{.*?\});',
-				r'observeData\s*=\s*(\{.*?\});',
-			]
-
-			for pattern in patterns:
-				match = re.search(pattern, script_content, re.DOTALL)
-				if match:
-					data = self.utils.safe_json_loads(match.group(1))
-					if data:
-						return self._parse_observe_data(data)
+			for name in OBSERVE_VARIABLES:
+				data = scan['variables'].get(name)
+				if data:
+					return self._parse_observe_data(data)
 
 		except Exception as e:
 			print(f"   观测数据提取错误: {e}")
@@ -162,65 +322,60 @@ class DataExtractor:
 				weather_list.append(weather_info)
 		return weather_list
 
-	def _extract_other_script_data(self, script_content):
+	def _extract_other_script_data(self, scan):
 		"""提取其他脚本数据"""
 		weather_data = []
 
-		# 查找任何包含温度、天气信息的JSON数据
-		json_patterns = [
-			r'(\{[^{}]*(?:"temp"|"temperature")[^{}]*\})',
-			r'(\[[^\[\]]*(?:"temp"|"temperature")[^\[\]]*\])',
-			r'(\{[^{}]*(?:"weather"|"wea")[^{}]*\})',
-		]
-
-		for pattern in json_patterns:
-			matches = re.findall(pattern, script_content)
-			for match in matches:
-				try:
-					data = self.utils.safe_json_loads(match)
-					if data:
-						weather_info = {
-							'raw_data': data,
-							'data_type': 'script_other',
-							'extract_time': self.utils.get_current_timestamp()
-						}
-						weather_data.append(weather_info)
-				except:
-					continue
+		# 包含温度、天气信息的JSON字面量（扫描时已解码）
+		candidates = scan['temp_objects'] + scan['temp_arrays'] + scan['weather_objects']
+
+		for data in candidates:
+			if data:
+				weather_info = {
+					'raw_data': data,
+					'data_type': 'script_other',
+					'extract_time': self.utils.get_current_timestamp()
+				}
+				weather_data.append(weather_info)
 
 		return weather_data
 
 	def _extract_current_weather(self, soup):
 		"""提取当前天气信息"""
 		try:
-			current_info = {}
-
 			# 多种可能的温度元素
-			temp_selectors = [
-				'span.temp', 'em', '.temperature', '.temp-value',
-				'span[class*="temp"]', 'div[class*="temp"]'
-			]
-
-			for selector in temp_selectors:
+			temp_elem = None
+			for selector in TEMP_SELECTORS:
 				temp_elem = soup.select_one(selector)
 				if temp_elem:
-					current_info['temperature'] = temp_elem.get_text().strip()
 					break
 
 			# 多种可能的天气状况元素
-			weather_selectors = [
-				'p.wea', '.weather', '.weather-desc',
-				'span[class*="wea"]', 'p[class*="weather"]'
-			]
-
-			for selector in weather_selectors:
+			weather_elem = None
+			for selector in WEATHER_SELECTORS:
 				weather_elem = soup.select_one(selector)
 				if weather_elem:
-					current_info['weather'] = weather_elem.get_text().strip()
 					break
 
+			return self._build_current_weather(temp_elem, weather_elem, soup.find_all('div', class_='con'))
+
+		except Exception as e:
+			print(f"   当前天气提取错误: {e}")
+
+		return None
+
+	def _build_current_weather(self, temp_elem, weather_elem, info_divs):
+		"""由匹配到的元素生成当前天气数据"""
+		try:
+			current_info = {}
+
+			if temp_elem:
+				current_info['temperature'] = temp_elem.get_text().strip()
+
+			if weather_elem:
+				current_info['weather'] = weather_elem.get_text().strip()
+
 			# 查找其他信息
-			info_divs = soup.find_all('div', class_='con')
 			for div in info_divs:
 				text = div.get_text()
 				if '湿度' in text:
@@ -242,22 +397,26 @@ class DataExtractor:
 
 	def _extract_forecast_data(self, soup):
 		"""提取天气预报数据"""
-		forecast_list = []
-
 		try:
 			# 多种可能的预报元素选择器
-			forecast_selectors = [
-				'li.sky.skyid', '.forecast-item', '.weather-item',
-				'li[class*="sky"]', 'div[class*="forecast"]'
-			]
-
-			forecast_items = []
-			for selector in forecast_selectors:
+			for selector in FORECAST_SELECTORS:
 				items = soup.select(selector)
 				if items:
-					forecast_items = items
-					print(f"   使用选择器: {selector}, 找到 {len(items)} 个预报项")
-					break
+					return self._build_forecast_data(selector, items)
+
+		except Exception as e:
+			print(f"   预报数据提取错误: {e}")
+
+		return []
+
+	def _build_forecast_data(self, selector, forecast_items):
+		"""由匹配到的预报条目生成预报数据"""
+		forecast_list = []
+		if not forecast_items:
+			return forecast_list
+
+		try:
+			print(f"   使用选择器: {selector}, 找到 {len(forecast_items)} 个预报项")
 
 			for i, item in enumerate(forecast_items):
 				forecast_info = {'item_index': i}
@@ -299,12 +458,29 @@ class DataExtractor:
 
 	def _extract_generic_weather(self, soup):
 		"""提取通用天气信息（备用方案）"""
+		try:
+			# 查找所有包含温度相关文本的元素
+			temp_texts = soup.find_all(text=TEMP_TEXT_PATTERN)
+
+			# 查找所有可能的天气描述
+			keyword_texts = {
+				keyword: soup.find_all(text=re.compile(keyword))[:KEYWORD_LIMIT]
+				for keyword in WEATHER_KEYWORDS
+			}
+
+			return self._build_generic_weather(temp_texts, keyword_texts)
+
+		except Exception as e:
+			print(f"   通用数据提取错误: {e}")
+
+		return []
+
+	def _build_generic_weather(self, temp_texts, keyword_texts):
+		"""由匹配到的文本节点生成通用天气数据"""
 		weather_data = []
 
 		try:
-			# 查找所有包含温度相关文本的元素
-			temp_elements = soup.find_all(text=re.compile(r'\d+°'))
-			for elem in temp_elements:
+			for elem in temp_texts:
 				parent = elem.parent if hasattr(elem, 'parent') else None
 				if parent:
 					weather_info = {
@@ -315,11 +491,8 @@ class DataExtractor:
 					}
 					weather_data.append(weather_info)
 
-			# 查找所有可能的天气描述
-			weather_keywords = ['晴', '多云', '阴', '雨', '雪', '雾', '霾', '风']
-			for keyword in weather_keywords:
-				elements = soup.find_all(text=re.compile(keyword))
-				for elem in elements[:2]:  # 限制数量
+			for keyword, elements in keyword_texts.items():
+				for elem in elements[:KEYWORD_LIMIT]:  # 限制数量
 					weather_info = {
 						'weather': elem.strip(),
 						'keyword': keyword,
@@ -330,7 +503,7 @@ class DataExtractor:
 		except Exception as e:
 			print(f"   通用数据提取错误: {e}")
 
-		return weather_data[:10]  # 限制返回数量
+		return weather_data[:GENERIC_LIMIT]  # 限制返回数量
 
 
 # 单独运行测试
@@ -346,9 +519,9 @@ if __name__ == "__main__":
 	if html_content:
 		print("✅ 从调试文件加载HTML")
 
-		from bs4 import BeautifulSoup
+		from html_backend import make_soup
 
-		soup = BeautifulSoup(html_content, 'html.parser')
+		soup = make_soup(html_content)
 
 		extractor = DataExtractor()
 		weather_data = extractor.extract_all_data(soup)
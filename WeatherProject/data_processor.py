@@ -4,15 +4,70 @@
 """
 
 import pandas as pd
+import numpy as np
+import os
 import json
 import re
 from datetime import datetime, timedelta
 import logging
-from config import DATA_FILES
+from config import DATA_FILES, PROCESSED_FORMAT, ensure_directories
+
+try:
+	import pyarrow as pa
+	import pyarrow.feather as feather
+	import pyarrow.parquet as parquet
+except ImportError:  # 未安装pyarrow时处理结果退回JSON格式
+	pa = None
+	feather = None
+	parquet = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 常见天气状况（按顺序匹配，先匹配到的优先）
+WEATHER_CONDITIONS = {
+	'晴': 'sunny',
+	'多云': 'cloudy',
+	'阴': 'overcast',
+	'小雨': 'light_rain',
+	'中雨': 'moderate_rain',
+	'大雨': 'heavy_rain',
+	'暴雨': 'heavy_rain',
+	'雷阵雨': 'thunderstorm',
+	'雷': 'thunderstorm',
+	'雪': 'snow',
+	'小雪': 'light_snow',
+	'中雪': 'moderate_snow',
+	'大雪': 'heavy_snow',
+	'雾': 'fog',
+	'霾': 'haze',
+	'沙尘': 'dust'
+}
+
+# 温度提取正则：优先匹配带单位的数字，否则取第一个数字
+TEMP_PATTERN = re.compile(r'(-?\d+\.?\d*)[°℃C]')
+NUMBER_PATTERN = re.compile(r'(-?\d+\.?\d*)')
+
+# 向量化日期解析使用的正则，顺序与 parse_date 一致。
+# parse_date 中 "X月Y日" 分支的比较条件有笔误，匹配后会落到 "Y日" 分支，这里直接跳过该模式以保持结果一致
+FULL_DATE_PATTERNS = [
+	re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})'),
+	re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})'),
+]
+MONTH_DAY_PATTERN = re.compile(r'(\d{1,2})[/-](\d{1,2})')
+DAY_PATTERN = re.compile(r'(\d{1,2})日')
+RELATIVE_DAYS = {'今天': 0, '明天': 1, '后天': 2}
+
+# 取值很少的字符串列以 category 类型保存，清理后的温度以 float32 保存
+CATEGORY_COLUMNS = ['source', 'weather_condition', 'data_type', 'tier']
+TEMPERATURE_COLUMNS = ['temp_high_cleaned', 'temp_low_cleaned', 'temperature_cleaned']
+TEMPERATURE_DTYPE = 'float32'
+
+
+def _two_digits(series):
+	"""数字字符串格式化为两位，与 f'{int(x):02d}' 一致"""
+	return series.map(lambda value: f'{int(value):02d}')
+
 
 class WeatherDataProcessor:
 	def __init__(self):
@@ -58,14 +113,14 @@ class WeatherDataProcessor:
 
 		# 增强的温度提取正则表达式
 		# 匹配格式如: "25℃", "高温 28℃", "-5°C", "28-32℃" 等
-		match = re.search(r'(-?\d+\.?\d*)[°℃C]', temp_input) # 允许浮点数
+		match = TEMP_PATTERN.search(temp_input) # 允许浮点数
 		if match:
 			return float(match.group(1))
 
 		# 备用模式：尝试提取任何数字
-		numbers = re.findall(r'-?\d+\.?\d*', temp_input) # 允许浮点数
-		if numbers:
-			return float(numbers[0])
+		match = NUMBER_PATTERN.search(temp_input) # 允许浮点数
+		if match:
+			return float(match.group(1))
 
 		return None
 
@@ -133,28 +188,8 @@ class WeatherDataProcessor:
 		if not isinstance(weather_str, str):
 			return {'condition': '', 'description': ''}
 
-		# 常见天气状况
-		weather_conditions = {
-			'晴': 'sunny',
-			'多云': 'cloudy',
-			'阴': 'overcast',
-			'小雨': 'light_rain',
-			'中雨': 'moderate_rain',
-			'大雨': 'heavy_rain',
-			'暴雨': 'heavy_rain',
-			'雷阵雨': 'thunderstorm',
-			'雷': 'thunderstorm',
-			'雪': 'snow',
-			'小雪': 'light_snow',
-			'中雪': 'moderate_snow',
-			'大雪': 'heavy_snow',
-			'雾': 'fog',
-			'霾': 'haze',
-			'沙尘': 'dust'
-		}
-
 		condition = ''
-		for chinese, english in weather_conditions.items():
+		for chinese, english in WEATHER_CONDITIONS.items():
 			if chinese in weather_str:
 				condition = english
 				break
@@ -164,13 +199,124 @@ class WeatherDataProcessor:
 			'description': weather_str or '未知天气'  # 默认为"未知天气"而不是空字符串
 		}
 
-	def process_dataframe(self, df):
-		"""处理DataFrame数据"""
+	@staticmethod
+	def _factorize(series):
+		"""按取值编码，返回 (编码, 去重后的取值)，空值编码为-1"""
+		codes, uniques = pd.factorize(series)
+		return codes, pd.Series(uniques, dtype=object)
+
+	@staticmethod
+	def _broadcast(series, codes, unique_results, null_result, dtype=object):
+		"""将去重取值上的结果按编码映射回每一行"""
+		values = np.empty(len(unique_results) + 1, dtype=dtype)
+		values[:-1] = unique_results
+		values[-1] = null_result  # 编码-1取最后一个元素
+		return pd.Series(values[codes], index=series.index)
+
+	def clean_temperature_column(self, series):
+		"""clean_temperature 的向量化版本，结果与逐行 apply 一致"""
+		if series.dtype.kind in 'biuf':
+			return series.astype(float)
+
+		codes, uniques = self._factorize(series)
+		is_str = uniques.map(lambda value: isinstance(value, str)).astype(bool)
+		is_number = uniques.map(lambda value: isinstance(value, (int, float))).astype(bool)
+
+		results = pd.Series(np.nan, index=uniques.index)
+		results[is_number] = uniques[is_number].astype(float)
+
+		strings = uniques[is_str].astype(str)
+		if not strings.empty:
+			extracted = strings.str.extract(TEMP_PATTERN, expand=False)
+			missing = extracted.isnull()
+			extracted[missing] = strings[missing].str.extract(NUMBER_PATTERN, expand=False)
+			results[is_str] = extracted.astype(float)
+
+		# apply 的结果类型：只要有浮点数（包括NaN输入）即为float64，否则全部为None
+		null_values = series[codes == -1]
+		has_float_null = any(isinstance(value, float) for value in null_values)
+		if results.notnull().any() or has_float_null:
+			return self._broadcast(series, codes, results.to_numpy(), np.nan, dtype=float)
+		return self._broadcast(series, codes, [None] * len(results), None)
+
+	def parse_date_column(self, series, current_date=None):
+		"""
+		parse_date 的向量化版本，结果与逐行 apply 一致。
+		current_date 为相对日期（"今天"、"24日"）的参照日期，默认当前时间。
+		"""
+		codes, uniques = self._factorize(series)
+		is_str = uniques.map(lambda value: isinstance(value, str)).astype(bool)
+		results = pd.Series(None, index=uniques.index, dtype=object)
+		pending = uniques[is_str].astype(str)
+		current_date = current_date or datetime.now()
+
+		def resolve(matched, values):
+			nonlocal pending
+			results[matched[matched].index] = values[matched].to_numpy()
+			pending = pending[~matched]
+
+		for pattern in FULL_DATE_PATTERNS:
+			parts = pending.str.extract(pattern)
+			matched = parts[0].notnull()
+			resolve(matched, parts[0] + '-' + _two_digits(parts[1].fillna('0')) + '-' + _two_digits(parts[2].fillna('0')))
+
+		parts = pending.str.extract(MONTH_DAY_PATTERN)
+		matched = parts[0].notnull()
+		resolve(matched, f'{current_date.year}-' + _two_digits(parts[0].fillna('0')) + '-' + _two_digits(parts[1].fillna('0')))
+
+		days = pending.str.extract(DAY_PATTERN, expand=False)
+		matched = days.notnull()
+		resolve(matched, f'{current_date.year}-{current_date.month:02d}-' + _two_digits(days.fillna('0')))
+
+		for keyword, offset in RELATIVE_DAYS.items():
+			matched = pending.str.contains(keyword, regex=False)
+			value = (current_date + timedelta(days=offset)).strftime('%Y-%m-%d')
+			resolve(matched, pd.Series(value, index=pending.index))
+
+		# 其余格式很少见，逐个交给 parse_date 处理
+		for index, value in pending.items():
+			results[index] = self.parse_date(value)
+
+		return self._broadcast(series, codes, results.to_numpy(), None)
+
+	def extract_weather_column(self, series):
+		"""extract_weather_info 的向量化版本，返回 (天气状况, 天气描述) 两列"""
+		codes, uniques = self._factorize(series)
+		is_str = uniques.map(lambda value: isinstance(value, str)).astype(bool).to_numpy()
+		strings = uniques.where(is_str, '').astype(str)
+
+		conditions = [strings.str.contains(chinese, regex=False).to_numpy() for chinese in WEATHER_CONDITIONS]
+		condition = np.select(conditions, list(WEATHER_CONDITIONS.values()), default='unknown').astype(object)
+		condition[~is_str] = ''
+
+		description = strings.to_numpy(dtype=object).copy()
+		description[is_str & (description == '')] = '未知天气'
+
+		return (self._broadcast(series, codes, condition, ''),
+				self._broadcast(series, codes, description, ''))
+
+	@staticmethod
+	def optimize_dtypes(df):
+		"""原地把低基数字符串列转为 category、清理后的温度列转为 float32，返回 df"""
+		for col in CATEGORY_COLUMNS:
+			if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+				df[col] = df[col].astype('category')
+		for col in TEMPERATURE_COLUMNS:
+			if col in df.columns and df[col].dtype != TEMPERATURE_DTYPE:
+				df[col] = pd.to_numeric(df[col], errors='coerce').astype(TEMPERATURE_DTYPE)
+		return df
+
+	def process_dataframe(self, df, vectorized=True, inplace=False):
+		"""
+		处理DataFrame数据，vectorized=False 时使用逐行 apply 的原始实现。
+		处理结果以新增列的形式加入；inplace=True 时直接加到 df 上，
+		否则加到 df 的浅拷贝上（原始列共享内存，不复制数据）。
+		"""
 		if df.empty:
 			logger.warning("传入的DataFrame为空，无法处理")
 			return df
 
-		processed_df = df.copy()
+		processed_df = df if inplace else df.copy(deep=False)
 
 		try:
 			# 确保必要的列存在
@@ -181,7 +327,15 @@ class WeatherDataProcessor:
 					processed_df[col] = None
 
 			# 处理日期列
-			processed_df['parsed_date'] = processed_df['date'].apply(self.parse_date)
+			if vectorized:
+				processed_df['parsed_date'] = self.parse_date_column(processed_df['date'])
+			else:
+				processed_df['parsed_date'] = processed_df['date'].apply(self.parse_date)
+
+			# 历史库中的记录在入库时已按抓取日期解析了预报日期，优先使用
+			if 'forecast_date' in processed_df.columns:
+				processed_df['parsed_date'] = processed_df['forecast_date'].where(
+					processed_df['forecast_date'].notnull(), processed_df['parsed_date'])
 
 			# 调试信息
 			logger.info(f"日期解析结果示例: {processed_df['parsed_date'].head(3).tolist()}")
@@ -190,7 +344,10 @@ class WeatherDataProcessor:
 			temp_columns = ['temp_high', 'temp_low', 'temperature']
 			for col in temp_columns:
 				if col in processed_df.columns:
-					processed_df[f'{col}_cleaned'] = processed_df[col].apply(self.clean_temperature)
+					if vectorized:
+						processed_df[f'{col}_cleaned'] = self.clean_temperature_column(processed_df[col])
+					else:
+						processed_df[f'{col}_cleaned'] = processed_df[col].apply(self.clean_temperature)
 
 					# 打印调试信息
 					non_null_count = processed_df[f'{col}_cleaned'].notnull().sum()
@@ -198,14 +355,25 @@ class WeatherDataProcessor:
 
 					# 显示一些样本值
 					if non_null_count > 0:
-						sample_values = processed_df[[col, f'{col}_cleaned']].dropna().head(3).to_dict('records')
+						# 清理结果非空时原值必然非空，只需检查清理后的列
+						sample_rows = np.flatnonzero(processed_df[f'{col}_cleaned'].notnull().to_numpy())[:3]
+						sample_values = [
+							{col: value, f'{col}_cleaned': cleaned}
+							for value, cleaned in zip(processed_df[col].iloc[sample_rows].tolist(),
+													  processed_df[f'{col}_cleaned'].iloc[sample_rows].tolist())
+						]
 						logger.info(f"{col} 样本值: {sample_values}")
 
 			# 处理天气描述
 			if 'weather' in processed_df.columns:
-				weather_info = processed_df['weather'].apply(self.extract_weather_info)
-				processed_df['weather_condition'] = weather_info.apply(lambda x: x['condition'])
-				processed_df['weather_description'] = weather_info.apply(lambda x: x['description'])
+				if vectorized:
+					condition, description = self.extract_weather_column(processed_df['weather'])
+					processed_df['weather_condition'] = condition
+					processed_df['weather_description'] = description
+				else:
+					weather_info = processed_df['weather'].apply(self.extract_weather_info)
+					processed_df['weather_condition'] = weather_info.apply(lambda x: x['condition'])
+					processed_df['weather_description'] = weather_info.apply(lambda x: x['description'])
 
 			# 添加处理时间
 			processed_df['processed_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -218,6 +386,7 @@ class WeatherDataProcessor:
 					logger.warning(f"有 {mask.sum()} 个日期无法解析，将使用当前日期")
 					processed_df.loc[mask, 'parsed_date'] = datetime.now().strftime('%Y-%m-%d')
 
+			self.optimize_dtypes(processed_df)
 			logger.info("数据处理完成")
 
 		except Exception as e:
@@ -227,8 +396,25 @@ class WeatherDataProcessor:
 
 		return processed_df
 
-	def aggregate_data(self, df):
-		"""聚合数据分析"""
+	@staticmethod
+	def _value_counts(series):
+		"""取值计数，category 列中没有出现的类别不计入"""
+		counts = series.value_counts()
+		return counts[counts > 0].to_dict()
+
+	def aggregate_data(self, df, aggregator=None):
+		"""
+		聚合数据分析。
+		传入 aggregator 时只把 df 作为新增数据合并到已有统计中，返回累计结果。
+		"""
+		if aggregator is not None:
+			try:
+				aggregator.update(df)
+				logger.info(f"增量聚合完成，累计 {aggregator.total_records} 条记录")
+			except Exception as e:
+				logger.error(f"增量聚合失败: {e}")
+			return aggregator.to_stats()
+
 		if df.empty:
 			return {}
 
@@ -237,7 +423,7 @@ class WeatherDataProcessor:
 		try:
 			# 基本统计信息
 			stats['total_records'] = len(df)
-			stats['data_sources'] = df['source'].value_counts().to_dict() if 'source' in df.columns else {}
+			stats['data_sources'] = self._value_counts(df['source']) if 'source' in df.columns else {}
 
 			# 温度统计
 			temp_cols = [col for col in df.columns if 'temp' in col and 'cleaned' in col]
@@ -246,18 +432,17 @@ class WeatherDataProcessor:
 					temp_data = df[col].dropna()
 					if not temp_data.empty:
 						stats[f'{col}_stats'] = {
-							'mean': round(temp_data.mean(), 2),
+							'mean': round(float(temp_data.mean()), 2),
 							'min': int(temp_data.min()),
 							'max': int(temp_data.max()),
-							'std': round(temp_data.std(), 2)
+							'std': round(float(temp_data.std()), 2)
 						}
 					else:
 						logger.warning(f"{col} 列没有有效的温度数据")
 
 			# 天气状况统计
 			if 'weather_condition' in df.columns:
-				weather_counts = df['weather_condition'].value_counts()
-				stats['weather_conditions'] = weather_counts.to_dict()
+				stats['weather_conditions'] = self._value_counts(df['weather_condition'])
 
 			# 日期范围
 			if 'parsed_date' in df.columns:
@@ -285,18 +470,29 @@ class WeatherDataProcessor:
 		try:
 			summary_parts = []
 
-			# 按日期排序
+			# 按日期排序：只在排序用到的列上计算行位置，最后取出7行，不复制整个DataFrame
 			if 'parsed_date' in df.columns:
-				# 确保parsed_date列都有值
-				df = df.dropna(subset=['parsed_date'])
+				keys = df[[col for col in ['source', 'parsed_date', 'crawl_time', 'tier'] if col in df.columns]]
+				keys = keys.set_axis(pd.RangeIndex(len(keys)))
+
+				# 确保parsed_date列都有值；历史库的汇总层没有天气描述，不参与摘要
+				valid = keys['parsed_date'].notnull()
+				if 'tier' in keys.columns:
+					valid &= keys['tier'] == 'raw'
+				keys = keys[valid]
 
-				if df.empty:
+				if keys.empty:
 					return "天气数据中缺少有效日期信息"
 
-				df_sorted = df.sort_values('parsed_date')
+				# 历史数据中同一天有多次抓取，只保留每个数据源最近一次的预报
+				if 'crawl_time' in keys.columns:
+					key_columns = [col for col in ['source', 'parsed_date'] if col in keys.columns]
+					keys = keys.sort_values('crawl_time', kind='stable').drop_duplicates(subset=key_columns, keep='last')
+
+				rows = keys['parsed_date'].sort_values().index[:7]
 
 				# 获取未来几天的预报
-				for _, row in df_sorted.head(7).iterrows():
+				for _, row in df.iloc[rows].iterrows():
 					date = row.get('parsed_date', '未知日期')
 					weather = row.get('weather_description', row.get('weather', ''))
 					temp_high = row.get('temp_high_cleaned')
@@ -324,10 +520,42 @@ class WeatherDataProcessor:
 			logger.error(traceback.format_exc())
 			return "天气预报摘要生成失败"
 
-	def save_processed_data(self, df, stats, filename=None):
-		"""保存处理后的数据"""
+	@staticmethod
+	def _to_arrow_table(df):
+		"""转换为Arrow表，混合类型的object列（如原始温度字段）统一转为字符串"""
+		columns = {}
+		for col in df.columns:
+			series = df[col]
+			if series.dtype == object:
+				series = series.where(series.isna(), series.astype(str)).astype('string')
+			columns[col] = series
+		return pa.Table.from_pandas(pd.DataFrame(columns, index=df.index), preserve_index=False)
+
+	def _write_frame(self, df, filename, fmt):
+		"""写入处理后数据到与 filename 同名、扩展名为 fmt 的文件（先写临时文件再替换），返回文件路径"""
+		path = f"{os.path.splitext(filename)[0]}.{fmt}"
+		temp_path = path + '.tmp'
+		table = self._to_arrow_table(df)
+		if fmt == 'feather':
+			# 不压缩，读取时可内存映射，无需解码
+			feather.write_feather(table, temp_path, compression='uncompressed')
+		else:
+			parquet.write_table(table, temp_path, compression='snappy')
+		os.replace(temp_path, path)
+		return path
+
+	def save_processed_data(self, df, stats, filename=None, fmt=PROCESSED_FORMAT):
+		"""
+		保存处理后的数据。
+		fmt 为 'feather'/'parquet' 时数据写入列式文件，filename 只保存统计信息、摘要和数据文件名；
+		为 'json' 时全部写入 filename（旧格式）。
+		"""
 		filename = filename or DATA_FILES['processed_data']
 
+		if fmt != 'json' and pa is None:
+			logger.warning("未安装pyarrow，处理后数据改为保存为JSON")
+			fmt = 'json'
+
 		try:
 			# 检查温度数据是否有效
 			temp_columns = ['temp_high_cleaned', 'temp_low_cleaned']
@@ -351,16 +579,22 @@ class WeatherDataProcessor:
 					logger.warning("没有有效的日期数据，可视化将无法显示时间轴")
 
 			output_data = {
-				'processed_data': df.to_dict('records') if not df.empty else [],
 				'statistics': stats,
 				'processed_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-				'summary': self.generate_forecast_summary(df)
+				'summary': self.generate_forecast_summary(df),
+				'records': len(df),
+				'format': fmt,
 			}
 
+			if fmt == 'json':
+				output_data['processed_data'] = df.to_dict('records') if not df.empty else []
+			else:
+				output_data['data_file'] = os.path.basename(self._write_frame(df, filename, fmt))
+
 			with open(filename, 'w', encoding='utf-8') as f:
 				json.dump(output_data, f, ensure_ascii=False, indent=2, default=lambda x: int(x) if isinstance(x, float) and x.is_integer() else x)
 
-			logger.info(f"处理后的数据已保存: {filename}")
+			logger.info(f"处理后的数据已保存: {output_data.get('data_file', filename)} ({fmt}, {len(df)} 条)")
 			return output_data
 
 		except Exception as e:
@@ -370,8 +604,113 @@ class WeatherDataProcessor:
 			return None
 
 
+class IncrementalAggregator:
+	"""
+	可增量更新的聚合统计，结果格式与 aggregate_data 一致。
+	温度的均值和标准差用 Welford 算法的批量合并形式（Chan 公式）更新，
+	只需保存每列的 (数量, 均值, 离差平方和, 最小值, 最大值)。
+	"""
+
+	def __init__(self, state=None):
+		state = state or {}
+		self.total_records = state.get('total_records', 0)
+		self.data_sources = dict(state.get('data_sources', {}))
+		self.weather_conditions = dict(state.get('weather_conditions', {}))
+		self.temperature = {col: dict(values) for col, values in state.get('temperature', {}).items()}
+		self.date_range = dict(state.get('date_range', {}))
+
+	def to_state(self):
+		"""导出可JSON序列化的状态"""
+		return {
+			'total_records': self.total_records,
+			'data_sources': self.data_sources,
+			'weather_conditions': self.weather_conditions,
+			'temperature': self.temperature,
+			'date_range': self.date_range
+		}
+
+	@staticmethod
+	def _merge_counts(counts, series):
+		"""合并取值计数"""
+		for key, value in series.value_counts().items():
+			if value:
+				counts[key] = counts.get(key, 0) + int(value)
+
+	def _merge_temperature(self, col, values):
+		"""合并一批温度数据的 数量/均值/离差平方和/最值"""
+		count = len(values)
+		mean = float(values.mean())
+		m2 = float(((values - mean) ** 2).sum())
+
+		current = self.temperature.get(col)
+		if not current:
+			self.temperature[col] = {'count': count, 'mean': mean, 'm2': m2,
+									 'min': float(values.min()), 'max': float(values.max())}
+			return
+
+		total = current['count'] + count
+		delta = mean - current['mean']
+		current['mean'] += delta * count / total
+		current['m2'] += m2 + delta ** 2 * current['count'] * count / total
+		current['count'] = total
+		current['min'] = min(current['min'], float(values.min()))
+		current['max'] = max(current['max'], float(values.max()))
+
+	def update(self, df):
+		"""把新增的处理后数据合并到统计中"""
+		if df.empty:
+			return
+
+		self.total_records += len(df)
+		if 'source' in df.columns:
+			self._merge_counts(self.data_sources, df['source'])
+		if 'weather_condition' in df.columns:
+			self._merge_counts(self.weather_conditions, df['weather_condition'])
+
+		temp_cols = [col for col in df.columns if 'temp' in col and 'cleaned' in col]
+		for col in temp_cols:
+			# float32 列在 float64 上计算离差平方和，避免累计误差
+			values = pd.to_numeric(df[col], errors='coerce').dropna().astype(float)
+			if not values.empty:
+				self._merge_temperature(col, values)
+
+		if 'parsed_date' in df.columns:
+			valid_dates = df['parsed_date'].dropna()
+			if not valid_dates.empty:
+				start, end = valid_dates.min(), valid_dates.max()
+				self.date_range['start'] = min(self.date_range.get('start', start), start)
+				self.date_range['end'] = max(self.date_range.get('end', end), end)
+
+	def to_stats(self):
+		"""生成与 aggregate_data 相同格式的统计结果"""
+		if not self.total_records:
+			return {}
+
+		stats = {
+			'total_records': self.total_records,
+			'data_sources': dict(sorted(self.data_sources.items(), key=lambda item: -item[1]))
+		}
+
+		for col, values in self.temperature.items():
+			std = (values['m2'] / (values['count'] - 1)) ** 0.5 if values['count'] > 1 else float('nan')
+			stats[f'{col}_stats'] = {
+				'mean': round(values['mean'], 2),
+				'min': int(values['min']),
+				'max': int(values['max']),
+				'std': round(std, 2)
+			}
+
+		if self.weather_conditions:
+			stats['weather_conditions'] = dict(sorted(self.weather_conditions.items(), key=lambda item: -item[1]))
+		if self.date_range:
+			stats['date_range'] = dict(self.date_range)
+
+		return stats
+
+
 def main():
 	"""主函数"""
+	ensure_directories()
 	processor = WeatherDataProcessor()
 
 	print("开始处理天气数据...")
@@ -388,7 +727,7 @@ def main():
 		print(df.head(3))
 
 		# 处理数据
-		processed_df = processor.process_dataframe(df)
+		processed_df = processor.process_dataframe(df, inplace=True)
 
 		# 显示处理后的温度数据统计
 		temp_columns = ['temp_high_cleaned', 'temp_low_cleaned']
@@ -408,7 +747,7 @@ def main():
 
 		if result:
 			print("\n数据处理完成!")
-			print(f"处理后数据条数: {len(result['processed_data'])}")
+			print(f"处理后数据条数: {result['records']}")
 			print(f"数据来源统计: {stats.get('data_sources', {})}")
 			print(f"\n天气预报摘要:\n{result['summary']}")
 		else:
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+时间序列降采样模块
+
+在绘图前减少点数，保留极值：
+  minmax: 按像素列分桶，每桶保留最小值和最大值所在的点（严格保留所有极值）
+  lttb: Largest-Triangle-Three-Buckets，保留视觉形状，并补上全局最小/最大值
+"""
+
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+
+
+def _as_float(x):
+	"""把横坐标（数值或datetime64）转换为浮点数组"""
+	x = np.asarray(x)
+	if np.issubdtype(x.dtype, np.datetime64):
+		x = x.astype('datetime64[ns]').astype(np.int64)
+	return x.astype(float)
+
+
+def _bin_ids(x, n_bins):
+	"""按横坐标等宽分桶，返回每个点所在的桶号"""
+	span = x[-1] - x[0]
+	if span <= 0:
+		return np.zeros(len(x), dtype=np.int64)
+	return np.minimum(((x - x[0]) / span * n_bins).astype(np.int64), n_bins - 1)
+
+
+def minmax_indices(x, y, n_bins):
+	"""每个像素列保留最小值和最大值所在的点，返回升序下标（含首尾点）"""
+	x = _as_float(x)
+	y = np.asarray(y, dtype=float)
+	bins = _bin_ids(x, n_bins)
+
+	# 按 (桶号, y) 排序后，每个桶的第一个和最后一个分别是最小值和最大值
+	order = np.lexsort((y, bins))
+	sorted_bins = bins[order]
+	starts = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+	ends = np.r_[starts[1:], len(order)] - 1
+
+	keep = np.concatenate([order[starts], order[ends], [0, len(x) - 1]])
+	return np.unique(keep)
+
+
+def lttb_indices(x, y, n_out):
+	"""Largest-Triangle-Three-Buckets 降采样，返回升序下标，额外保留全局最小值和最大值"""
+	x = _as_float(x)
+	y = np.asarray(y, dtype=float)
+	n = len(x)
+	if n_out >= n or n_out < 3:
+		return np.arange(n)
+
+	# 首尾点单独保留，中间的点分成 n_out - 2 个桶
+	edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+	selected = np.empty(n_out, dtype=np.int64)
+	selected[0] = 0
+	selected[-1] = n - 1
+
+	previous = 0
+	for i in range(n_out - 2):
+		start, end = edges[i], edges[i + 1]
+		# 下一个桶的平均点（最后一个桶用终点）
+		if i + 2 < len(edges):
+			next_x = x[end:edges[i + 2]].mean()
+			next_y = y[end:edges[i + 2]].mean()
+		else:
+			next_x, next_y = x[-1], y[-1]
+
+		# 与上一个选中点、下一桶平均点组成的三角形面积最大的点
+		area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+					  - (x[previous] - x[start:end]) * (next_y - y[previous]))
+		previous = start + int(np.argmax(area))
+		selected[i + 1] = previous
+
+	return np.unique(np.concatenate([selected, [np.argmin(y), np.argmax(y)]]))
+
+
+def downsample_indices(x, y, max_points, method='minmax'):
+	"""
+	返回需要绘制的点的下标，点数不超过 max_points 左右（minmax 每桶最多两点）。
+	method 为None或点数不多时返回全部下标。x 需已按升序排列且不含空值。
+	"""
+	n = len(y)
+	if not method or not max_points or n <= max_points:
+		return np.arange(n)
+	if method == 'minmax':
+		return minmax_indices(x, y, max(max_points // 2, 1))
+	if method == 'lttb':
+		return lttb_indices(x, y, max_points)
+	raise ValueError(f"未知的降采样方法: {method}，可选: {', '.join(METHODS)}")
+
+
+def envelope(x, low, high, n_bins):
+	"""
+	按像素列计算温度带的包络：每桶取最低温的最小值和最高温的最大值，
+	横坐标取桶内第一个点，用于 fill_between。
+	"""
+	x_values = np.asarray(x)
+	bins = _bin_ids(_as_float(x_values), n_bins)
+	starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+	low_min = np.minimum.reduceat(np.asarray(low, dtype=float), starts)
+	high_max = np.maximum.reduceat(np.asarray(high, dtype=float), starts)
+	return x_values[starts], low_min, high_max
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+HTML解析后端模块
+
+所有后端提供相同的接口，返回各数据源的原始字段，
+由 WeatherScraper 补充 source、crawl_time 等公共字段。
+"""
+
+import logging
+
+from bs4 import BeautifulSoup
+
+try:
+	from lxml import etree
+	from lxml import html as lxml_html
+except ImportError:  # 未安装lxml时只能使用html.parser
+	etree = None
+	lxml_html = None
+
+try:
+	from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+	HTMLParser = None
+
+from config import PARSER_BACKEND
+
+logger = logging.getLogger(__name__)
+
+
+def _has_class(name):
+	"""生成匹配class列表中某个类名的XPath条件"""
+	return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def make_soup(html_content):
+	"""创建BeautifulSoup对象，优先使用lxml解析器"""
+	return BeautifulSoup(html_content, 'lxml' if lxml_html is not None else 'html.parser')
+
+
+class HtmlBackend:
+	"""解析后端接口"""
+
+	name = 'base'
+
+	def parse_china_weather(self, html_content):
+		"""返回 [{'date', 'weather', 'temp_high', 'temp_low', 'wind'}]"""
+		raise NotImplementedError
+
+	def parse_tianqi_so(self, html_content):
+		"""返回 [{'date', 'weather', 'temperature'}]"""
+		raise NotImplementedError
+
+	def parse_generic(self, html_content):
+		"""返回第一个天气容器的文本，未找到时返回None"""
+		raise NotImplementedError
+
+
+class SoupBackend(HtmlBackend):
+	"""BeautifulSoup后端，features 可选 'html.parser' 或 'lxml'"""
+
+	def __init__(self, features='html.parser'):
+		self.features = features
+		self.name = 'bs4' if features == 'html.parser' else f'bs4-{features}'
+
+	def parse_china_weather(self, html_content):
+		soup = BeautifulSoup(html_content, self.features)
+		items = []
+
+		weather_list = soup.find('ul', class_='t clearfix')
+		if weather_list:
+			for item in weather_list.find_all('li'):
+				date_elem = item.find('h1')
+				weather_elem = item.find('p', class_='wea')
+				temp_elem = item.find('p', class_='tem')
+				wind_elem = item.find('p', class_='win')
+
+				if all([date_elem, weather_elem, temp_elem]):
+					temp_high = temp_elem.find('span')
+					temp_low = temp_elem.find('i')
+					items.append({
+						'date': date_elem.get_text(strip=True),
+						'weather': weather_elem.get_text(strip=True),
+						'temp_high': temp_high.get_text(strip=True) if temp_high else '',
+						'temp_low': temp_low.get_text(strip=True) if temp_low else '',
+						'wind': wind_elem.get_text(strip=True) if wind_elem else ''
+					})
+
+		return items
+
+	def parse_tianqi_so(self, html_content):
+		soup = BeautifulSoup(html_content, self.features)
+		items = []
+
+		weather_container = soup.find('div', class_='weather-list')
+		if not weather_container:
+			weather_container = soup.find('div', id='weather')
+
+		if weather_container:
+			weather_items = weather_container.find_all('div', class_='weather-item')
+			if not weather_items:
+				weather_items = weather_container.find_all('li')
+
+			for item in weather_items:
+				date = item.find(class_='date') or item.find('h3')
+				weather = item.find(class_='weather') or item.find('p')
+				temperature = item.find(class_='temperature') or item.find(class_='temp')
+
+				if date and weather:
+					items.append({
+						'date': date.get_text(strip=True),
+						'weather': weather.get_text(strip=True),
+						'temperature': temperature.get_text(strip=True) if temperature else ''
+					})
+
+		return items
+
+	def parse_generic(self, html_content):
+		soup = BeautifulSoup(html_content, self.features)
+		possible_containers = [
+			soup.find('div', class_='forecast'),
+			soup.find('div', class_='weather'),
+			soup.find('ul', class_='weather-list'),
+			soup.find('div', id='forecast'),
+		]
+
+		for container in possible_containers:
+			if container:
+				return container.get_text(strip=True)
+		return None
+
+
+class LxmlBackend(HtmlBackend):
+	"""lxml后端，XPath在创建时预编译"""
+
+	name = 'lxml'
+
+	# 各数据源的XPath选择器
+	SELECTORS = {
+		'china_weather': {
+			'items': "(//ul[@class='t clearfix'])[1]//li",
+			'date': "(.//h1)[1]",
+			'weather': f"(.//p[{_has_class('wea')}])[1]",
+			'temp': f"(.//p[{_has_class('tem')}])[1]",
+			'wind': f"(.//p[{_has_class('win')}])[1]",
+			'temp_high': "(.//span)[1]",
+			'temp_low': "(.//i)[1]",
+		},
+		'tianqi_so': {
+			'container': f"(//div[{_has_class('weather-list')}])[1]",
+			'container_fallback': "(//div[@id='weather'])[1]",
+			'items': f".//div[{_has_class('weather-item')}]",
+			'items_fallback': ".//li",
+			'date': f"(.//*[{_has_class('date')}])[1]",
+			'date_fallback': "(.//h3)[1]",
+			'weather': f"(.//*[{_has_class('weather')}])[1]",
+			'weather_fallback': "(.//p)[1]",
+			'temperature': f"(.//*[{_has_class('temperature')}])[1]",
+			'temperature_fallback': f"(.//*[{_has_class('temp')}])[1]",
+		},
+		'generic': {
+			'containers': [
+				f"(//div[{_has_class('forecast')}])[1]",
+				f"(//div[{_has_class('weather')}])[1]",
+				f"(//ul[{_has_class('weather-list')}])[1]",
+				"(//div[@id='forecast'])[1]",
+			],
+		},
+	}
+
+	def __init__(self):
+		if etree is None:
+			raise ImportError("lxml后端需要安装 lxml")
+
+		self.xpaths = {}
+		for source, selectors in self.SELECTORS.items():
+			self.xpaths[source] = {
+				key: [etree.XPath(expr) for expr in value] if isinstance(value, list) else etree.XPath(value)
+				for key, value in selectors.items()
+			}
+		self.text_xpath = etree.XPath(".//text()[not(parent::script or parent::style or parent::template)]")
+
+	@staticmethod
+	def _first(xpath, node):
+		"""返回第一个匹配节点"""
+		result = xpath(node)
+		return result[0] if result else None
+
+	def _text(self, node):
+		"""与 get_text(strip=True) 一致的文本提取（跳过脚本和样式）"""
+		if node is None:
+			return ''
+		return ''.join(text.strip() for text in self.text_xpath(node))
+
+	@staticmethod
+	def _root(html_content):
+		if not html_content.strip():
+			return None
+		try:
+			return lxml_html.fromstring(html_content)
+		except ValueError:
+			# 带编码声明的字符串需要以字节形式解析
+			return lxml_html.fromstring(html_content.encode('utf-8'))
+
+	def parse_china_weather(self, html_content):
+		root = self._root(html_content)
+		xp = self.xpaths['china_weather']
+		items = []
+		if root is None:
+			return items
+
+		for item in xp['items'](root):
+			date_elem = self._first(xp['date'], item)
+			weather_elem = self._first(xp['weather'], item)
+			temp_elem = self._first(xp['temp'], item)
+			wind_elem = self._first(xp['wind'], item)
+
+			if date_elem is not None and weather_elem is not None and temp_elem is not None:
+				temp_high = self._first(xp['temp_high'], temp_elem)
+				temp_low = self._first(xp['temp_low'], temp_elem)
+				items.append({
+					'date': self._text(date_elem),
+					'weather': self._text(weather_elem),
+					'temp_high': self._text(temp_high),
+					'temp_low': self._text(temp_low),
+					'wind': self._text(wind_elem)
+				})
+
+		return items
+
+	def parse_tianqi_so(self, html_content):
+		root = self._root(html_content)
+		xp = self.xpaths['tianqi_so']
+		items = []
+		if root is None:
+			return items
+
+		container = self._first(xp['container'], root)
+		if container is None:
+			container = self._first(xp['container_fallback'], root)
+		if container is None:
+			return items
+
+		weather_items = xp['items'](container) or xp['items_fallback'](container)
+		for item in weather_items:
+			date = self._first(xp['date'], item)
+			if date is None:
+				date = self._first(xp['date_fallback'], item)
+			weather = self._first(xp['weather'], item)
+			if weather is None:
+				weather = self._first(xp['weather_fallback'], item)
+			temperature = self._first(xp['temperature'], item)
+			if temperature is None:
+				temperature = self._first(xp['temperature_fallback'], item)
+
+			if date is not None and weather is not None:
+				items.append({
+					'date': self._text(date),
+					'weather': self._text(weather),
+					'temperature': self._text(temperature)
+				})
+
+		return items
+
+	def parse_generic(self, html_content):
+		root = self._root(html_content)
+		if root is None:
+			return None
+
+		for xpath in self.xpaths['generic']['containers']:
+			container = self._first(xpath, root)
+			if container is not None:
+				return self._text(container)
+		return None
+
+
+class SelectolaxBackend(HtmlBackend):
+	"""selectolax后端，基于CSS选择器"""
+
+	name = 'selectolax'
+
+	SELECTORS = {
+		'china_weather': {
+			'list': 'ul[class="t clearfix"]',
+		},
+		'tianqi_so': {
+			'containers': ['div.weather-list', 'div#weather'],
+			'items': ['div.weather-item', 'li'],
+			'date': ['.date', 'h3'],
+			'weather': ['.weather', 'p'],
+			'temperature': ['.temperature', '.temp'],
+		},
+		'generic': {
+			'containers': ['div.forecast', 'div.weather', 'ul.weather-list', 'div#forecast'],
+		},
+	}
+
+	def __init__(self):
+		if HTMLParser is None:
+			raise ImportError("selectolax后端需要安装 selectolax")
+
+	@staticmethod
+	def _text(node):
+		"""与 get_text(strip=True) 一致的文本提取（跳过脚本和样式）"""
+		if node is None:
+			return ''
+		return ''.join(
+			child.text_content.strip()
+			for child in node.traverse(include_text=True)
+			if child.tag == '-text' and child.parent.tag not in ('script', 'style', 'template')
+		)
+
+	@staticmethod
+	def _first_of(node, selectors):
+		"""按顺序尝试选择器，返回第一个匹配的后代节点"""
+		node_id = getattr(node, 'mem_id', None)
+		for selector in selectors:
+			for found in node.css(selector):
+				if found.mem_id != node_id:
+					return found
+		return None
+
+	def parse_china_weather(self, html_content):
+		tree = HTMLParser(html_content)
+		items = []
+
+		weather_list = tree.css_first(self.SELECTORS['china_weather']['list'])
+		if weather_list is None:
+			return items
+
+		for item in weather_list.css('li'):
+			date_elem = item.css_first('h1')
+			weather_elem = item.css_first('p.wea')
+			temp_elem = item.css_first('p.tem')
+			wind_elem = item.css_first('p.win')
+
+			if date_elem is not None and weather_elem is not None and temp_elem is not None:
+				items.append({
+					'date': self._text(date_elem),
+					'weather': self._text(weather_elem),
+					'temp_high': self._text(temp_elem.css_first('span')),
+					'temp_low': self._text(temp_elem.css_first('i')),
+					'wind': self._text(wind_elem)
+				})
+
+		return items
+
+	def parse_tianqi_so(self, html_content):
+		tree = HTMLParser(html_content)
+		selectors = self.SELECTORS['tianqi_so']
+		items = []
+
+		container = self._first_of(tree, selectors['containers'])
+		if container is None:
+			return items
+
+		weather_items = []
+		for selector in selectors['items']:
+			weather_items = container.css(selector)
+			if weather_items:
+				break
+
+		for item in weather_items:
+			date = self._first_of(item, selectors['date'])
+			weather = self._first_of(item, selectors['weather'])
+			temperature = self._first_of(item, selectors['temperature'])
+
+			if date is not None and weather is not None:
+				items.append({
+					'date': self._text(date),
+					'weather': self._text(weather),
+					'temperature': self._text(temperature)
+				})
+
+		return items
+
+	def parse_generic(self, html_content):
+		tree = HTMLParser(html_content)
+		container = self._first_of(tree, self.SELECTORS['generic']['containers'])
+		return self._text(container) if container is not None else None
+
+
+# 可用的后端
+BACKENDS = {
+	'bs4': lambda: SoupBackend('html.parser'),
+	'bs4-lxml': lambda: SoupBackend('lxml'),
+	'lxml': LxmlBackend,
+	'selectolax': SelectolaxBackend,
+}
+
+_backend_cache = {}
+
+
+def get_backend(name=None):
+	"""获取解析后端，依赖缺失时退回 html.parser"""
+	name = name or PARSER_BACKEND
+	if name not in _backend_cache:
+		try:
+			_backend_cache[name] = BACKENDS[name]()
+		except KeyError:
+			raise ValueError(f"未知的解析后端: {name}，可选: {', '.join(BACKENDS)}")
+		except ImportError as e:
+			logger.warning(f"{e}，退回 html.parser 后端")
+			_backend_cache[name] = SoupBackend('html.parser')
+	return _backend_cache[name]
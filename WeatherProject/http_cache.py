@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP响应磁盘缓存模块
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from urllib.parse import urlparse
+
+from config import HTTP_CACHE_DIR, DEFAULT_CACHE_TTL, CACHE_TTLS
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+	"""按URL缓存网页内容、ETag和Last-Modified"""
+
+	def __init__(self, cache_dir=HTTP_CACHE_DIR, default_ttl=DEFAULT_CACHE_TTL, ttls=None):
+		self.cache_dir = cache_dir
+		self.default_ttl = default_ttl
+		self.ttls = CACHE_TTLS if ttls is None else ttls
+		self.stats = {'fresh': 0, 'revalidated': 0, 'miss': 0}
+		os.makedirs(self.cache_dir, exist_ok=True)
+
+	def _paths(self, url):
+		"""返回缓存元数据和内容文件路径"""
+		key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+		base = os.path.join(self.cache_dir, key)
+		return base + '.json', base + '.html'
+
+	def get_ttl(self, url):
+		"""获取URL所在主机的缓存有效期（秒）"""
+		return self.ttls.get(urlparse(url).netloc, self.default_ttl)
+
+	def get(self, url):
+		"""读取缓存条目，不存在时返回None"""
+		meta_path, body_path = self._paths(url)
+		try:
+			with open(meta_path, 'r', encoding='utf-8') as f:
+				entry = json.load(f)
+			with open(body_path, 'r', encoding='utf-8') as f:
+				entry['body'] = f.read()
+			return entry
+		except (FileNotFoundError, json.JSONDecodeError):
+			return None
+		except Exception as e:
+			logger.warning(f"读取缓存失败: {url}, 错误: {e}")
+			return None
+
+	def is_fresh(self, url, entry):
+		"""缓存是否仍在有效期内，有效期内无需访问网络"""
+		return time.time() - entry.get('fetched_at', 0) < self.get_ttl(url)
+
+	def conditional_headers(self, entry):
+		"""生成条件请求头"""
+		headers = {}
+		if entry and entry.get('etag'):
+			headers['If-None-Match'] = entry['etag']
+		if entry and entry.get('last_modified'):
+			headers['If-Modified-Since'] = entry['last_modified']
+		return headers
+
+	def store(self, url, body, etag=None, last_modified=None):
+		"""写入缓存，先写临时文件再替换，避免中断时留下半个文件"""
+		meta_path, body_path = self._paths(url)
+		meta = {
+			'url': url,
+			'etag': etag,
+			'last_modified': last_modified,
+			'fetched_at': time.time()
+		}
+		try:
+			self._write_atomic(body_path, body)
+			self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False))
+		except Exception as e:
+			logger.warning(f"写入缓存失败: {url}, 错误: {e}")
+
+	def touch(self, url, entry):
+		"""收到304后刷新缓存时间"""
+		meta_path, _ = self._paths(url)
+		meta = {key: value for key, value in entry.items() if key != 'body'}
+		meta['fetched_at'] = time.time()
+		try:
+			self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False))
+		except Exception as e:
+			logger.warning(f"更新缓存失败: {url}, 错误: {e}")
+
+	@staticmethod
+	def _write_atomic(path, content):
+		"""原子写入文件"""
+		tmp_path = path + '.tmp'
+		with open(tmp_path, 'w', encoding='utf-8') as f:
+			f.write(content)
+		os.replace(tmp_path, path)
+
+	def lookup(self, url):
+		"""
+		查找缓存。
+		返回 (网页内容, 缓存条目)：缓存未过期时直接返回内容；
+		否则内容为None，调用方应携带条件请求头访问网络。
+		"""
+		entry = self.get(url)
+		if entry and self.is_fresh(url, entry):
+			self.stats['fresh'] += 1
+			logger.info(f"缓存未过期，跳过请求: {url}")
+			return entry['body'], entry
+		return None, entry
+
+	def revalidated(self, url, entry):
+		"""记录304响应，返回缓存内容"""
+		self.stats['revalidated'] += 1
+		self.touch(url, entry)
+		logger.info(f"内容未变化(304)，使用缓存: {url}")
+		return entry['body']
+
+	def stored(self, url, body, headers):
+		"""记录完整响应并写入缓存"""
+		self.stats['miss'] += 1
+		self.store(url, body, headers.get('ETag'), headers.get('Last-Modified'))
+		return body
@@ -6,37 +6,82 @@
 import os
 import sys
 import time
+import json
+import random
+import signal
+import threading
 import argparse
 from datetime import datetime
 
-# 导入自定义模块
-from web_scraper import WeatherScraper
-from data_processor import WeatherDataProcessor
-from visualizer import WeatherVisualizer
-from config import DATA_FILES, LOG_CONFIG
+# 导入自定义模块（爬取、处理、可视化模块依赖pandas/matplotlib等，在子命令用到时才导入）
+from weather_store import WeatherStore
+from metrics import PipelineMetrics
+from config import (DATA_FILES, LOG_CONFIG, HISTORY_WINDOW_DAYS, INCREMENTAL_PROCESSING, AUTO_COMPACT, DAEMON_INTERVAL,
+					DAEMON_JITTER, DAEMON_STATUS_FILE, PROCESSED_FORMAT, ensure_directories)
 
 import logging
 
-# 配置日志
-logging.basicConfig(
-	level=getattr(logging, LOG_CONFIG['level']),
-	format=LOG_CONFIG['format'],
-	handlers=[
-		logging.FileHandler(LOG_CONFIG['file'], encoding='utf-8'),
-		logging.StreamHandler(sys.stdout)
-	]
-)
-
 logger = logging.getLogger(__name__)
 
 
+def setup_logging():
+	"""创建必要目录并配置日志"""
+	ensure_directories()
+	logging.basicConfig(
+		level=getattr(logging, LOG_CONFIG['level']),
+		format=LOG_CONFIG['format'],
+		handlers=[
+			logging.FileHandler(LOG_CONFIG['file'], encoding='utf-8'),
+			logging.StreamHandler(sys.stdout)
+		]
+	)
+
+
 class WeatherProjectManager:
 	"""天气项目管理器"""
 
-	def __init__(self):
-		self.scraper = WeatherScraper()
-		self.processor = WeatherDataProcessor()
-		self.visualizer = WeatherVisualizer()
+	def __init__(self, daemon=False):
+		"""daemon 为True时HTTP连接和渲染进程池在多轮执行之间保持"""
+		self.daemon = daemon
+		self.store = WeatherStore()
+		self.metrics = PipelineMetrics()
+		self._scraper = None
+		self._processor = None
+		self._visualizer = None
+		self.last_cycle = None
+		self._stop = threading.Event()
+
+	@property
+	def scraper(self):
+		"""爬虫，首次使用时才导入"""
+		if self._scraper is None:
+			from web_scraper import WeatherScraper
+			self._scraper = WeatherScraper(keep_alive=self.daemon)
+		return self._scraper
+
+	@property
+	def processor(self):
+		"""数据处理器，首次使用时才导入"""
+		if self._processor is None:
+			from data_processor import WeatherDataProcessor
+			self._processor = WeatherDataProcessor()
+		return self._processor
+
+	@property
+	def visualizer(self):
+		"""可视化器，首次使用时才导入"""
+		if self._visualizer is None:
+			from visualizer import WeatherVisualizer
+			self._visualizer = WeatherVisualizer(self.store, keep_pool=self.daemon)
+		return self._visualizer
+
+	def close(self):
+		"""释放HTTP连接、渲染进程池和历史库连接"""
+		if self._scraper is not None:
+			self._scraper.close()
+		if self._visualizer is not None:
+			self._visualizer.close()
+		self.store.close()
 
 	def run_scraping(self):
 		"""执行数据爬取"""
@@ -44,15 +89,28 @@ class WeatherProjectManager:
 		logger.info("开始数据爬取流程")
 
 		try:
-			# 爬取数据
-			weather_data = self.scraper.scrape_all_sources()
+			# 获取网页
+			with self.metrics.stage('scrape') as stage:
+				bytes_before = self.scraper.bytes_fetched
+				pages = self.scraper.fetch_all_sources()
+				stage['records_out'] = sum(1 for page in pages.values() if page)
+				stage['bytes_fetched'] = self.scraper.bytes_fetched - bytes_before
+
+			# 解析数据
+			with self.metrics.stage('parse', records_in=stage['records_out']) as stage:
+				weather_data = self.scraper.parse_pages(pages)
+				stage['records_out'] = len(weather_data)
 
 			if weather_data:
 				print(f"✓ 爬取完成，共获取 {len(weather_data)} 条数据")
 
-				# 保存原始数据
-				self.scraper.save_to_csv(weather_data)
-				self.scraper.save_to_json(weather_data)
+				with self.metrics.stage('save_raw', records_in=len(weather_data)) as stage:
+					# 保存原始数据
+					self.scraper.save_to_csv(weather_data)
+					self.scraper.save_to_json(weather_data)
+
+					# 追加到历史库
+					stage['records_out'] = self.store.append(weather_data)
 
 				logger.info(f"数据爬取成功，获取 {len(weather_data)} 条记录")
 				return True
@@ -66,38 +124,149 @@ class WeatherProjectManager:
 			logger.error(f"数据爬取异常: {e}")
 			return False
 
-	def run_processing(self):
-		"""执行数据处理"""
-		print("📊 开始处理天气数据...")
-		logger.info("开始数据处理流程")
+	def run_city_scraping(self, catalog_file=None):
+		"""执行多城市数据爬取"""
+		print("🏙️  开始爬取多城市天气数据...")
+		logger.info("开始多城市爬取流程")
 
 		try:
-			# 检查原始数据是否存在
-			if not os.path.exists(DATA_FILES['weather_data']):
-				print("✗ 未找到原始数据文件，请先执行数据爬取")
-				return False
+			from city_crawler import CityCrawler, load_city_catalog
+			from record_sink import RecordSink
 
-			# 加载并处理数据
-			df = self.processor.load_csv_data()
+			cities = load_city_catalog(catalog_file)
+			if not cities:
+				print("✗ 城市目录为空或无法读取")
+				return False
 
-			if df.empty:
-				print("✗ 原始数据为空")
+			# 每个页面解析后立即写入流式文件和历史库，内存占用与抓取规模无关
+			with self.metrics.stage('scrape', records_in=len(cities)) as stage, RecordSink(store=self.store) as sink:
+				_, stats = CityCrawler().run(cities, sink)
+				stage['records_out'] = sink.records
+			print(f"✓ 抓取 {stats['cities']} 个站点: {stats['pages']} 个页面, {stats['records']} 条数据, "
+				  f"失败 {stats['failed']} 个页面")
+			print(f"  - 吞吐量: {stats['pages_per_sec']} pages/s, {stats['records_per_sec']} records/s")
+
+			if sink.records:
+				for path, count in sink.counts.items():
+					print(f"  - {path}: {count} 条")
+				logger.info(f"多城市爬取成功，获取 {sink.records} 条记录")
+				return True
+			else:
+				print("✗ 未获取到任何数据")
+				logger.warning("多城市爬取失败，未获取到数据")
 				return False
 
-			print(f"✓ 加载了 {len(df)} 条原始数据")
+		except Exception as e:
+			print(f"✗ 多城市爬取过程出错: {e}")
+			logger.error(f"多城市爬取异常: {e}")
+			return False
+
+	def _process_range(self, start, end):
+		"""重新处理指定抓取时间范围内的全部数据，返回 (处理后数据, 统计信息)"""
+		start = start or self.store.default_start(HISTORY_WINDOW_DAYS)
+		df = self.store.query(start, end)
+
+		if df.empty:
+			print("✗ 原始数据为空")
+			return None, None
 
-			# 数据清洗和处理
-			processed_df = self.processor.process_dataframe(df)
+		print(f"✓ 加载了 {len(df)} 条原始数据 (抓取时间: {start or '最早'} ~ {end or '最新'})")
 
-			# 生成统计信息
+		# 数据清洗和处理
+		with self.metrics.stage('process', records_in=len(df)) as stage:
+			processed_df = self.processor.process_dataframe(df, inplace=True)
+			stage['records_out'] = len(processed_df)
+
+		with self.metrics.stage('save', records_in=len(processed_df)) as stage:
+			stage['records_out'] = self.store.save_processed(processed_df)
+
+		# 范围内更早的数据已压缩到汇总层时，输出和统计同时包含汇总数据
+		if self.store.count('weather_rollups'):
+			processed_df = self.store.query_processed(start, end)
+
+		# 生成统计信息
+		with self.metrics.stage('aggregate', records_in=len(processed_df)) as stage:
 			stats = self.processor.aggregate_data(processed_df)
+			stage['records_out'] = stats.get('total_records')
+		return processed_df, stats
+
+	def _process_incremental(self, rebuild=False):
+		"""只处理水位线之后的新增数据，合并到历史库和累计统计中，返回 (最近窗口的处理后数据, 统计信息)"""
+		from data_processor import IncrementalAggregator
+
+		if rebuild:
+			self.store.reset_processing()
+
+		watermark = self.store.get_state('watermark', 0)
+		aggregator = IncrementalAggregator(self.store.get_state('aggregates'))
+		delta = self.store.query_new(watermark)
+
+		if delta.empty:
+			print(f"✓ 没有新增数据 (水位线: 记录ID {watermark})，处理结果已是最新")
+			stats = aggregator.to_stats()
+		else:
+			print(f"✓ 新增 {len(delta)} 条原始数据 (水位线: 记录ID {watermark})")
+
+			# 只清洗新增数据，统计信息增量合并
+			with self.metrics.stage('process', records_in=len(delta)) as stage:
+				processed_delta = self.processor.process_dataframe(delta, inplace=True)
+				stage['records_out'] = len(processed_delta)
+
+			with self.metrics.stage('aggregate', records_in=len(processed_delta)) as stage:
+				stats = self.processor.aggregate_data(processed_delta, aggregator)
+				stage['records_out'] = stats.get('total_records')
+
+			# 处理结果、水位线和累计统计在同一事务中保存
+			state = {'watermark': int(delta['record_id'].max()), 'aggregates': aggregator.to_state()}
+			with self.metrics.stage('save', records_in=len(processed_delta)) as stage:
+				stage['records_out'] = self.store.save_processed(processed_delta, state)
+			if not stage['records_out']:
+				print("✗ 保存处理结果失败")
+				return None, None
+
+		# 输出文件只包含最近窗口内的数据
+		processed_df = self.store.query_processed(self.store.default_start(HISTORY_WINDOW_DAYS))
+		return processed_df, stats
+
+	def run_processing(self, start=None, end=None, rebuild=False):
+		"""
+		执行数据处理。
+		未指定时间范围时增量处理新增数据；指定 start/end（抓取时间）时重新处理该范围。
+		"""
+		print("📊 开始处理天气数据...")
+		logger.info("开始数据处理流程")
+
+		try:
+			# 历史库为空时导入旧版CSV
+			if self.store.count() == 0:
+				if not os.path.exists(DATA_FILES['weather_data']):
+					print("✗ 未找到原始数据文件，请先执行数据爬取")
+					return False
+				self.store.import_csv()
+
+			if (start or end) and not rebuild:
+				processed_df, stats = self._process_range(start, end)
+			elif INCREMENTAL_PROCESSING:
+				processed_df, stats = self._process_incremental(rebuild)
+			else:
+				if rebuild:
+					self.store.reset_processing()
+				processed_df, stats = self._process_range(None, None)
+
+			if processed_df is None:
+				return False
+
+			if AUTO_COMPACT:
+				self.run_compaction()
 
 			# 保存处理后的数据
-			result = self.processor.save_processed_data(processed_df, stats)
+			with self.metrics.stage('export', records_in=len(processed_df)) as stage:
+				result = self.processor.save_processed_data(processed_df, stats)
+				stage['records_out'] = result['records'] if result else 0
 
 			if result:
 				print("✓ 数据处理完成")
-				print(f"  - 处理后数据: {len(result['processed_data'])} 条")
+				print(f"  - 处理后数据: {result['records']} 条")
 				print(f"  - 数据来源: {list(stats.get('data_sources', {}).keys())}")
 
 				# 显示天气摘要
@@ -116,19 +285,32 @@ class WeatherProjectManager:
 			logger.error(f"数据处理异常: {e}")
 			return False
 
-	def run_visualization(self):
-		"""执行数据可视化"""
+	def run_compaction(self):
+		"""按保留策略压缩历史库：过期的原始记录汇总为按天数据，更早的日汇总合并为按周数据"""
+		with self.metrics.stage('compact') as stage:
+			result = self.store.compact()
+			stage['records_in'] = result['raw'] + result['daily']
+
+		if result['raw'] or result['daily']:
+			print(f"✓ 历史库压缩: {result['raw']} 条原始记录汇总为按天数据, {result['daily']} 条日汇总合并为按周数据")
+		return result
+
+	def run_visualization(self, start=None, end=None):
+		"""执行数据可视化，start/end 为抓取时间范围"""
 		print("📈 开始生成数据可视化图表...")
 		logger.info("开始数据可视化流程")
 
 		try:
 			# 检查处理后的数据是否存在
-			if not os.path.exists(DATA_FILES['processed_data']):
+			if self.store.count('processed_records') == 0 and not os.path.exists(DATA_FILES['processed_data']):
 				print("✗ 未找到处理后的数据文件，请先执行数据处理")
 				return False
 
 			# 生成图表
-			charts_generated = self.visualizer.generate_all_charts()
+			with self.metrics.stage('render') as stage:
+				charts_generated = self.visualizer.generate_all_charts(start, end)
+				stage['records_in'] = self.visualizer.records_loaded
+				stage['records_out'] = len(charts_generated or [])
 
 			if charts_generated:
 				print(f"✓ 可视化完成，生成了 {len(charts_generated)} 个图表:")
@@ -147,7 +329,7 @@ class WeatherProjectManager:
 			logger.error(f"数据可视化异常: {e}")
 			return False
 
-	def run_full_pipeline(self):
+	def run_full_pipeline(self, start=None, end=None, rebuild=False):
 		"""执行完整流程"""
 		print("🚀 开始执行完整的天气数据分析流程...")
 		print("=" * 60)
@@ -167,7 +349,7 @@ class WeatherProjectManager:
 
 		# 步骤2: 数据处理
 		print("\n【步骤 2/3】数据处理")
-		processing_success = self.run_processing()
+		processing_success = self.run_processing(start, end, rebuild)
 
 		if not processing_success:
 			print("❌ 流程终止：数据处理失败")
@@ -177,7 +359,7 @@ class WeatherProjectManager:
 
 		# 步骤3: 数据可视化
 		print("\n【步骤 3/3】数据可视化")
-		visualization_success = self.run_visualization()
+		visualization_success = self.run_visualization(start, end)
 
 		# 完成总结
 		end_time = time.time()
@@ -190,6 +372,8 @@ class WeatherProjectManager:
 			print(f"⏱️  总耗时: {duration:.2f} 秒")
 			print(f"📊 数据文件: {DATA_FILES['weather_data']}")
 			print(f"📈 图表目录: {DATA_FILES['charts']}")
+			print(f"\n📏 各阶段指标 (运行ID {self.metrics.run_id}):")
+			print(self.metrics.summary())
 			logger.info(f"完整流程执行成功，耗时 {duration:.2f} 秒")
 
 			# 显示项目文件结构
@@ -201,6 +385,82 @@ class WeatherProjectManager:
 			logger.error("完整流程执行失败")
 			return False
 
+	def run_cycle(self):
+		"""执行一轮 爬取→处理→可视化，返回各阶段耗时"""
+		self.metrics.new_run()
+		cycle = {'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'run_id': self.metrics.run_id,
+				 'stages': {}, 'success': False}
+		cycle_start = time.perf_counter()
+
+		for stage, run in (('scrape', self.run_scraping), ('process', self.run_processing),
+						   ('visualize', self.run_visualization)):
+			stage_start = time.perf_counter()
+			success = run()
+			cycle['stages'][stage] = round(time.perf_counter() - stage_start, 3)
+			if not success:
+				cycle['failed_stage'] = stage
+				break
+		else:
+			cycle['success'] = True
+
+		cycle['total'] = round(time.perf_counter() - cycle_start, 3)
+		cycle['metrics'] = self.metrics.stages
+		return cycle
+
+	def _save_daemon_status(self, status):
+		"""原子写入常驻模式状态文件"""
+		temp_file = DAEMON_STATUS_FILE + '.tmp'
+		try:
+			with open(temp_file, 'w', encoding='utf-8') as f:
+				json.dump(status, f, ensure_ascii=False, indent=2)
+			os.replace(temp_file, DAEMON_STATUS_FILE)
+		except OSError as e:
+			logger.error(f"保存常驻模式状态失败: {e}")
+
+	def stop(self, *_):
+		"""请求常驻模式在当前一轮结束后退出"""
+		self._stop.set()
+
+	def run_daemon(self, interval=DAEMON_INTERVAL, jitter=DAEMON_JITTER, max_cycles=None):
+		"""
+		常驻执行完整流程，每轮间隔 interval 秒并加入 ±jitter 比例的随机抖动。
+		进程内保持HTTP连接、历史库连接和渲染进程池，每轮只有网络和计算开销。
+		最近一轮的各阶段耗时写入 DAEMON_STATUS_FILE。
+		"""
+		print(f"🔁 进入常驻模式，间隔 {interval} 秒 (抖动 ±{jitter:.0%})，Ctrl+C 或 SIGTERM 退出")
+		logger.info(f"常驻模式启动，间隔 {interval} 秒")
+
+		signal.signal(signal.SIGTERM, self.stop)
+		cycles = 0
+		try:
+			while not self._stop.is_set():
+				cycles += 1
+				print(f"\n{'=' * 20} 第 {cycles} 轮 {'=' * 20}")
+				try:
+					self.last_cycle = self.run_cycle()
+				except Exception as e:
+					logger.error(f"常驻模式第 {cycles} 轮异常: {e}")
+					self.last_cycle = {'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+									   'success': False, 'error': str(e)}
+
+				delay = max(interval * (1 + random.uniform(-jitter, jitter)) - self.last_cycle.get('total', 0), 0)
+				next_run = datetime.fromtimestamp(time.time() + delay).strftime('%Y-%m-%d %H:%M:%S')
+				self._save_daemon_status({'pid': os.getpid(), 'cycles': cycles, 'last_cycle': self.last_cycle,
+										  'next_run': next_run})
+
+				stages = ', '.join(f"{stage} {elapsed:.2f}s" for stage, elapsed in self.last_cycle.get('stages', {}).items())
+				print(f"⏱️  本轮耗时: {self.last_cycle.get('total', 0):.2f} 秒 ({stages})，下一轮: {next_run}")
+				logger.info(f"常驻模式第 {cycles} 轮完成: {self.last_cycle}")
+
+				if max_cycles and cycles >= max_cycles:
+					break
+				self._stop.wait(delay)
+		except KeyboardInterrupt:
+			print("\n收到中断信号")
+		finally:
+			self.close()
+			logger.info(f"常驻模式退出，共执行 {cycles} 轮")
+
 	def show_project_structure(self):
 		"""显示项目文件结构"""
 		print(f"\n📁 项目文件结构:")
@@ -247,6 +507,8 @@ class WeatherProjectManager:
 		files_to_check = [
 			(DATA_FILES['weather_data'], "原始数据"),
 			(DATA_FILES['processed_data'], "处理后数据"),
+			(f"{os.path.splitext(DATA_FILES['processed_data'])[0]}.{PROCESSED_FORMAT}", "处理后数据（列式）"),
+			(DATA_FILES['weather_store'], "历史库"),
 		]
 
 		for filepath, description in files_to_check:
@@ -265,6 +527,22 @@ class WeatherProjectManager:
 		else:
 			print("✗ 可视化图表: 目录不存在")
 
+		print(f"✓ 历史库记录: 原始 {self.store.count()} 条, 已处理 {self.store.count('processed_records')} 条, "
+			  f"汇总 {self.store.count('weather_rollups')} 条, 最近抓取 {self.store.latest_crawl_time() or '无'}")
+
+		# 常驻模式最近一轮
+		if os.path.exists(DAEMON_STATUS_FILE):
+			try:
+				with open(DAEMON_STATUS_FILE, 'r', encoding='utf-8') as f:
+					status = json.load(f)
+				cycle = status.get('last_cycle', {})
+				stages = ', '.join(f"{stage} {elapsed:.2f}s" for stage, elapsed in cycle.get('stages', {}).items())
+				print(f"✓ 常驻模式: 进程 {status.get('pid')}, 已执行 {status.get('cycles')} 轮, "
+					  f"最近一轮 {cycle.get('started_at')} {'成功' if cycle.get('success') else '失败'} "
+					  f"耗时 {cycle.get('total', 0):.2f} 秒 ({stages}), 下一轮 {status.get('next_run')}")
+			except (OSError, ValueError) as e:
+				logger.error(f"读取常驻模式状态失败: {e}")
+
 
 def create_argument_parser():
 	"""创建命令行参数解析器"""
@@ -275,9 +553,15 @@ def create_argument_parser():
 使用示例:
   python main.py --full              # 执行完整流程
   python main.py --scrape           # 仅执行数据爬取
+  python main.py --cities           # 按城市目录爬取多个站点
   python main.py --process          # 仅执行数据处理
   python main.py --visualize        # 仅执行数据可视化
+  python main.py --process --since 2025-06-01 --until 2025-06-30  # 处理指定抓取时间范围
+  python main.py --process --rebuild  # 清空水位线，从头重新处理全部历史
+  python main.py --compact          # 按保留策略压缩历史库
   python main.py --status           # 查看项目状态
+  python main.py --daemon           # 常驻运行，按间隔循环执行完整流程
+  python main.py --daemon --interval 600 --cycles 3  # 每10分钟执行一次，共3轮
         """
 	)
 
@@ -285,18 +569,36 @@ def create_argument_parser():
 						help='执行完整流程（爬取→处理→可视化）')
 	parser.add_argument('--scrape', action='store_true',
 						help='仅执行数据爬取')
+	parser.add_argument('--cities', nargs='?', const=DATA_FILES['city_catalog'], metavar='CSV',
+						help='按城市目录（station_code 列）爬取多个站点，默认使用 data/cities.csv')
 	parser.add_argument('--process', action='store_true',
 						help='仅执行数据处理')
 	parser.add_argument('--visualize', action='store_true',
 						help='仅执行数据可视化')
+	parser.add_argument('--compact', action='store_true',
+						help='按保留策略压缩历史库（过期原始记录按天汇总，更早的按周汇总）')
 	parser.add_argument('--status', action='store_true',
 						help='查看项目状态')
+	parser.add_argument('--daemon', action='store_true',
+						help='常驻运行，保持连接和状态，按带抖动的间隔循环执行完整流程')
+	parser.add_argument('--interval', type=float, default=DAEMON_INTERVAL, metavar='SECONDS',
+						help=f'常驻模式的执行间隔（秒），默认 {DAEMON_INTERVAL}')
+	parser.add_argument('--cycles', type=int, metavar='N',
+						help='常驻模式执行 N 轮后退出，默认一直运行')
+	parser.add_argument('--since', metavar='DATE',
+						help='处理/可视化的起始抓取时间（YYYY-MM-DD[ HH:MM:SS]），默认最近一次抓取前 HISTORY_WINDOW_DAYS 天')
+	parser.add_argument('--until', metavar='DATE',
+						help='处理/可视化的结束抓取时间，只写日期时包含当天')
+	parser.add_argument('--rebuild', action='store_true',
+						help='清空处理结果和水位线，重新处理全部历史数据')
 
 	return parser
 
 
 def main():
 	"""主函数"""
+	setup_logging()
+
 	# 显示项目信息
 	print("🌤️  浦东新区天气预报数据采集与分析项目")
 	print("=" * 50)
@@ -308,21 +610,27 @@ def main():
 	args = parser.parse_args()
 
 	# 创建项目管理器实例
-	manager = WeatherProjectManager()
+	manager = WeatherProjectManager(daemon=args.daemon)
 
 	# 根据参数选择执行模式
-	if args.full:
-		manager.run_full_pipeline()
+	if args.daemon:
+		manager.run_daemon(args.interval, max_cycles=args.cycles)
+	elif args.full:
+		manager.run_full_pipeline(args.since, args.until, args.rebuild)
 	elif args.scrape:
 		manager.run_scraping()
+	elif args.cities:
+		manager.run_city_scraping(args.cities)
 	elif args.process:
-		manager.run_processing()
+		manager.run_processing(args.since, args.until, args.rebuild)
 	elif args.visualize:
-		manager.run_visualization()
+		manager.run_visualization(args.since, args.until)
+	elif args.compact:
+		manager.run_compaction()
 	elif args.status:
 		manager.show_status()
 	else:
-		print("❗ 请使用 --full, --scrape, --process, --visualize 或 --status 指定操作模式")
+		print("❗ 请使用 --full, --scrape, --cities, --process, --visualize, --compact, --status 或 --daemon 指定操作模式")
 		parser.print_help()
 
 	# 记录结束时间
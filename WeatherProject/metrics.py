@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+流程阶段指标模块
+
+记录每个阶段（scrape、parse、process、aggregate、save、render 等）的
+墙钟时间、CPU时间、峰值RSS、抓取字节数和输入/输出记录数。
+每个阶段结束时追加一行到 JSON-lines 文件，配置了 Prometheus textfile 时同时更新该文件。
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+	import resource
+except ImportError:  # Windows 没有 resource 模块，无法读取峰值RSS
+	resource = None
+
+from config import METRICS_ENABLED, METRICS_FILE, PROMETHEUS_TEXTFILE
+
+logger = logging.getLogger(__name__)
+
+# 输出到 Prometheus 的字段: (指标名, 说明)
+PROMETHEUS_METRICS = {
+	'wall_seconds': ('weather_stage_wall_seconds', '阶段墙钟耗时（秒）'),
+	'cpu_seconds': ('weather_stage_cpu_seconds', '阶段CPU耗时（秒，含已结束的子进程）'),
+	'peak_rss_bytes': ('weather_stage_peak_rss_bytes', '阶段内进程峰值RSS（字节）'),
+	'bytes_fetched': ('weather_stage_bytes_fetched', '阶段从网络获取的字节数'),
+	'records_in': ('weather_stage_records_in', '阶段输入记录数'),
+	'records_out': ('weather_stage_records_out', '阶段输出记录数'),
+	'success': ('weather_stage_success', '阶段是否成功（1/0）'),
+	'timestamp': ('weather_stage_last_run_timestamp_seconds', '阶段最近一次结束的Unix时间'),
+}
+
+
+def _reset_peak_rss():
+	"""重置进程的峰值RSS（VmHWM），仅Linux支持"""
+	try:
+		with open('/proc/self/clear_refs', 'w') as f:
+			f.write('5')
+		return True
+	except OSError:
+		return False
+
+
+def _peak_rss_bytes():
+	"""读取进程峰值RSS（字节），优先使用可重置的 VmHWM"""
+	try:
+		with open('/proc/self/status', 'r') as f:
+			for line in f:
+				if line.startswith('VmHWM:'):
+					return int(line.split()[1]) * 1024
+	except OSError:
+		pass
+
+	if resource is None:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _cpu_seconds():
+	"""当前进程及已结束子进程的CPU时间"""
+	times = os.times()
+	return times.user + times.system + times.children_user + times.children_system
+
+
+class PipelineMetrics:
+	"""收集一次运行中各阶段的指标，同一次运行的记录共享 run_id"""
+
+	def __init__(self, metrics_file=METRICS_FILE, prometheus_file=PROMETHEUS_TEXTFILE, enabled=METRICS_ENABLED):
+		self.metrics_file = metrics_file
+		self.prometheus_file = prometheus_file
+		self.enabled = enabled
+		self.stages = []
+		self._latest = {}
+		self.new_run()
+
+	def new_run(self):
+		"""开始新的一次运行（常驻模式每轮调用）"""
+		self.run_id = uuid.uuid4().hex[:12]
+		self.stages = []
+
+	@contextmanager
+	def stage(self, name, records_in=None):
+		"""
+		测量一个阶段，返回的字典中可设置 records_in、records_out、bytes_fetched。
+		峰值RSS在支持的系统上按阶段重置，否则为进程启动以来的峰值。
+		"""
+		record = {'records_in': records_in, 'records_out': None, 'bytes_fetched': None}
+		_reset_peak_rss()
+		wall_start = time.perf_counter()
+		cpu_start = _cpu_seconds()
+		success = False
+
+		try:
+			yield record
+			success = True
+		finally:
+			record.update({
+				'run_id': self.run_id,
+				'stage': name,
+				'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+				'timestamp': round(time.time(), 3),
+				'wall_seconds': round(time.perf_counter() - wall_start, 4),
+				'cpu_seconds': round(_cpu_seconds() - cpu_start, 4),
+				'peak_rss_bytes': _peak_rss_bytes(),
+				'success': success,
+			})
+			self.stages.append(record)
+			self._latest[name] = record
+			if self.enabled:
+				self._write_jsonl(record)
+				if self.prometheus_file:
+					self._write_prometheus()
+
+	def _write_jsonl(self, record):
+		"""追加一行指标记录"""
+		try:
+			os.makedirs(os.path.dirname(os.path.abspath(self.metrics_file)), exist_ok=True)
+			with open(self.metrics_file, 'a', encoding='utf-8') as f:
+				f.write(json.dumps(record, ensure_ascii=False) + '\n')
+		except OSError as e:
+			logger.error(f"写入指标文件失败: {e}")
+
+	def _write_prometheus(self):
+		"""原子写入 Prometheus textfile（供 node_exporter textfile collector 采集）"""
+		lines = []
+		for field, (metric, help_text) in PROMETHEUS_METRICS.items():
+			lines.append(f'# HELP {metric} {help_text}')
+			lines.append(f'# TYPE {metric} gauge')
+			for stage_name, record in self._latest.items():
+				value = record.get(field)
+				if value is not None:
+					lines.append(f'{metric}{{stage="{stage_name}"}} {float(value)}')
+
+		temp_file = self.prometheus_file + '.tmp'
+		try:
+			with open(temp_file, 'w', encoding='utf-8') as f:
+				f.write('\n'.join(lines) + '\n')
+			os.replace(temp_file, self.prometheus_file)
+		except OSError as e:
+			logger.error(f"写入Prometheus指标文件失败: {e}")
+
+	def summary(self):
+		"""返回本次运行各阶段指标的文本表格"""
+		if not self.stages:
+			return ''
+
+		lines = [f"{'阶段':<12}{'耗时(s)':>10}{'CPU(s)':>10}{'峰值RSS(MB)':>14}{'下载(KB)':>10}{'输入':>8}{'输出':>8}"]
+		for record in self.stages:
+			rss = record['peak_rss_bytes']
+			fetched = record['bytes_fetched']
+			lines.append(
+				f"{record['stage']:<12}{record['wall_seconds']:>10.3f}{record['cpu_seconds']:>10.3f}"
+				f"{(f'{rss / 1048576:.1f}' if rss else '-'):>14}"
+				f"{(f'{fetched / 1024:.1f}' if fetched is not None else '-'):>10}"
+				f"{(record['records_in'] if record['records_in'] is not None else '-'):>8}"
+				f"{(record['records_out'] if record['records_out'] is not None else '-'):>8}"
+			)
+		return '\n'.join(lines)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+流式记录写入模块
+
+每个数据源的记录解析后立即写出，不在内存中累积：
+字段不超出 SOURCE_SCHEMAS 声明的记录写入该来源的CSV（表头固定，无需预先扫描全部记录），
+其余记录（未声明的来源或字段有变化）写入NDJSON。每批写入后刷新到磁盘，
+进程中途退出时已写入的记录不会丢失。追加到历史库按 SINK_STORE_BATCH 条一批，内存占用有上限。
+"""
+
+import os
+import csv
+import json
+import logging
+from datetime import datetime
+
+from config import DATA_FILES, SOURCE_SCHEMAS, SINK_FSYNC, SINK_STORE_BATCH
+
+logger = logging.getLogger(__name__)
+
+
+class RecordSink:
+	"""按数据源流式写入记录，store 不为None时记录同时分批追加到历史库"""
+
+	def __init__(self, directory=None, run_name=None, schemas=None, store=None, fsync=SINK_FSYNC,
+				 store_batch=SINK_STORE_BATCH):
+		self.directory = directory or DATA_FILES['stream']
+		self.run_name = run_name or datetime.now().strftime('%Y%m%d_%H%M%S')
+		self.schemas = SOURCE_SCHEMAS if schemas is None else schemas
+		self.store = store
+		self.store_batch = store_batch
+		self.fsync = fsync
+		self._pending = []  # 等待追加到历史库的记录
+		self.records = 0
+		self.counts = {}  # {文件路径: 记录数}
+		self._csv_files = {}  # {来源: (文件, DictWriter)}
+		self._ndjson_file = None
+		os.makedirs(self.directory, exist_ok=True)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		self.close()
+
+	def _csv_writer(self, source_name):
+		"""获取来源对应的CSV写入器，新文件先写表头"""
+		if source_name not in self._csv_files:
+			path = os.path.join(self.directory, f'{self.run_name}_{source_name}.csv')
+			f = open(path, 'a', newline='', encoding='utf-8')
+			writer = csv.DictWriter(f, fieldnames=self.schemas[source_name])
+			if f.tell() == 0:
+				writer.writeheader()
+			self._csv_files[source_name] = (f, writer)
+		return self._csv_files[source_name]
+
+	def _ndjson(self):
+		"""获取NDJSON文件"""
+		if self._ndjson_file is None:
+			path = os.path.join(self.directory, f'{self.run_name}.ndjson')
+			self._ndjson_file = open(path, 'a', encoding='utf-8')
+		return self._ndjson_file
+
+	def _flush(self, f):
+		"""把缓冲区写入磁盘"""
+		f.flush()
+		if self.fsync:
+			os.fsync(f.fileno())
+
+	def write(self, source_name, records):
+		"""写入一个数据源的一批记录，返回写入条数"""
+		if not records:
+			return 0
+
+		schema = self.schemas.get(source_name)
+		fields = set(schema) if schema else set()
+		csv_rows = [record for record in records if schema and fields.issuperset(record)]
+		json_rows = [record for record in records if not (schema and fields.issuperset(record))]
+
+		try:
+			if csv_rows:
+				f, writer = self._csv_writer(source_name)
+				writer.writerows(csv_rows)
+				self._flush(f)
+				self.counts[f.name] = self.counts.get(f.name, 0) + len(csv_rows)
+
+			if json_rows:
+				f = self._ndjson()
+				f.write(''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n' for record in json_rows))
+				self._flush(f)
+				self.counts[f.name] = self.counts.get(f.name, 0) + len(json_rows)
+
+		except Exception as e:
+			logger.error(f"流式写入 {source_name} 的 {len(records)} 条记录失败: {e}")
+			return 0
+
+		self.records += len(records)
+		if self.store is not None:
+			self._pending.extend(records)
+			if len(self._pending) >= self.store_batch:
+				self.flush_store()
+		return len(records)
+
+	def flush_store(self):
+		"""把累积的记录追加到历史库"""
+		if self.store is None or not self._pending:
+			return
+		self.store.append(self._pending)
+		self._pending = []
+
+	def close(self):
+		"""追加剩余记录到历史库并关闭所有文件"""
+		self.flush_store()
+		for f, _ in self._csv_files.values():
+			f.close()
+		self._csv_files = {}
+		if self._ndjson_file is not None:
+			self._ndjson_file.close()
+			self._ndjson_file = None
+
+		if self.counts:
+			logger.info(f"流式写入完成，共 {self.records} 条记录: "
+						+ ', '.join(f"{os.path.basename(path)} ({count})" for path, count in self.counts.items()))
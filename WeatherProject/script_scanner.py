@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+内嵌脚本扫描模块
+
+单次扫描JavaScript源码，找出变量赋值的 {}/[] 字面量以及不含同类嵌套的叶子字面量，
+跳过字符串和注释。扫描用正则在C层跳过无关字符；赋值右值若是合法JSON，
+直接用 raw_decode 解码并跳过，再从解码结果中找叶子字面量。总耗时与脚本长度成线性关系。
+"""
+
+import re
+import json
+
+# 需要关注的字符：括号、字符串起始、注释起始
+_TOKEN_PATTERN = re.compile(r'[{}\[\]"\'`/]')
+
+# 各类字符串字面量（支持转义）
+_STRING_PATTERNS = {
+	'"': re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL),
+	"'": re.compile(r"'(?:[^'\\]|\\.)*'", re.DOTALL),
+	'`': re.compile(r'`(?:[^`\\]|\\.)*`', re.DOTALL),
+}
+
+_CLOSERS = {'}': '{', ']': '['}
+
+# 出现在 '=' 之前表示比较或复合赋值运算符
+_OPERATOR_CHARS = '=!<>+-*/%&|^?:'
+
+# 叶子字面量中表示天气数据的键
+TEMP_KEYS = ('temp', 'temperature')
+WEATHER_KEYS = ('weather', 'wea')
+_QUOTED_KEYS = tuple(f'"{key}"' for key in TEMP_KEYS + WEATHER_KEYS)
+
+_decoder = json.JSONDecoder()
+
+
+def _assignment_name(script, pos):
+	"""若 pos 处的括号是赋值语句的右值，返回变量名（取最后一段，如 window.a → a）"""
+	i = pos - 1
+	while i >= 0 and script[i].isspace():
+		i -= 1
+	if i < 0 or script[i] != '=':
+		return None
+	if i > 0 and script[i - 1] in _OPERATOR_CHARS:
+		return None
+
+	i -= 1
+	while i >= 0 and script[i].isspace():
+		i -= 1
+	end = i + 1
+	while i >= 0 and (script[i].isalnum() or script[i] in '_$.'):
+		i -= 1
+
+	name = script[i + 1:end].rsplit('.', 1)[-1]
+	return name or None
+
+
+def scan_script(script):
+	"""
+	扫描脚本，返回（字面量均已解码）:
+	  variables: {变量名: 值}，同名变量只保留第一次赋值
+	  temp_objects: 不含嵌套 {} 且包含温度键的对象
+	  temp_arrays: 不含嵌套 [] 且包含温度键的数组
+	  weather_objects: 不含嵌套 {} 且包含天气键的对象
+	"""
+	result = {'variables': {}, 'temp_objects': [], 'temp_arrays': [], 'weather_objects': []}
+	if not script:
+		return result
+
+	length = len(script)
+	# 帧: [括号, 起始位置, 是否叶子, 变量名]
+	stack = []
+	open_frames = {'{': [], '[': []}
+	pos = 0
+
+	while True:
+		match = _TOKEN_PATTERN.search(script, pos)
+		if not match:
+			break
+
+		i = match.start()
+		char = script[i]
+		pos = i + 1
+
+		if char in _STRING_PATTERNS:
+			string_match = _STRING_PATTERNS[char].match(script, i)
+			if not string_match:
+				break  # 未闭合的字符串，后面无法可靠解析
+			pos = string_match.end()
+
+		elif char == '/':
+			next_char = script[i + 1:i + 2]
+			if next_char == '/':
+				end = script.find('\n', i)
+				pos = length if end < 0 else end + 1
+			elif next_char == '*':
+				end = script.find('*/', i + 2)
+				pos = length if end < 0 else end + 2
+
+		elif char in open_frames:
+			name = _assignment_name(script, i)
+			if name:
+				try:
+					value, end = _decoder.raw_decode(script, i)
+				except ValueError:
+					value = None
+				else:
+					# 合法JSON：整体解码后跳过
+					if name not in result['variables']:
+						result['variables'][name] = value
+					has_object, has_array, _, _ = _collect_leaves(value, result)
+					if has_object and open_frames['{']:
+						open_frames['{'][-1][2] = False
+					if has_array and open_frames['[']:
+						open_frames['['][-1][2] = False
+					pos = end
+					continue
+
+			same_kind = open_frames[char]
+			if same_kind:
+				same_kind[-1][2] = False
+			frame = [char, i, True, name]
+			stack.append(frame)
+			same_kind.append(frame)
+
+		else:
+			kind = _CLOSERS[char]
+			if not open_frames[kind]:
+				continue  # 多余的右括号
+			# 括号不匹配时丢弃中间未闭合的帧
+			while stack[-1][0] != kind:
+				open_frames[stack.pop()[0]].pop()
+			frame = stack.pop()
+			open_frames[kind].pop()
+			_emit(result, frame, script[frame[1]:i + 1])
+
+	return result
+
+
+def _emit(result, frame, literal):
+	"""把扫描到的字面量解码后分发到对应的结果列表"""
+	kind, _, is_leaf, name = frame
+	if not name and (not is_leaf or not any(key in literal for key in _QUOTED_KEYS)):
+		return
+
+	try:
+		value = json.loads(literal)
+	except ValueError:
+		return
+
+	if name and name not in result['variables']:
+		result['variables'][name] = value
+
+	if is_leaf:
+		_, _, has_temp, has_weather = _collect_leaves(value, None)
+		if kind == '{':
+			if has_temp:
+				result['temp_objects'].append(value)
+			if has_weather:
+				result['weather_objects'].append(value)
+		elif has_temp:
+			result['temp_arrays'].append(value)
+
+
+def _collect_leaves(value, result):
+	"""
+	遍历已解码的值，返回 (含对象, 含数组, 含温度键, 含天气键)。
+	result 不为None时，把其中的叶子对象/数组按出现顺序加入结果。
+	"""
+	is_object = isinstance(value, dict)
+	has_object = has_array = has_temp = has_weather = False
+
+	if is_object:
+		for key in value:
+			has_temp = has_temp or key in TEMP_KEYS
+			has_weather = has_weather or key in WEATHER_KEYS
+		children = value.values()
+	else:
+		children = value
+
+	for child in children:
+		if isinstance(child, str):
+			has_temp = has_temp or child in TEMP_KEYS
+			has_weather = has_weather or child in WEATHER_KEYS
+		elif isinstance(child, (dict, list)):
+			child_object, child_array, child_temp, child_weather = _collect_leaves(child, result)
+			has_object = has_object or child_object
+			has_array = has_array or child_array
+			has_temp = has_temp or child_temp
+			has_weather = has_weather or child_weather
+
+	if is_object:
+		if result is not None and not has_object:
+			if has_temp:
+				result['temp_objects'].append(value)
+			if has_weather:
+				result['weather_objects'].append(value)
+		return True, has_array, has_temp, has_weather
+
+	if result is not None and not has_array and has_temp:
+		result['temp_arrays'].append(value)
+	return has_object, True, has_temp, has_weather
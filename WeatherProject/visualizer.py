@@ -4,21 +4,125 @@
 """
 
 import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
 import json
 import numpy as np
 from datetime import datetime
 import os
+import time
+import hashlib
+import tempfile
 import logging
-from config import DATA_FILES
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from data_processor import WeatherDataProcessor
+from weather_store import WeatherStore
+from config import (DATA_FILES, HISTORY_WINDOW_DAYS, PARALLEL_RENDER, RENDER_WORKERS, CHART_DPI, CHART_CACHE_ENABLED,
+					CHART_CACHE_FILE, TREND_DOWNSAMPLE, TREND_MAX_POINTS, ensure_directories)
+from downsampling import downsample_indices, envelope
+
+try:
+	import pyarrow.feather as feather
+	import pyarrow.parquet as parquet
+except ImportError:  # 未安装pyarrow时只能串行生成图表，也无法读取列式处理结果
+	feather = None
+	parquet = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 图表绘制所需的列，只把这些列写入共享文件
+TEMP_COLUMNS = ['temp_high_cleaned', 'temp_low_cleaned']
+TREND_COLUMNS = ['parsed_date'] + TEMP_COLUMNS
+WEATHER_COLUMNS = ['weather', 'weather_description']
+CHART_COLUMNS = TREND_COLUMNS + WEATHER_COLUMNS
+
+# 图表样式，改变时所有图表的缓存失效
+CHART_STYLE = {
+	'style': 'seaborn-v0_8',
+	'palette': 'husl',
+	'font': ['SimHei'],
+	'dpi': CHART_DPI,
+	'downsample': TREND_DOWNSAMPLE,
+	'max_points': TREND_MAX_POINTS,
+}
+
+# 绘图代码改变时递增，使已有缓存失效
+CHART_CACHE_VERSION = 1
+
+# 渲染进程内复用的可视化实例
+_worker_visualizer = None
+
+# 当前进程是否已应用图表样式
+_style_applied = False
+
+
+def apply_chart_style():
+	"""应用图表样式和中文字体，每个进程只执行一次（在第一次绘图前调用）"""
+	global _style_applied
+	if _style_applied:
+		return
+
+	# --- 关键改动：确保字体设置在样式设置之后 ---
+	import seaborn as sns  # 只用于设置调色板，不需要可视化的子命令不导入
+
+	# 1. 首先，应用样式
+	plt.style.use(CHART_STYLE['style'])
+	sns.set_palette(CHART_STYLE['palette'])
+
+	# 2. 然后，再设置中文字体，这样它就不会被覆盖
+	plt.rcParams['font.sans-serif'] = CHART_STYLE['font']  # 'SimHei' 是黑体
+	plt.rcParams['axes.unicode_minus'] = False  # 解决负号 '-' 显示为方块的问题
+	_style_applied = True
+
+
+def render_chart(chart_name, data_path, stats):
+	"""在渲染进程中生成单个图表，数据从内存映射的Feather文件读取，返回 (图表名, 是否成功, 耗时, 错误信息)"""
+	global _worker_visualizer
+	start_time = time.perf_counter()
+
+	try:
+		if _worker_visualizer is None:
+			plt.switch_backend('Agg')
+			_worker_visualizer = WeatherVisualizer()
+
+		df = feather.read_table(data_path, memory_map=True).to_pandas()
+		success = _worker_visualizer.render(chart_name, df, stats)
+		error = None
+	except Exception as e:
+		success, error = False, str(e)
+	finally:
+		plt.close('all')
+
+	return chart_name, success, time.perf_counter() - start_time, error
+
 
 class WeatherVisualizer:
-	def __init__(self):
+	# 图表名称、绘制方法、所需参数（df/stats）、输出文件，以及指纹覆盖的数据列和统计项。
+	# values 中的列全为空的行不会出现在图上，计算指纹时忽略。
+	# 按耗时从高到低排列，便于并行时先提交慢的图表
+	CHARTS = [
+		{'name': '综合仪表盘', 'method': 'create_dashboard', 'params': ('df', 'stats'), 'file': 'weather_dashboard.png',
+		 'columns': CHART_COLUMNS, 'values': TEMP_COLUMNS + WEATHER_COLUMNS,
+		 'stats': ('total_records', 'data_sources', 'temperature')},
+		{'name': '温度趋势图', 'method': 'plot_temperature_trend', 'params': ('df',), 'file': 'temperature_trend.png',
+		 'columns': TREND_COLUMNS, 'values': TEMP_COLUMNS, 'stats': ()},
+		{'name': '温度统计图', 'method': 'plot_temperature_statistics', 'params': ('stats',),
+		 'file': 'temperature_statistics.png', 'columns': [], 'values': [], 'stats': ('temperature',)},
+		{'name': '天气分布图', 'method': 'plot_weather_distribution', 'params': ('df',), 'file': 'weather_distribution.png',
+		 'columns': WEATHER_COLUMNS, 'values': WEATHER_COLUMNS, 'stats': ()},
+		{'name': '数据来源统计', 'method': 'plot_data_sources', 'params': ('stats',), 'file': 'data_sources.png',
+		 'columns': [], 'values': [], 'stats': ('data_sources',)},
+	]
+
+	# 输出顺序
+	CHART_ORDER = ['温度趋势图', '天气分布图', '数据来源统计', '温度统计图', '综合仪表盘']
+
+	def __init__(self, store=None, keep_pool=False):
+		"""keep_pool 为True时渲染进程池在多次生成之间复用（常驻模式），用完需调用 close"""
+		self.store = store
+		self.keep_pool = keep_pool
+		self._executor = None
+		self.records_loaded = 0  # 最近一次生成图表时加载的记录数
 		self.colors = {
 			'primary': '#2E86AB',
 			'secondary': '#A23B72',
@@ -28,24 +132,23 @@ class WeatherVisualizer:
 			'dark': '#2D3748'
 		}
 
-		# --- 关键改动：确保字体设置在样式设置之后 ---
-		# 1. 首先，应用样式
-		plt.style.use('seaborn-v0_8')
-		sns.set_palette("husl")
-
-		# 2. 然后，再设置中文字体，这样它就不会被覆盖
-		plt.rcParams['font.sans-serif'] = ['SimHei']  # 'SimHei' 是黑体
-		plt.rcParams['axes.unicode_minus'] = False  # 解决负号 '-' 显示为方块的问题
-
 	def load_processed_data(self, filename=None):
-		"""加载处理后的数据"""
+		"""加载处理后的数据：列式数据文件以内存映射方式读取，旧格式从JSON中解析"""
 		filename = filename or DATA_FILES['processed_data']
 		try:
 			with open(filename, 'r', encoding='utf-8') as f:
 				data = json.load(f)
 
-			df = pd.DataFrame(data.get('processed_data', []))
 			stats = data.get('statistics', {})
+			data_file = data.get('data_file')
+			if data_file:
+				path = os.path.join(os.path.dirname(os.path.abspath(filename)), data_file)
+				if data.get('format') == 'parquet':
+					df = parquet.read_table(path, memory_map=True).to_pandas()
+				else:
+					df = feather.read_table(path, memory_map=True).to_pandas()
+			else:
+				df = pd.DataFrame(data.get('processed_data', []))
 
 			logger.info(f"成功加载可视化数据: {len(df)} 条记录")
 			return df, stats
@@ -54,8 +157,52 @@ class WeatherVisualizer:
 			logger.error(f"加载数据失败: {e}")
 			return pd.DataFrame(), {}
 
+	def close(self):
+		"""关闭复用的渲染进程池"""
+		if self._executor is not None:
+			self._executor.shutdown()
+			self._executor = None
+
+	def get_store(self):
+		"""获取历史库，首次使用时才连接"""
+		if self.store is None:
+			self.store = WeatherStore()
+		return self.store
+
+	def load_store_data(self, start=None, end=None):
+		"""从历史库按抓取时间范围加载处理后的数据，统计信息按该范围重新计算"""
+		store = self.get_store()
+		start = start or store.default_start(HISTORY_WINDOW_DAYS)
+		df = store.query_processed(start, end)
+		stats = WeatherDataProcessor().aggregate_data(df)
+
+		logger.info(f"成功从历史库加载可视化数据: {len(df)} 条记录")
+		return df, stats
+
+	@staticmethod
+	def _downsample(x, y):
+		"""点数超过 TREND_MAX_POINTS 时降采样温度曲线（x需已升序且无空值），保留极值"""
+		if not TREND_DOWNSAMPLE or len(y) <= TREND_MAX_POINTS:
+			return x, y
+		index = downsample_indices(x.to_numpy(), y.to_numpy(), TREND_MAX_POINTS, TREND_DOWNSAMPLE)
+		logger.debug(f"温度曲线降采样: {len(y)} -> {len(index)} 个点")
+		return x.iloc[index], y.iloc[index]
+
+	@staticmethod
+	def _band(x, low, high):
+		"""点数过多时把高低温填充带压缩为按像素列的包络"""
+		if not TREND_DOWNSAMPLE or len(x) <= TREND_MAX_POINTS:
+			return x, low, high
+		return envelope(x.to_numpy(), low.to_numpy(), high.to_numpy(), TREND_MAX_POINTS // 2)
+
+	@staticmethod
+	def _trend_frame(df):
+		"""温度趋势图用到的列（日期和清理后的温度），其余列不复制"""
+		return pd.DataFrame({col: df[col] for col in TREND_COLUMNS if col in df.columns}, copy=False)
+
 	def plot_temperature_trend(self, df, save_path=None):
 		"""绘制温度趋势图"""
+		apply_chart_style()
 		if df.empty:
 			logger.warning("没有数据可绘制温度趋势")
 			return None
@@ -63,8 +210,8 @@ class WeatherVisualizer:
 		try:
 			fig, ax = plt.subplots(figsize=(12, 6))
 
-			# 准备数据
-			df_plot = df.copy()
+			# 准备数据：只取绘图用到的列
+			df_plot = self._trend_frame(df)
 			if 'parsed_date' in df_plot.columns:
 				df_plot['parsed_date'] = pd.to_datetime(df_plot['parsed_date'], errors='coerce')
 				df_plot = df_plot.sort_values('parsed_date').dropna(subset=['parsed_date'])
@@ -73,22 +220,22 @@ class WeatherVisualizer:
 			if 'temp_high_cleaned' in df_plot.columns:
 				high_temps = df_plot.dropna(subset=['temp_high_cleaned'])
 				if not high_temps.empty:
-					ax.plot(high_temps['parsed_date'], high_temps['temp_high_cleaned'],
+					ax.plot(*self._downsample(high_temps['parsed_date'], high_temps['temp_high_cleaned']),
 							marker='o', linewidth=2, label='最高温度', color=self.colors['info'])
 
 			if 'temp_low_cleaned' in df_plot.columns:
 				low_temps = df_plot.dropna(subset=['temp_low_cleaned'])
 				if not low_temps.empty:
-					ax.plot(low_temps['parsed_date'], low_temps['temp_low_cleaned'],
+					ax.plot(*self._downsample(low_temps['parsed_date'], low_temps['temp_low_cleaned']),
 							marker='s', linewidth=2, label='最低温度', color=self.colors['primary'])
 
 			# 填充区域
 			if 'temp_high_cleaned' in df_plot.columns and 'temp_low_cleaned' in df_plot.columns:
 				temp_data = df_plot.dropna(subset=['temp_high_cleaned', 'temp_low_cleaned'])
 				if not temp_data.empty:
-					ax.fill_between(temp_data['parsed_date'],
-									temp_data['temp_low_cleaned'],
-									temp_data['temp_high_cleaned'],
+					ax.fill_between(*self._band(temp_data['parsed_date'],
+												temp_data['temp_low_cleaned'],
+												temp_data['temp_high_cleaned']),
 									alpha=0.3, color=self.colors['secondary'])
 
 			# 设置图表样式
@@ -106,7 +253,7 @@ class WeatherVisualizer:
 			if save_path is None:
 				save_path = os.path.join(DATA_FILES['charts'], 'temperature_trend.png')
 
-			plt.savefig(save_path, dpi=300, bbox_inches='tight')
+			plt.savefig(save_path, dpi=CHART_STYLE['dpi'], bbox_inches='tight')
 			logger.info(f"温度趋势图已保存: {save_path}")
 
 			return fig
@@ -117,6 +264,7 @@ class WeatherVisualizer:
 
 	def plot_weather_distribution(self, df, save_path=None):
 		"""绘制天气状况分布饼图"""
+		apply_chart_style()
 		if df.empty:
 			logger.warning("没有数据可绘制天气分布")
 			return None
@@ -153,7 +301,7 @@ class WeatherVisualizer:
 					if save_path is None:
 						save_path = os.path.join(DATA_FILES['charts'], 'weather_distribution.png')
 
-					plt.savefig(save_path, dpi=300, bbox_inches='tight')
+					plt.savefig(save_path, dpi=CHART_STYLE['dpi'], bbox_inches='tight')
 					logger.info(f"天气分布图已保存: {save_path}")
 
 					return fig
@@ -167,6 +315,7 @@ class WeatherVisualizer:
 
 	def plot_data_sources(self, stats, save_path=None):
 		"""绘制数据来源统计图"""
+		apply_chart_style()
 		try:
 			data_sources = stats.get('data_sources', {})
 			if not data_sources:
@@ -199,7 +348,7 @@ class WeatherVisualizer:
 			if save_path is None:
 				save_path = os.path.join(DATA_FILES['charts'], 'data_sources.png')
 
-			plt.savefig(save_path, dpi=300, bbox_inches='tight')
+			plt.savefig(save_path, dpi=CHART_STYLE['dpi'], bbox_inches='tight')
 			logger.info(f"数据来源统计图已保存: {save_path}")
 
 			return fig
@@ -210,6 +359,7 @@ class WeatherVisualizer:
 
 	def plot_temperature_statistics(self, stats, save_path=None):
 		"""绘制温度统计图"""
+		apply_chart_style()
 		try:
 			temp_stats = {}
 			for key, value in stats.items():
@@ -263,7 +413,7 @@ class WeatherVisualizer:
 			if save_path is None:
 				save_path = os.path.join(DATA_FILES['charts'], 'temperature_statistics.png')
 
-			plt.savefig(save_path, dpi=300, bbox_inches='tight')
+			plt.savefig(save_path, dpi=CHART_STYLE['dpi'], bbox_inches='tight')
 			logger.info(f"温度统计图已保存: {save_path}")
 
 			return fig
@@ -274,6 +424,7 @@ class WeatherVisualizer:
 
 	def create_dashboard(self, df, stats):
 		"""创建综合仪表盘"""
+		apply_chart_style()
 		try:
 			fig = plt.figure(figsize=(20, 12))
 
@@ -305,7 +456,7 @@ class WeatherVisualizer:
 
 			# 保存图片
 			save_path = os.path.join(DATA_FILES['charts'], 'weather_dashboard.png')
-			plt.savefig(save_path, dpi=300, bbox_inches='tight')
+			plt.savefig(save_path, dpi=CHART_STYLE['dpi'], bbox_inches='tight')
 			logger.info(f"综合仪表盘已保存: {save_path}")
 
 			return fig
@@ -317,16 +468,16 @@ class WeatherVisualizer:
 	def _plot_temp_trend_subplot(self, df, ax):
 		"""绘制温度趋势子图"""
 		if 'parsed_date' in df.columns and 'temp_high_cleaned' in df.columns:
-			df_plot = df.dropna(subset=['parsed_date', 'temp_high_cleaned'])
+			df_plot = self._trend_frame(df).dropna(subset=['parsed_date', 'temp_high_cleaned'])
 			df_plot['parsed_date'] = pd.to_datetime(df_plot['parsed_date'])
 			df_plot = df_plot.sort_values('parsed_date')
 
-			ax.plot(df_plot['parsed_date'], df_plot['temp_high_cleaned'],
+			ax.plot(*self._downsample(df_plot['parsed_date'], df_plot['temp_high_cleaned']),
 					marker='o', label='最高温度', color=self.colors['info'])
 
 			if 'temp_low_cleaned' in df.columns:
 				df_low = df_plot.dropna(subset=['temp_low_cleaned'])
-				ax.plot(df_low['parsed_date'], df_low['temp_low_cleaned'],
+				ax.plot(*self._downsample(df_low['parsed_date'], df_low['temp_low_cleaned']),
 						marker='s', label='最低温度', color=self.colors['primary'])
 
 		ax.set_title('温度趋势', fontweight='bold')
@@ -395,49 +546,199 @@ class WeatherVisualizer:
 		ax.text(0.1, 0.5, info_text, fontsize=12, verticalalignment='center',
 				bbox=dict(boxstyle="round,pad=0.3", facecolor=self.colors['light']))
 
-	def generate_all_charts(self):
-		"""生成所有图表"""
+	def _get_chart(self, chart_name):
+		"""按名称查找图表定义"""
+		for chart in self.CHARTS:
+			if chart['name'] == chart_name:
+				return chart
+		raise ValueError(f"未知的图表: {chart_name}")
+
+	def render(self, chart_name, df, stats):
+		"""生成单个图表，返回是否成功"""
+		chart = self._get_chart(chart_name)
+		args = [df if param == 'df' else stats for param in chart['params']]
+		return bool(getattr(self, chart['method'])(*args))
+
+	@staticmethod
+	def _stats_slice(stats, keys):
+		"""取出图表用到的统计项，'temperature' 表示所有温度统计"""
+		selected = {}
+		for key in keys:
+			if key == 'temperature':
+				selected.update({name: value for name, value in stats.items() if 'temp' in name and 'stats' in name})
+			elif key in stats:
+				selected[key] = stats[key]
+		return selected
+
+	def chart_fingerprint(self, chart, df, stats):
+		"""根据图表的输入数据、统计项和样式参数计算指纹"""
+		digest = hashlib.sha256()
+		header = {
+			'chart': chart['name'],
+			'version': CHART_CACHE_VERSION,
+			'style': CHART_STYLE,
+			'colors': self.colors,
+			'stats': self._stats_slice(stats, chart['stats'])
+		}
+		digest.update(json.dumps(header, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+
+		columns = [col for col in chart['columns'] if col in df.columns]
+		if columns:
+			frame = df[columns]
+			values = [col for col in chart['values'] if col in columns]
+			if values:
+				frame = frame[frame[values].notnull().any(axis=1)]
+			digest.update(json.dumps([columns, [str(dtype) for dtype in frame.dtypes]]).encode('utf-8'))
+			digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+
+		return digest.hexdigest()
+
+	@staticmethod
+	def load_render_cache(filename=None):
+		"""读取图表指纹缓存 {文件名: 指纹}"""
+		filename = filename or CHART_CACHE_FILE
+		try:
+			with open(filename, 'r', encoding='utf-8') as f:
+				return json.load(f)
+		except (FileNotFoundError, json.JSONDecodeError):
+			return {}
+
+	@staticmethod
+	def save_render_cache(cache, filename=None):
+		"""保存图表指纹缓存"""
+		filename = filename or CHART_CACHE_FILE
+		tmp_path = filename + '.tmp'
+		try:
+			with open(tmp_path, 'w', encoding='utf-8') as f:
+				json.dump(cache, f, ensure_ascii=False, indent=2)
+			os.replace(tmp_path, filename)
+		except Exception as e:
+			logger.warning(f"保存图表缓存失败: {e}")
+
+	def _render_serial(self, df, stats, chart_names):
+		"""在当前进程中依次生成图表"""
+		results = []
+		for chart_name in chart_names:
+			start_time = time.perf_counter()
+			try:
+				success, error = self.render(chart_name, df, stats), None
+			except Exception as e:
+				success, error = False, str(e)
+			results.append((chart_name, success, time.perf_counter() - start_time, error))
+
+		plt.close('all')  # 关闭所有图表，释放内存
+		return results
+
+	@staticmethod
+	def _write_shared_frame(df):
+		"""把绘图所需的列写入未压缩的Feather文件，供渲染进程内存映射读取"""
+		frame = df[[col for col in CHART_COLUMNS if col in df.columns]].copy()
+		for col in frame.columns:
+			# 混合类型的列无法直接转换为Arrow，统一转为字符串
+			if frame[col].dtype == object and pd.api.types.infer_dtype(frame[col], skipna=True) not in ('string', 'empty'):
+				frame[col] = frame[col].map(lambda value: value if pd.isnull(value) else str(value))
+
+		fd, path = tempfile.mkstemp(suffix='.feather')
+		os.close(fd)
+		feather.write_feather(frame.reset_index(drop=True), path, compression='uncompressed')
+		return path
+
+	def _render_parallel(self, df, stats, chart_names, workers=None):
+		"""每个图表在独立进程中用Agg后端生成"""
+		data_path = self._write_shared_frame(df)
+		results = []
+
+		if self.keep_pool:
+			# 常驻进程池按全部图表数创建，工作进程保留已初始化的绘图环境
+			if self._executor is None:
+				self._executor = ProcessPoolExecutor(max_workers=workers or min(len(self.CHARTS), os.cpu_count() or 1))
+			executor = self._executor
+		else:
+			executor = ProcessPoolExecutor(max_workers=workers or min(len(chart_names), os.cpu_count() or 1))
+
+		try:
+			# 按 CHARTS 的顺序提交，慢的图表先开始
+			futures = [executor.submit(render_chart, chart['name'], data_path, stats)
+					   for chart in self.CHARTS if chart['name'] in chart_names]
+			for future in as_completed(futures):
+				results.append(future.result())
+		finally:
+			if not self.keep_pool:
+				executor.shutdown()
+			os.remove(data_path)
+
+		results.sort(key=lambda result: self.CHART_ORDER.index(result[0]))
+		return results
+
+	def generate_all_charts(self, start=None, end=None, parallel=PARALLEL_RENDER, use_cache=CHART_CACHE_ENABLED):
+		"""
+		生成所有图表，历史库中有处理结果时按时间范围查询，否则读取JSON。
+		parallel 为True时每个图表在独立进程中生成（需要pyarrow）；
+		use_cache 为True时跳过输入数据和样式都未变化的图表。
+		"""
 		print("开始生成天气数据可视化图表...")
 
 		# 加载数据
-		df, stats = self.load_processed_data()
+		if self.get_store().count('processed_records') > 0:
+			df, stats = self.load_store_data(start, end)
+		else:
+			df, stats = self.load_processed_data()
 
+		self.records_loaded = len(df)
 		if df.empty:
 			print("没有找到可视化数据，请先运行数据处理")
 			return
 
-		charts_generated = []
-
-		# 生成各种图表
-		charts = [
-			('温度趋势图', self.plot_temperature_trend),
-			('天气分布图', self.plot_weather_distribution),
-			('数据来源统计', self.plot_data_sources),
-			('温度统计图', self.plot_temperature_statistics),
-			('综合仪表盘', self.create_dashboard)
-		]
-
-		for chart_name, chart_func in charts:
-			try:
-				if chart_name == '综合仪表盘':
-					result = chart_func(df, stats)
-				elif chart_name in ['数据来源统计', '温度统计图']:
-					result = chart_func(stats)
-				else:
-					result = chart_func(df)
-
-				if result:
-					charts_generated.append(chart_name)
-					print(f"✓ {chart_name} 生成成功")
-				else:
-					print(f"✗ {chart_name} 生成失败")
-
-			except Exception as e:
-				print(f"✗ {chart_name} 生成失败: {e}")
-
-		plt.close('all')  # 关闭所有图表，释放内存
-
-		print(f"\n图表生成完成! 共生成 {len(charts_generated)} 个图表")
+		if parallel and feather is None:
+			logger.warning("未安装pyarrow，改为串行生成图表")
+			parallel = False
+
+		# 比较指纹，输入和样式都未变化且文件存在的图表直接复用
+		cache = self.load_render_cache() if use_cache else {}
+		fingerprints = {chart['name']: self.chart_fingerprint(chart, df, stats) for chart in self.CHARTS}
+		stale, reused = [], []
+		for chart_name in self.CHART_ORDER:
+			chart_file = self._get_chart(chart_name)['file']
+			unchanged = cache.get(chart_file) == fingerprints[chart_name]
+			if unchanged and os.path.exists(os.path.join(DATA_FILES['charts'], chart_file)):
+				reused.append(chart_name)
+			else:
+				stale.append(chart_name)
+
+		start_time = time.perf_counter()
+		if not stale:
+			results = []
+		elif parallel and len(stale) > 1:
+			results = self._render_parallel(df, stats, stale, RENDER_WORKERS)
+		else:
+			results = self._render_serial(df, stats, stale)
+		total_time = time.perf_counter() - start_time
+
+		rendered = {}
+		for chart_name, success, elapsed, error in results:
+			if success:
+				rendered[chart_name] = elapsed
+				cache[self._get_chart(chart_name)['file']] = fingerprints[chart_name]
+			elif error:
+				print(f"✗ {chart_name} 生成失败: {error}")
+			else:
+				print(f"✗ {chart_name} 生成失败")
+
+		for chart_name in self.CHART_ORDER:
+			if chart_name in reused:
+				print(f"♻ {chart_name} 数据未变化，复用已有图表")
+			elif chart_name in rendered:
+				print(f"✓ {chart_name} 生成成功 ({rendered[chart_name]:.2f} 秒)")
+
+		if use_cache and rendered:
+			self.save_render_cache(cache)
+
+		charts_generated = [name for name in self.CHART_ORDER if name in rendered or name in reused]
+		print(f"\n图表生成完成! 重新生成 {len(rendered)} 个, 复用 {len(reused)} 个")
+		if results:
+			slowest = max(elapsed for _, _, elapsed, _ in results)
+			mode = '并行' if parallel and len(stale) > 1 else '串行'
+			print(f"总耗时 {total_time:.2f} 秒，最慢的单个图表 {slowest:.2f} 秒 ({mode})")
 		print(f"图表保存位置: {DATA_FILES['charts']}")
 
 		return charts_generated
@@ -445,6 +746,7 @@ class WeatherVisualizer:
 
 def main():
 	"""主函数"""
+	ensure_directories()
 	visualizer = WeatherVisualizer()
 	visualizer.generate_all_charts()
 
@@ -0,0 +1,500 @@
+# -*- coding: utf-8 -*-
+"""
+天气历史数据存储模块
+
+原始数据只追加不覆盖，保存在SQLite中，按 (站点, 数据源, 预报日期, 抓取时间) 建立索引；
+处理结果按原始记录ID单独保存。处理和可视化按时间范围查询，无需加载全部历史。
+增量处理的水位线（已处理的最大记录ID）和累计统计保存在 processing_state 表中。
+
+历史按类似RRD的方式分层保留：最近 RETENTION_RAW_DAYS 天保留原始记录，更早的已处理记录
+按 (抓取日期, 站点, 数据源) 汇总为每天的 最小/均值/最大 温度，RETENTION_DAILY_DAYS 天之前的
+日汇总再合并为按周汇总。每个时间段只存在于一个层级，按抓取时间查询时各层结果直接合并。
+"""
+
+import os
+import json
+import math
+import sqlite3
+import logging
+from datetime import datetime, date, timedelta
+
+from config import DATA_FILES, DEFAULT_STATION_CODE, RETENTION_RAW_DAYS, RETENTION_DAILY_DAYS
+
+logger = logging.getLogger(__name__)
+
+# 原始数据的固定列，其余字段以JSON保存在 extra 列
+RAW_COLUMNS = ['station_code', 'city_name', 'source', 'date', 'forecast_date', 'crawl_time',
+			   'weather', 'temp_high', 'temp_low', 'temperature', 'wind', 'content']
+
+# 处理结果列
+PROCESSED_COLUMNS = ['parsed_date', 'temp_high_cleaned', 'temp_low_cleaned', 'temperature_cleaned',
+					 'weather_condition', 'weather_description', 'processed_time']
+
+# 可用于范围查询的时间字段
+TIME_FIELDS = ('crawl_time', 'forecast_date')
+
+# 汇总表按 数量/总和/最小值/最大值 保存的温度（对应处理结果中的 *_cleaned 列），合并时均值不失真
+ROLLUP_MEASURES = ['temp_high', 'temp_low', 'temperature']
+ROLLUP_FIELDS = ('count', 'sum', 'min', 'max')
+ROLLUP_KEY = ['tier', 'period_start', 'station_code', 'source']
+ROLLUP_COLUMNS = (ROLLUP_KEY[:2] + ['period_end'] + ROLLUP_KEY[2:] + ['samples']
+				  + [f'{measure}_{field}' for measure in ROLLUP_MEASURES for field in ROLLUP_FIELDS])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weather_records (
+	id INTEGER PRIMARY KEY,
+	station_code TEXT NOT NULL,
+	city_name TEXT,
+	source TEXT NOT NULL,
+	date TEXT,
+	forecast_date TEXT,
+	crawl_time TEXT NOT NULL,
+	weather TEXT,
+	temp_high,
+	temp_low,
+	temperature,
+	wind TEXT,
+	content TEXT,
+	extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_records_key ON weather_records (station_code, source, forecast_date, crawl_time);
+CREATE INDEX IF NOT EXISTS idx_records_crawl_time ON weather_records (crawl_time);
+CREATE INDEX IF NOT EXISTS idx_records_forecast_date ON weather_records (forecast_date);
+
+CREATE TABLE IF NOT EXISTS processed_records (
+	record_id INTEGER PRIMARY KEY REFERENCES weather_records (id),
+	parsed_date TEXT,
+	temp_high_cleaned REAL,
+	temp_low_cleaned REAL,
+	temperature_cleaned REAL,
+	weather_condition TEXT,
+	weather_description TEXT,
+	processed_time TEXT
+);
+
+CREATE TABLE IF NOT EXISTS weather_rollups (
+	tier TEXT NOT NULL,
+	period_start TEXT NOT NULL,
+	period_end TEXT NOT NULL,
+	station_code TEXT NOT NULL,
+	source TEXT NOT NULL,
+	samples INTEGER NOT NULL,
+	temp_high_count INTEGER,
+	temp_high_sum REAL,
+	temp_high_min REAL,
+	temp_high_max REAL,
+	temp_low_count INTEGER,
+	temp_low_sum REAL,
+	temp_low_min REAL,
+	temp_low_max REAL,
+	temperature_count INTEGER,
+	temperature_sum REAL,
+	temperature_min REAL,
+	temperature_max REAL,
+	PRIMARY KEY (tier, period_start, station_code, source)
+);
+CREATE INDEX IF NOT EXISTS idx_rollups_period ON weather_rollups (period_end, period_start);
+
+CREATE TABLE IF NOT EXISTS processing_state (
+	key TEXT PRIMARY KEY,
+	value TEXT
+);
+"""
+
+
+def _to_sql_value(value):
+	"""NaN 转为 NULL，numpy 标量转为 Python 类型"""
+	if value is None:
+		return None
+	if hasattr(value, 'item'):
+		value = value.item()
+	if isinstance(value, float) and math.isnan(value):
+		return None
+	return value
+
+
+def _format_time(value, is_end=False):
+	"""
+	将时间范围边界统一为可比较的字符串。
+	只有日期的结束边界包含当天，返回第二天作为开区间上界。
+	"""
+	if value is None:
+		return None
+	if isinstance(value, datetime):
+		return value.strftime('%Y-%m-%d %H:%M:%S')
+	if isinstance(value, date):
+		value = value.strftime('%Y-%m-%d')
+
+	value = str(value).strip()
+	if is_end and len(value) == 10:
+		return (datetime.strptime(value, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+	return value
+
+
+class WeatherStore:
+	"""SQLite天气历史库"""
+
+	def __init__(self, path=None):
+		self.path = path or DATA_FILES['weather_store']
+		os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+		self.conn = sqlite3.connect(self.path)
+		self.conn.execute('PRAGMA journal_mode=WAL')
+		self.conn.execute('PRAGMA synchronous=NORMAL')
+		self.conn.executescript(SCHEMA)
+		self._processor = None
+
+	@property
+	def processor(self):
+		"""数据处理器，首次写入时才导入pandas，只查询计数的命令不受影响"""
+		if self._processor is None:
+			from data_processor import WeatherDataProcessor
+			self._processor = WeatherDataProcessor()
+		return self._processor
+
+	def close(self):
+		"""关闭数据库连接"""
+		self.conn.close()
+
+	def count(self, table='weather_records'):
+		"""返回表中的记录数"""
+		return self.conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+	def latest_crawl_time(self):
+		"""返回最近一次抓取时间，库为空时返回None"""
+		return self.conn.execute('SELECT MAX(crawl_time) FROM weather_records').fetchone()[0]
+
+	def append(self, records):
+		"""追加原始数据，返回写入条数"""
+		import pandas as pd
+
+		if not records:
+			return 0
+
+		df = pd.DataFrame(records)
+		if 'date' not in df.columns:
+			df['date'] = None
+		if 'crawl_time' not in df.columns:
+			df['crawl_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+		if 'station_code' not in df.columns:
+			df['station_code'] = DEFAULT_STATION_CODE
+		df['station_code'] = df['station_code'].fillna(DEFAULT_STATION_CODE).astype(str)
+
+		# 预报日期在写入时解析，"今天/明天" 等相对日期以抓取当天为准
+		df['forecast_date'] = None
+		for crawl_day, group in df.groupby(df['crawl_time'].astype(str).str[:10]):
+			try:
+				reference = datetime.strptime(crawl_day, '%Y-%m-%d')
+			except ValueError:
+				reference = None
+			df.loc[group.index, 'forecast_date'] = self.processor.parse_date_column(group['date'], reference)
+
+		extra_columns = [col for col in df.columns if col not in RAW_COLUMNS]
+		rows = []
+		for record in df.to_dict('records'):
+			extra = {col: _to_sql_value(record[col]) for col in extra_columns}
+			extra = {key: value for key, value in extra.items() if value is not None}
+			row = [_to_sql_value(record.get(col)) for col in RAW_COLUMNS]
+			row.append(json.dumps(extra, ensure_ascii=False) if extra else None)
+			rows.append(row)
+
+		placeholders = ', '.join(['?'] * (len(RAW_COLUMNS) + 1))
+		try:
+			with self.conn:
+				self.conn.executemany(
+					f"INSERT INTO weather_records ({', '.join(RAW_COLUMNS)}, extra) VALUES ({placeholders})", rows
+				)
+			logger.info(f"已追加 {len(rows)} 条记录到历史库: {self.path}")
+			return len(rows)
+		except Exception as e:
+			logger.error(f"写入历史库失败: {e}")
+			return 0
+
+	def import_csv(self, filename=None):
+		"""导入旧版 weather_data.csv，返回写入条数"""
+		import pandas as pd
+
+		filename = filename or DATA_FILES['weather_data']
+		try:
+			df = pd.read_csv(filename, encoding='utf-8')
+		except Exception as e:
+			logger.error(f"读取CSV失败: {e}")
+			return 0
+
+		logger.info(f"从CSV导入历史数据: {filename}")
+		return self.append(df.to_dict('records'))
+
+	def _where(self, start, end, sources, station_code, time_field, prefix=''):
+		"""生成查询条件和参数"""
+		if time_field not in TIME_FIELDS:
+			raise ValueError(f"不支持的时间字段: {time_field}，可选: {', '.join(TIME_FIELDS)}")
+
+		conditions = []
+		params = []
+		start = _format_time(start)
+		end = _format_time(end, is_end=True)
+
+		if start is not None:
+			conditions.append(f'{prefix}{time_field} >= ?')
+			params.append(start)
+		if end is not None:
+			conditions.append(f'{prefix}{time_field} < ?')
+			params.append(end)
+		if sources:
+			sources = [sources] if isinstance(sources, str) else list(sources)
+			conditions.append(f"{prefix}source IN ({', '.join(['?'] * len(sources))})")
+			params.extend(sources)
+		if station_code is not None:
+			conditions.append(f'{prefix}station_code = ?')
+			params.append(str(station_code))
+
+		where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+		return where, params
+
+	def _read(self, sql, params):
+		"""执行查询并转换为DataFrame，展开 extra 列"""
+		import pandas as pd
+
+		cursor = self.conn.execute(sql, params)
+		columns = [desc[0] for desc in cursor.description]
+		df = pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+
+		extras = df.pop('extra') if 'extra' in df.columns else None
+		if extras is not None and extras.notnull().any():
+			expanded = pd.DataFrame([json.loads(value) if value else {} for value in extras], index=df.index)
+			df = df.join(expanded.drop(columns=[col for col in expanded.columns if col in df.columns]))
+		return df
+
+	def query(self, start=None, end=None, sources=None, station_code=None, time_field='crawl_time'):
+		"""按时间范围查询原始数据，start/end 可为日期或时间，结束日期包含当天"""
+		import pandas as pd
+
+		where, params = self._where(start, end, sources, station_code, time_field)
+		sql = (f"SELECT id AS record_id, {', '.join(RAW_COLUMNS)}, extra FROM weather_records {where} "
+			   f"ORDER BY {time_field}, id")
+		try:
+			df = self._read(sql, params)
+			logger.info(f"从历史库查询到 {len(df)} 条原始数据")
+			return df
+		except Exception as e:
+			logger.error(f"查询历史库失败: {e}")
+			return pd.DataFrame()
+
+	def get_state(self, key, default=None):
+		"""读取处理状态（JSON），不存在时返回 default"""
+		row = self.conn.execute('SELECT value FROM processing_state WHERE key = ?', (key,)).fetchone()
+		return json.loads(row[0]) if row else default
+
+	def _write_state(self, state):
+		"""在当前事务中写入处理状态"""
+		self.conn.executemany(
+			'INSERT OR REPLACE INTO processing_state (key, value) VALUES (?, ?)',
+			[(key, json.dumps(value, ensure_ascii=False)) for key, value in state.items()]
+		)
+
+	def reset_processing(self):
+		"""清空处理结果和处理状态，下次增量处理将从头开始"""
+		with self.conn:
+			self.conn.execute('DELETE FROM processed_records')
+			self.conn.execute('DELETE FROM processing_state')
+		logger.info("已清空处理结果和水位线")
+
+	def query_new(self, after_id=0):
+		"""查询记录ID大于 after_id 的新增原始数据"""
+		import pandas as pd
+
+		sql = (f"SELECT id AS record_id, {', '.join(RAW_COLUMNS)}, extra FROM weather_records "
+			   f"WHERE id > ? ORDER BY id")
+		try:
+			df = self._read(sql, [after_id or 0])
+			logger.info(f"从历史库查询到 {len(df)} 条新增原始数据 (记录ID > {after_id or 0})")
+			return df
+		except Exception as e:
+			logger.error(f"查询新增数据失败: {e}")
+			return pd.DataFrame()
+
+	def save_processed(self, df, state=None):
+		"""
+		保存处理结果（按 record_id 覆盖），返回写入条数。
+		state 中的处理状态（如水位线）与处理结果在同一事务中写入，中途失败不会跳过数据。
+		"""
+		if df.empty or 'record_id' not in df.columns:
+			return 0
+
+		columns = ['record_id'] + PROCESSED_COLUMNS
+		frame = df.reindex(columns=columns).astype(object)
+		rows = [[_to_sql_value(value) for value in row] for row in frame.itertuples(index=False, name=None)]
+
+		try:
+			with self.conn:
+				self.conn.executemany(
+					f"INSERT OR REPLACE INTO processed_records ({', '.join(columns)}) "
+					f"VALUES ({', '.join(['?'] * len(columns))})", rows
+				)
+				if state:
+					self._write_state(state)
+			logger.info(f"已保存 {len(rows)} 条处理结果到历史库")
+			return len(rows)
+		except Exception as e:
+			logger.error(f"保存处理结果失败: {e}")
+			return 0
+
+	def query_processed(self, start=None, end=None, sources=None, station_code=None, time_field='crawl_time'):
+		"""
+		按时间范围查询处理后的数据（含原始字段）。
+		按抓取时间查询时，已压缩的更早数据从汇总层读取并排在前面，tier 列标明每行所在层级。
+		"""
+		import pandas as pd
+
+		where, params = self._where(start, end, sources, station_code, time_field, prefix='r.')
+		raw_columns = ', '.join(f'r.{col}' for col in RAW_COLUMNS)
+		processed_columns = ', '.join(f'p.{col}' for col in PROCESSED_COLUMNS)
+		sql = (f"SELECT r.id AS record_id, {raw_columns}, r.extra, {processed_columns} "
+			   f"FROM weather_records r JOIN processed_records p ON p.record_id = r.id {where} "
+			   f"ORDER BY r.{time_field}, r.id")
+		try:
+			df = self._read(sql, params)
+			df['tier'] = 'raw'
+			if time_field == 'crawl_time':
+				rollups = self.query_rollups(start, end, sources, station_code)
+				if not rollups.empty:
+					df = pd.concat([rollups, df], ignore_index=True)
+			df = self.processor.optimize_dtypes(df)
+			logger.info(f"从历史库查询到 {len(df)} 条处理后数据")
+			return df
+		except Exception as e:
+			logger.error(f"查询处理结果失败: {e}")
+			return pd.DataFrame()
+
+	def _upsert_rollups(self, select_sql, params):
+		"""写入汇总行，已存在的 (层级, 周期, 站点, 数据源) 与新数据合并"""
+		merge = ['samples = samples + excluded.samples']
+		for measure in ROLLUP_MEASURES:
+			merge.append(f'{measure}_count = {measure}_count + excluded.{measure}_count')
+			merge.append(f'{measure}_sum = {measure}_sum + excluded.{measure}_sum')
+			for field, func in (('min', 'MIN'), ('max', 'MAX')):
+				column = f'{measure}_{field}'
+				merge.append(f'{column} = {func}(COALESCE({column}, excluded.{column}), '
+							 f'COALESCE(excluded.{column}, {column}))')
+
+		self.conn.execute(
+			f"INSERT INTO weather_rollups ({', '.join(ROLLUP_COLUMNS)}) {select_sql} "
+			f"ON CONFLICT ({', '.join(ROLLUP_KEY)}) DO UPDATE SET {', '.join(merge)}", params
+		)
+
+	def _rollup_raw(self, cutoff):
+		"""把抓取时间早于 cutoff 的已处理原始记录汇总到 daily 层并删除，返回压缩的记录数"""
+		self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS compact_ids (id INTEGER PRIMARY KEY)')
+		self.conn.execute('DELETE FROM compact_ids')
+		count = self.conn.execute(
+			'INSERT INTO compact_ids SELECT r.id FROM weather_records r '
+			'JOIN processed_records p ON p.record_id = r.id WHERE r.crawl_time < ?', (cutoff,)
+		).rowcount
+		if not count:
+			return 0
+
+		measures = ', '.join(f'COUNT(p.{measure}_cleaned), TOTAL(p.{measure}_cleaned), '
+							 f'MIN(p.{measure}_cleaned), MAX(p.{measure}_cleaned)' for measure in ROLLUP_MEASURES)
+		self._upsert_rollups(
+			f"SELECT 'daily', substr(r.crawl_time, 1, 10), date(substr(r.crawl_time, 1, 10), '+1 day'), "
+			f"r.station_code, r.source, COUNT(*), {measures} "
+			f"FROM weather_records r JOIN processed_records p ON p.record_id = r.id "
+			f"WHERE r.id IN (SELECT id FROM compact_ids) GROUP BY 2, 4, 5", ()
+		)
+		self.conn.execute('DELETE FROM processed_records WHERE record_id IN (SELECT id FROM compact_ids)')
+		self.conn.execute('DELETE FROM weather_records WHERE id IN (SELECT id FROM compact_ids)')
+		return count
+
+	def _rollup_daily(self, cutoff):
+		"""把早于 cutoff 的日汇总按周（周一开始）合并到 weekly 层并删除，返回合并的日汇总行数"""
+		week = "date(period_start, '-6 days', 'weekday 1')"
+		measures = ', '.join(f'SUM({measure}_count), TOTAL({measure}_sum), MIN({measure}_min), MAX({measure}_max)'
+							 for measure in ROLLUP_MEASURES)
+		self._upsert_rollups(
+			f"SELECT 'weekly', {week}, date({week}, '+7 days'), station_code, source, SUM(samples), {measures} "
+			f"FROM weather_rollups WHERE tier = 'daily' AND period_start < ? GROUP BY 2, 4, 5", (cutoff,)
+		)
+		return self.conn.execute("DELETE FROM weather_rollups WHERE tier = 'daily' AND period_start < ?",
+								 (cutoff,)).rowcount
+
+	def compact(self, raw_days=RETENTION_RAW_DAYS, daily_days=RETENTION_DAILY_DAYS):
+		"""
+		按保留策略分层压缩历史，天数以最近一次抓取为准，为0时不压缩该层。
+		未处理的原始记录不压缩。返回 {'raw': 汇总的原始记录数, 'daily': 合并为周汇总的日汇总数}
+		"""
+		result = {'raw': 0, 'daily': 0}
+		latest = self.latest_crawl_time()
+		if not latest:
+			return result
+		latest = datetime.strptime(latest[:10], '%Y-%m-%d')
+
+		try:
+			with self.conn:
+				if raw_days:
+					result['raw'] = self._rollup_raw((latest - timedelta(days=raw_days)).strftime('%Y-%m-%d'))
+				if daily_days:
+					cutoff = latest - timedelta(days=daily_days)
+					cutoff -= timedelta(days=cutoff.weekday())  # 对齐到周一，同一周的数据不会分在两层
+					result['daily'] = self._rollup_daily(cutoff.strftime('%Y-%m-%d'))
+		except Exception as e:
+			logger.error(f"压缩历史库失败: {e}")
+			return {'raw': 0, 'daily': 0}
+
+		if result['raw'] or result['daily']:
+			logger.info(f"历史库压缩完成: {result['raw']} 条原始记录汇总到 daily 层, "
+						f"{result['daily']} 条日汇总合并到 weekly 层")
+		return result
+
+	def query_rollups(self, start=None, end=None, sources=None, station_code=None):
+		"""
+		查询与抓取时间范围重叠的汇总数据，列名与处理结果一致：*_cleaned 为均值，另有 *_min/*_max，
+		parsed_date 和 crawl_time 为周期开始日期，samples 为汇总的原始记录数
+		"""
+		import pandas as pd
+
+		where, params = self._where(None, None, sources, station_code, 'crawl_time')
+		conditions = [where[len('WHERE '):]] if where else []
+		start = _format_time(start)
+		end = _format_time(end, is_end=True)
+		if start is not None:
+			conditions.append('period_end > ?')
+			params.append(start)
+		if end is not None:
+			conditions.append('period_start < ?')
+			params.append(end)
+
+		measures = ', '.join(f'{measure}_sum / {measure}_count AS {measure}_cleaned, '
+							 f'{measure}_min, {measure}_max' for measure in ROLLUP_MEASURES)
+		sql = (f"SELECT tier, station_code, source, period_start AS parsed_date, "
+			   f"period_start || ' 00:00:00' AS crawl_time, samples, {measures} FROM weather_rollups "
+			   f"{'WHERE ' + ' AND '.join(conditions) if conditions else ''} ORDER BY period_start, station_code, source")
+		try:
+			return self._read(sql, params)
+		except Exception as e:
+			logger.error(f"查询汇总数据失败: {e}")
+			return pd.DataFrame()
+
+	def default_start(self, window_days):
+		"""默认查询起点：最近一次抓取前 window_days 天，库为空或不限制时返回None"""
+		latest = self.latest_crawl_time()
+		if not latest or not window_days:
+			return None
+		latest = datetime.strptime(latest[:10], '%Y-%m-%d')
+		return (latest - timedelta(days=window_days)).strftime('%Y-%m-%d')
+
+
+def main():
+	"""主函数"""
+	store = WeatherStore()
+
+	if store.count() == 0 and os.path.exists(DATA_FILES['weather_data']):
+		store.import_csv()
+
+	print(f"历史库: {store.path}")
+	print(f"原始数据: {store.count()} 条, 处理结果: {store.count('processed_records')} 条, "
+		  f"汇总: {store.count('weather_rollups')} 条")
+	print(f"最近抓取时间: {store.latest_crawl_time()}")
+	store.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -8,9 +8,12 @@ import time
 import json
 import csv
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
 import logging
-from config import HEADERS, WEATHER_URLS, REQUEST_DELAY, TIMEOUT, MAX_RETRIES, DATA_FILES
+from config import (HEADERS, WEATHER_URLS, REQUEST_DELAY, TIMEOUT, MAX_RETRIES, DATA_FILES, ASYNC_FETCH,
+					HTTP_CACHE_ENABLED, PARSER_BACKEND, ensure_directories)
+from async_fetcher import AsyncWeatherFetcher, aiohttp
+from http_cache import ResponseCache
+from html_backend import get_backend
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -18,18 +21,45 @@ logger = logging.getLogger(__name__)
 
 
 class WeatherScraper:
-	def __init__(self):
+	def __init__(self, use_cache=HTTP_CACHE_ENABLED, parser_backend=PARSER_BACKEND, keep_alive=False):
+		"""keep_alive 为True时并发抓取的连接在多次爬取之间保持（常驻模式）"""
 		self.session = requests.Session()
 		self.session.headers.update(HEADERS)
+		self.cache = ResponseCache() if use_cache else None
+		self.backend = get_backend(parser_backend)
+		self.keep_alive = keep_alive
+		self.fetcher = None
+		self.bytes_fetched = 0  # 累计从网络获取的响应体字节数
+
+	def close(self):
+		"""关闭HTTP会话和复用的并发抓取连接"""
+		if self.fetcher is not None:
+			self.fetcher.close()
+			self.fetcher = None
+		self.session.close()
 
 	def get_page_content(self, url, retries=MAX_RETRIES):
 		"""获取网页内容"""
+		entry = None
+		if self.cache:
+			cached_body, entry = self.cache.lookup(url)
+			if cached_body is not None:
+				return cached_body
+
+		headers = self.cache.conditional_headers(entry) if self.cache else {}
+
 		for attempt in range(retries):
 			try:
-				response = self.session.get(url, timeout=TIMEOUT)
+				response = self.session.get(url, timeout=TIMEOUT, headers=headers)
+				if response.status_code == 304 and entry:
+					return self.cache.revalidated(url, entry)
+
 				response.raise_for_status()
+				self.bytes_fetched += len(response.content)
 				response.encoding = 'utf-8'
 				logger.info(f"成功获取页面内容: {url}")
+				if self.cache:
+					return self.cache.stored(url, response.text, response.headers)
 				return response.text
 			except requests.RequestException as e:
 				logger.warning(f"第{attempt + 1}次请求失败: {url}, 错误: {e}")
@@ -44,35 +74,15 @@ class WeatherScraper:
 		if not html_content:
 			return []
 
-		soup = BeautifulSoup(html_content, 'html.parser')
 		weather_data = []
 
 		try:
 			# 解析7天天气
-			weather_list = soup.find('ul', class_='t clearfix')
-			if weather_list:
-				items = weather_list.find_all('li')
-				for item in items:
-					date_elem = item.find('h1')
-					weather_elem = item.find('p', class_='wea')
-					temp_elem = item.find('p', class_='tem')
-					wind_elem = item.find('p', class_='win')
-
-					if all([date_elem, weather_elem, temp_elem]):
-						# 提取温度信息
-						temp_high = temp_elem.find('span')
-						temp_low = temp_elem.find('i')
-
-						weather_info = {
-							'date': date_elem.get_text(strip=True),
-							'weather': weather_elem.get_text(strip=True),
-							'temp_high': temp_high.get_text(strip=True) if temp_high else '',
-							'temp_low': temp_low.get_text(strip=True) if temp_low else '',
-							'wind': wind_elem.get_text(strip=True) if wind_elem else '',
-							'source': 'china_weather',
-							'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-						}
-						weather_data.append(weather_info)
+			crawl_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+			for item in self.backend.parse_china_weather(html_content):
+				item['source'] = 'china_weather'
+				item['crawl_time'] = crawl_time
+				weather_data.append(item)
 
 			logger.info(f"中国天气网解析完成，获取{len(weather_data)}条数据")
 
@@ -86,38 +96,14 @@ class WeatherScraper:
 		if not html_content:
 			return []
 
-		soup = BeautifulSoup(html_content, 'html.parser')
 		weather_data = []
 
 		try:
-			# 查找天气信息容器
-			weather_container = soup.find('div', class_='weather-list')
-			if not weather_container:
-				weather_container = soup.find('div', id='weather')
-
-			if weather_container:
-				weather_items = weather_container.find_all('div', class_='weather-item')
-				if not weather_items:
-					weather_items = weather_container.find_all('li')
-
-				for item in weather_items:
-					try:
-						date = item.find(class_='date') or item.find('h3')
-						weather = item.find(class_='weather') or item.find('p')
-						temperature = item.find(class_='temperature') or item.find(class_='temp')
-
-						if date and weather:
-							weather_info = {
-								'date': date.get_text(strip=True),
-								'weather': weather.get_text(strip=True),
-								'temperature': temperature.get_text(strip=True) if temperature else '',
-								'source': 'tianqi_so',
-								'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-							}
-							weather_data.append(weather_info)
-					except Exception as e:
-						logger.warning(f"解析单个天气项目失败: {e}")
-						continue
+			crawl_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+			for item in self.backend.parse_tianqi_so(html_content):
+				item['source'] = 'tianqi_so'
+				item['crawl_time'] = crawl_time
+				weather_data.append(item)
 
 			logger.info(f"全国天气网解析完成，获取{len(weather_data)}条数据")
 
@@ -126,28 +112,69 @@ class WeatherScraper:
 
 		return weather_data
 
-	def scrape_all_sources(self):
-		"""爬取所有数据源"""
-		all_weather_data = []
+	def parse_source(self, source_name, html_content):
+		"""按数据源选择解析方法"""
+		if source_name == 'china_weather':
+			return self.parse_china_weather(html_content)
+		elif source_name == 'tianqi_so':
+			return self.parse_tianqi_so(html_content)
+		else:
+			# 其他数据源的通用解析
+			return self.parse_generic_weather(html_content, source_name)
+
+	def scrape_all_sources(self, concurrent=ASYNC_FETCH, sink=None):
+		"""爬取所有数据源，sink 不为None时每个数据源解析后立即写入"""
+		return self.parse_pages(self.fetch_all_sources(concurrent), sink)
+
+	def fetch_all_sources(self, concurrent=ASYNC_FETCH):
+		"""获取所有数据源的网页，返回 {来源: 网页内容}"""
+		if concurrent:
+			if aiohttp is not None:
+				return self.fetch_all_sources_async()
+			logger.warning("未安装aiohttp，退回逐个抓取模式")
+
+		pages = {}
 
 		for source_name, url in WEATHER_URLS.items():
 			logger.info(f"开始爬取 {source_name}: {url}")
-
-			html_content = self.get_page_content(url)
-			if html_content:
-				if source_name == 'china_weather':
-					data = self.parse_china_weather(html_content)
-				elif source_name == 'tianqi_so':
-					data = self.parse_tianqi_so(html_content)
-				else:
-					# 其他数据源的通用解析
-					data = self.parse_generic_weather(html_content, source_name)
-
-				all_weather_data.extend(data)
+			pages[source_name] = self.get_page_content(url)
 
 			# 请求间隔
 			time.sleep(REQUEST_DELAY)
 
+		return pages
+
+	def fetch_all_sources_async(self, urls=None):
+		"""并发获取所有数据源的网页，按主机控制请求间隔"""
+		urls = urls or WEATHER_URLS
+		logger.info(f"开始并发爬取 {len(urls)} 个数据源")
+
+		if self.keep_alive:
+			if self.fetcher is None:
+				self.fetcher = AsyncWeatherFetcher(cache=self.cache, keep_alive=True)
+			fetcher = self.fetcher
+		else:
+			fetcher = AsyncWeatherFetcher(cache=self.cache)
+
+		bytes_before = fetcher.bytes_fetched
+		pages = fetcher.run(urls)
+		self.bytes_fetched += fetcher.bytes_fetched - bytes_before
+		return pages
+
+	def scrape_all_sources_async(self, urls=None, sink=None):
+		"""并发爬取所有数据源，按主机控制请求间隔"""
+		return self.parse_pages(self.fetch_all_sources_async(urls), sink)
+
+	def parse_pages(self, pages, sink=None):
+		"""解析 {来源: 网页内容}，返回所有天气数据；sink 不为None时每个数据源解析后立即写入"""
+		all_weather_data = []
+		for source_name, html_content in pages.items():
+			if html_content:
+				data = self.parse_source(source_name, html_content)
+				if sink is not None:
+					sink.write(source_name, data)
+				all_weather_data.extend(data)
+
 		return all_weather_data
 
 	def parse_generic_weather(self, html_content, source_name):
@@ -155,29 +182,18 @@ class WeatherScraper:
 		if not html_content:
 			return []
 
-		soup = BeautifulSoup(html_content, 'html.parser')
 		weather_data = []
 
 		try:
 			# 尝试找到包含天气信息的元素
-			possible_containers = [
-				soup.find('div', class_='forecast'),
-				soup.find('div', class_='weather'),
-				soup.find('ul', class_='weather-list'),
-				soup.find('div', id='forecast'),
-			]
-
-			for container in possible_containers:
-				if container:
-					# 提取基本信息
-					text_content = container.get_text(strip=True)
-					weather_info = {
-						'content': text_content[:200],  # 限制长度
-						'source': source_name,
-						'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-					}
-					weather_data.append(weather_info)
-					break
+			text_content = self.backend.parse_generic(html_content)
+			if text_content is not None:
+				weather_info = {
+					'content': text_content[:200],  # 限制长度
+					'source': source_name,
+					'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+				}
+				weather_data.append(weather_info)
 
 		except Exception as e:
 			logger.error(f"通用解析失败 {source_name}: {e}")
@@ -230,6 +246,7 @@ class WeatherScraper:
 
 def main():
 	"""主函数"""
+	ensure_directories()
 	scraper = WeatherScraper()
 
 	print("开始爬取浦东新区天气数据...")